@@ -13,8 +13,19 @@ from app.scripts.insert_data import initialize_database
 
 import logging
 
+class SharedEngineSQLAlchemy(SQLAlchemy):
+    """Flask-SQLAlchemy (and so Flask-Migrate) on the engine of app.models.base instead of a second engine and pool."""
+
+    # Internal hook of Flask-SQLAlchemy 3.1; pinned in requirements.txt
+    def _make_engine(self, bind_key, options, app):
+        if bind_key is None:
+            from app.models.base import engine
+            return engine
+        return super()._make_engine(bind_key, options, app)
+
+
 # Create the SQLAlchemy object (used to manage database models)
-db = SQLAlchemy()
+db = SharedEngineSQLAlchemy()
 
 # Create the migration object (used for handling database migrations)
 migrate = Migrate()
@@ -36,6 +47,22 @@ def create_app(config_class):
     db.init_app(app)
     migrate.init_app(app, db)
 
+    # Return each request's session (and its pooled connection) when the request ends
+    from app.models.base import SessionLocal
+
+    @app.teardown_appcontext
+    def remove_session(exception=None):
+        SessionLocal.remove()
+
+    # SQL count, DB/ORM time and named spans per request, reported in the Server-Timing header
+    from app.models.base import engine
+    from app.profiling import init_app as init_profiling
+    init_profiling(app, engine)
+
+    # Request, solver, cache and pool metrics for Prometheus (GET /metrics)
+    from app.services.metrics_service import MetricsService
+    MetricsService.init_app(app)
+
     # Configure the logger
     logging.basicConfig(
         level=logging.INFO,
@@ -61,6 +88,7 @@ def create_app(config_class):
     from app.blueprints.codex import codex_blueprint
     from app.blueprints.calculator import calculator_blueprint
     from app.blueprints.users import users_blueprint
+    from app.blueprints.metrics import metrics_blueprint, prometheus_blueprint
 
     app.register_blueprint(recipes_blueprint, url_prefix='/api/recipes')
     app.register_blueprint(items_blueprint, url_prefix='/api/items')
@@ -68,8 +96,20 @@ def create_app(config_class):
     app.register_blueprint(codex_blueprint, url_prefix='/api/codex')
     app.register_blueprint(calculator_blueprint, url_prefix='/api/calculator')
     app.register_blueprint(users_blueprint, url_prefix='/api/users')
+    app.register_blueprint(metrics_blueprint, url_prefix='/api/metrics')
+    app.register_blueprint(prometheus_blueprint)
     app.register_blueprint(api_blueprint, url_prefix='/api/data')
 
+    # Load the recipe graph snapshot once so the calculator and recipe endpoints don't query it per request
+    if app.config.get('PRELOAD_RECIPE_GRAPH', True):
+        from app.services.recipe_graph_service import RecipeGraphService
+        RecipeGraphService.warm_up()
+
+    # Render the catalog payloads once so the first visitors don't pay for it
+    if app.config.get('PRELOAD_STATIC_RESPONSES', True):
+        from app.services.static_response_service import StaticResponseService
+        StaticResponseService.warm_up(app)
+
     # initialize_database()
 
     return app
\ No newline at end of file
@@ -1,17 +1,20 @@
 from flask import Blueprint, jsonify, redirect, url_for
 from app.services.building_service import BuildingService
+from app.services.static_response_service import StaticResponseService
 
 buildings_blueprint = Blueprint('buildings', __name__)
 
+# Catalog payloads, serialized once per data version
+StaticResponseService.register('buildings.detail', BuildingService.get_all_buildings_detail)
+StaticResponseService.register('buildings.summary', BuildingService.get_all_buildings_summary)
+
 @buildings_blueprint.route('/detail/', methods=['GET'])
 def get_all_buildings_detail():
-    buildings = BuildingService.get_all_buildings_detail()
-    return jsonify(buildings)
+    return StaticResponseService.respond('buildings.detail')
 
 @buildings_blueprint.route('/summary/', methods=['GET'])
 def get_all_buildings_summary():
-    buildings = BuildingService.get_all_buildings_summary()
-    return jsonify(buildings)
+    return StaticResponseService.respond('buildings.summary')
 
 @buildings_blueprint.route('/detail/<int:building_id>', methods=['GET'])
 def get_building_by_id_detail(building_id):
@@ -1,15 +1,18 @@
-from flask import Blueprint, jsonify, request
+import json
 
+from flask import Blueprint, jsonify, request, Response, stream_with_context, url_for
+
+from app.profiling import span
 from app.scripts.adjust_recipe_amounts_for_fluids import UpdateLiquids
-from app.scripts.pulp_optimizer import optimizer
+from app.services.calculator_service import CalculatorService
 from app.services.configuration_service import ConfigurationService
+from app.services.job_service import JobQueueFullError
 from app.services.recipe_service import RecipeService
 
 calculator_blueprint = Blueprint('calculator', __name__)
 
 @calculator_blueprint.route('/', methods=['GET', 'POST'])
 def calculator():
-    print("Starting optimizer")
     # solution = optimizer()
     # if request.method == 'GET':
     #     return jsonify(solution)
@@ -33,8 +36,9 @@ def calculator():
 
     try:
         # Load user configuration
-        recipes = ConfigurationService.load_user_configuration(user_key)
-        production_lines = ConfigurationService.load_production_lines(user_key, line)
+        with span('load_config'):
+            recipes = ConfigurationService.load_user_configuration(user_key)
+            production_lines = ConfigurationService.load_production_lines(user_key, line)
         production_line = production_lines[0]
         # keys, values = production_line[0].items()
         # production_line = values
@@ -43,10 +47,11 @@ def calculator():
             if 'production_targets' in production_line and len(production_line['production_targets']) > 0:
                 targets = production_line['production_targets']
 
-                solution = optimizer(recipes, targets)
+                solution = CalculatorService.solve_production_line(user_key, line, recipes, targets)
 
-                # Return the user configuration as JSON
-                return jsonify(solution), 200
+                # Return the optimized production line as JSON
+                cache_status = 'HIT' if solution['cache']['hit'] else 'MISS'
+                return jsonify(solution), 200, {'X-Solution-Cache': cache_status}
             else:
                 return jsonify({"message": "no production targets in production line",
                                 "production_line": production_line}), 400
@@ -58,6 +63,163 @@ def calculator():
         return jsonify({'error': 'An error occurred', 'details': str(e)}), 500
 
 
+@calculator_blueprint.route('/batch', methods=['POST'])
+def calculator_batch():
+    """
+    Optimize several production lines in one call. Body: {"lines": [line ids] (all lines when omitted),
+    "joint": bool (also solve the lines together against the global raw resource limits)}.
+    """
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return jsonify({'error': 'Authorization header with Bearer token is required'}), 400
+
+    # Extract user_key from the Authorization header
+    user_key = auth_header.split('Bearer ')[1]
+
+    data = request.get_json(silent=True) or {}
+    lines = data.get('lines')
+    if lines is not None and (not isinstance(lines, list) or not lines):
+        return jsonify({'error': 'lines must be a non-empty list of line ids'}), 400
+
+    try:
+        recipes = ConfigurationService.load_user_configuration(user_key)
+        production_lines = ConfigurationService.load_production_lines(user_key)
+        if lines is not None:
+            requested = {str(line) for line in lines}
+            production_lines = [production_line for production_line in production_lines
+                                if production_line['id'] in requested]
+            missing = requested - {production_line['id'] for production_line in production_lines}
+            if missing:
+                return jsonify({"message": "couldn't find specified production lines",
+                                "lines": sorted(missing)}), 400
+
+        solutions = CalculatorService.solve_production_lines(user_key, recipes, production_lines,
+                                                             joint=bool(data.get('joint')))
+        return jsonify(solutions), 200
+
+    except Exception as e:
+        return jsonify({'error': 'An error occurred', 'details': str(e)}), 500
+
+
+@calculator_blueprint.route('/alternates', methods=['POST'])
+def rank_alternates():
+    """Rank the alternate recipes the user has not unlocked by how much each would improve a production line."""
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return jsonify({'error': 'Authorization header with Bearer token is required'}), 400
+
+    # Extract user_key from the Authorization header
+    user_key = auth_header.split('Bearer ')[1]
+
+    # Extract the JSON body
+    data = request.json
+    if not data or 'line' not in data:
+        return jsonify({'error': 'line (active tab id) is required in the request body'}), 400
+
+    line = data['line']
+
+    try:
+        recipes = ConfigurationService.load_user_configuration(user_key)
+        production_lines = ConfigurationService.load_production_lines(user_key, line)
+        production_line = production_lines[0] if production_lines else None
+
+        if production_line is None:
+            return jsonify({"message": "couldn't find specified production line"}), 400
+        if not production_line.get('production_targets'):
+            return jsonify({"message": "no production targets in production line",
+                            "production_line": production_line}), 400
+
+        ranking = CalculatorService.rank_alternates(recipes, production_line['production_targets'])
+        return jsonify(ranking), 200
+
+    except ValueError as e:
+        return jsonify({'error': 'Production line cannot be optimized', 'details': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': 'An error occurred', 'details': str(e)}), 500
+
+
+@calculator_blueprint.route('/jobs', methods=['POST'])
+def create_calculator_job():
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return jsonify({'error': 'Authorization header with Bearer token is required'}), 400
+
+    # Extract user_key from the Authorization header
+    user_key = auth_header.split('Bearer ')[1]
+
+    # Extract the JSON body
+    data = request.json
+    if not data or 'line' not in data:
+        return jsonify({'error': 'line (active tab id) is required in the request body'}), 400
+
+    line = data['line']
+
+    try:
+        recipes = ConfigurationService.load_user_configuration(user_key)
+        production_lines = ConfigurationService.load_production_lines(user_key, line)
+        production_line = production_lines[0] if production_lines else None
+
+        if production_line is None:
+            return jsonify({"message": "couldn't find specified production line"}), 400
+        if not production_line.get('production_targets'):
+            return jsonify({"message": "no production targets in production line",
+                            "production_line": production_line}), 400
+
+        job, coalesced = CalculatorService.submit_production_line_job(
+            user_key, line, recipes, production_line['production_targets'])
+
+        location = url_for('calculator.get_calculator_job', job_id=job.id)
+        return jsonify({
+            'job_id': job.id,
+            'status': job.status,
+            'coalesced': coalesced,
+            'status_url': location,
+            'events_url': url_for('calculator.stream_calculator_job_events', job_id=job.id),
+        }), 202, {'Location': location}
+
+    except JobQueueFullError as e:
+        return jsonify({'error': 'Calculator is busy, try again shortly', 'details': str(e)}), 503, {'Retry-After': '5'}
+    except Exception as e:
+        return jsonify({'error': 'An error occurred', 'details': str(e)}), 500
+
+
+@calculator_blueprint.route('/jobs/<job_id>', methods=['GET'])
+def get_calculator_job(job_id):
+    job = CalculatorService.get_job(job_id)
+    if job is None:
+        return jsonify({'message': 'Job not found'}), 404
+
+    return jsonify(job.to_dict()), 200
+
+
+@calculator_blueprint.route('/jobs/<job_id>/events', methods=['GET'])
+def stream_calculator_job_events(job_id):
+    """Server-Sent Events stream of a job's phases, ending with a 'finished' or 'failed' event."""
+    job = CalculatorService.get_job(job_id)
+    if job is None:
+        return jsonify({'message': 'Job not found'}), 404
+
+    def event_stream():
+        cursor = 0
+        while True:
+            events = job.wait_for_events(cursor, timeout=15)
+            if not events:
+                # Comment line keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+
+            for event in events:
+                cursor += 1
+                yield f"event: {event['phase']}\ndata: {json.dumps(event)}\n\n"
+
+            if job.done and cursor >= len(job.events):
+                yield f"event: result\ndata: {json.dumps(job.to_dict(include_result=False))}\n\n"
+                return
+
+    return Response(stream_with_context(event_stream()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 # @calculator_blueprint.route('/update_liquids/', methods=['GET'])
 # def update_liquids():
 #     try:
@@ -1,17 +1,22 @@
 from flask import Blueprint, jsonify, redirect, url_for
 from app.services.item_service import ItemService
+from app.services.static_response_service import StaticResponseService
 
 items_blueprint = Blueprint('items', __name__)
 
+# Catalog payloads, serialized once per data version
+StaticResponseService.register('items.detail', ItemService.get_all_items_detail)
+StaticResponseService.register('items.summary', ItemService.get_all_items_summary)
+StaticResponseService.register('items.components.detail', ItemService.get_component_items_detail)
+StaticResponseService.register('items.components.summary', ItemService.get_component_items_summary)
+
 @items_blueprint.route('/detail/', methods=['GET'])
 def get_all_items_detail():
-    items = ItemService.get_all_items_detail()
-    return jsonify(items)
+    return StaticResponseService.respond('items.detail')
 
 @items_blueprint.route('/summary/', methods=['GET'])
 def get_all_items_summary():
-    items = ItemService.get_all_items_summary()
-    return jsonify(items)
+    return StaticResponseService.respond('items.summary')
 
 @items_blueprint.route('/detail/<int:item_id>', methods=['GET'])
 def get_item_by_id_detail(item_id):
@@ -31,19 +36,13 @@ def get_item_by_id_summary(item_id):
 
 @items_blueprint.route('/components/detail/', methods=['GET'])
 def get_component_items_detail():
-    items = ItemService.get_component_items_detail()
-    if items:
-        return jsonify(items)
-    else:
-        return jsonify({'message': 'No components found.'}), 404
+    return StaticResponseService.respond('items.components.detail',
+                                         empty_response=(jsonify({'message': 'No components found.'}), 404))
 
 @items_blueprint.route('/components/summary/', methods=['GET'])
 def get_component_items_summary():
-    items = ItemService.get_component_items_summary()
-    if items:
-        return jsonify(items)
-    else:
-        return jsonify({'message': 'No components found.'}), 404
+    return StaticResponseService.respond('items.components.summary',
+                                         empty_response=(jsonify({'message': 'No components found.'}), 404))
 
 # Handle Redirects
 @items_blueprint.route('/', methods=['GET'])
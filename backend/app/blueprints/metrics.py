@@ -0,0 +1,19 @@
+from flask import Blueprint, Response, jsonify
+
+from app.models.base import engine
+from app.models.engine import get_pool_stats
+from app.services.metrics_service import MetricsService
+
+metrics_blueprint = Blueprint('metrics', __name__)
+# Registered without a prefix: Prometheus scrapes /metrics by default
+prometheus_blueprint = Blueprint('prometheus', __name__)
+
+@prometheus_blueprint.route('/metrics', methods=['GET'])
+def get_prometheus_metrics():
+    body, content_type = MetricsService.render()
+    return Response(body, content_type=content_type)
+
+@metrics_blueprint.route('/pool', methods=['GET'])
+def get_pool_metrics():
+    # Connection pool usage and checkout wait times of this worker process
+    return jsonify(get_pool_stats(engine))
@@ -1,27 +1,34 @@
 from flask import Blueprint, jsonify, redirect, url_for
+from app.services.recipe_graph_service import RecipeGraphService
 from app.services.recipe_service import RecipeService
+from app.services.static_response_service import StaticResponseService
 
 recipes_blueprint = Blueprint('recipes', __name__)
 
+# Catalog payloads, serialized once per data version
+StaticResponseService.register('recipes.detail', RecipeService.get_all_recipes_detail)
+StaticResponseService.register('recipes.summary', RecipeService.get_all_recipes_summary)
+StaticResponseService.register('recipes.components.detail',
+                               lambda: RecipeGraphService.get_graph().component_recipes_details)
+StaticResponseService.register('recipes.components.grouped.detail',
+                               lambda: RecipeGraphService.get_graph().component_recipes_grouped_details)
+StaticResponseService.register('recipes.components.ids', lambda: RecipeGraphService.get_graph().component_recipe_ids)
+
 @recipes_blueprint.route('/detail/', methods=['GET'])
 def get_all_recipes_detail():
-    recipes = RecipeService.get_all_recipes_detail()
-    return jsonify(recipes)
+    return StaticResponseService.respond('recipes.detail')
 
 @recipes_blueprint.route('/summary/', methods=['GET'])
 def get_all_recipes_summary():
-    recipes = RecipeService.get_all_recipes_summary()
-    return jsonify(recipes)
+    return StaticResponseService.respond('recipes.summary')
 
 @recipes_blueprint.route('/components/detail/', methods=['GET'])
 def get_component_recipes_details():
-    recipes = RecipeService.get_component_recipes_details()
-    return jsonify(recipes)
+    return StaticResponseService.respond('recipes.components.detail')
 
 @recipes_blueprint.route('/components/grouped/detail/', methods=['GET'])
 def get_component_recipes_grouped_details():
-    recipes = RecipeService.get_component_recipes_grouped_details()
-    return jsonify(recipes)
+    return StaticResponseService.respond('recipes.components.grouped.detail')
 
 from flask import request, jsonify
 
@@ -69,11 +76,8 @@ def get_recipes_by_building(building_id):
 
 @recipes_blueprint.route('/components/ids/', methods=['GET'])
 def get_component_recipes_ids():
-    recipe_ids = RecipeService.get_component_recipes_ids()
-    if recipe_ids:
-        return jsonify(recipe_ids)
-    else:
-        return jsonify({'message': 'No recipe ids found'}), 404
+    return StaticResponseService.respond('recipes.components.ids',
+                                         empty_response=(jsonify({'message': 'No recipe ids found'}), 404))
 
 # Redirects
 # Handle Redirects
@@ -43,11 +43,12 @@ def save_user_config():
     config = data['config']
 
     try:
-        # Load user configuration
-        ConfigurationService.save_user_configuration(user_key, config)
+        # Save user configuration
+        result, status = ConfigurationService.save_user_configuration(user_key, config)
+        if status != 200:
+            return jsonify(result), status
 
-        # Return the user configuration as JSON
-        return jsonify({"message": "Configuration saved successfully"}), 200
+        return jsonify({"message": "Configuration saved successfully", "changed": result['changed']}), 200
     except Exception as e:
         # Catch any unexpected errors and return a generic error response
         return jsonify({'error': 'An error occurred', 'details': str(e)}), 500
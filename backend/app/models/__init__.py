@@ -5,7 +5,10 @@ from .item_models import Item, AlienPowerFuel, Component, Consumable, NuclearFue
 from .building_models import Building, Extractor, Manufacturer, Smelter
 from .recipe_models import Recipe, RecipeOutputs, RecipeInputs, RecipeCompatibleBuildings
 from .user_config_models import User, UserProductionLine, ProductionLineTarget, UserRecipeConfig
+from .data_version_models import DataVersion, IngestFingerprint, IngestIdMark
+from .job_models import BackgroundJob
 
 __all__ = ['Item', 'AlienPowerFuel', 'Component', 'Consumable', 'NuclearFuel', 'PowerShard', 'RawResource', 'Smelter', 'Sinkable',
            'Building', 'Extractor', 'Manufacturer', 'Recipe', 'RecipeOutputs', 'RecipeInputs', 'RecipeCompatibleBuildings',
-           'User', 'UserProductionLine', 'ProductionLineTarget', 'UserRecipeConfig']
+           'User', 'UserProductionLine', 'ProductionLineTarget', 'UserRecipeConfig', 'DataVersion',
+           'IngestFingerprint', 'IngestIdMark', 'BackgroundJob']
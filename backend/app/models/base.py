@@ -1,17 +1,18 @@
 """
 ./app/models/base.py
 """
-from sqlalchemy import Column, String, Integer, Numeric, Boolean, ForeignKey, Text, create_engine
+from sqlalchemy import Column, String, Integer, Numeric, Boolean, ForeignKey, Text
 from sqlalchemy.orm import relationship, DeclarativeBase, Mapped, mapped_column, registry, scoped_session, sessionmaker
 from sqlalchemy import Table
 from typing import List, Optional
 from decimal import Decimal
 from typing_extensions import Annotated
 
-from config import Config
+from .engine import create_db_engine
 
-engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
+engine = create_db_engine()
 
+# Thread-scoped sessions; create_app removes the request's session when its app context is torn down
 SessionLocal = scoped_session(sessionmaker(bind=engine))
 
 str_30 = Annotated[str, 30]
@@ -0,0 +1,43 @@
+"""
+./app/models/data_version_models.py
+"""
+from datetime import datetime
+
+from sqlalchemy import DateTime, func, true, UniqueConstraint
+
+from .base import Base, Mapped, mapped_column, Optional
+
+
+class DataVersion(Base):
+    __tablename__ = 'data_versions'
+
+    # Every successful ingestion appends a row; the highest id is the current version of the game data
+    id: Mapped[int] = mapped_column(primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
+    description: Mapped[Optional[str]]
+    # Whether recipe amounts of fluids are stored divided by 1000 (see UpdateLiquids); ingestions write them that way
+    fluid_amounts_normalized: Mapped[bool] = mapped_column(nullable=False, default=True, server_default=true())
+
+
+class IngestFingerprint(Base):
+    __tablename__ = 'ingest_fingerprints'
+
+    # Hash of the game data an item, building or recipe was last ingested from, so an update only rewrites the
+    # objects whose data changed
+    id: Mapped[int] = mapped_column(primary_key=True)
+    table_name: Mapped[str] = mapped_column(nullable=False)
+    class_name: Mapped[str] = mapped_column(nullable=False)
+    fingerprint: Mapped[str] = mapped_column(nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('table_name', 'class_name', name='uq_ingest_fingerprints_table_name_class_name'),
+    )
+
+
+class IngestIdMark(Base):
+    __tablename__ = 'ingest_id_marks'
+
+    # Largest id ever given to a row of the items, buildings or recipes table, so an incremental ingestion never hands
+    # out the id of a removed object again. Not emptied by a full ingestion.
+    table_name: Mapped[str] = mapped_column(primary_key=True)
+    max_id: Mapped[int] = mapped_column(nullable=False)
@@ -0,0 +1,131 @@
+"""
+./app/models/engine.py
+The one database engine factory: the ORM sessions, Flask-SQLAlchemy (and so the migrations) and the data scripts all
+use the engine created here, with the pool settings from Config.
+
+The pool records how long each checkout waited for a free connection, so it can be sized for the threads of a worker
+process (SERVER_THREADS plus CALCULATOR_JOB_WORKERS); the database sees up to SERVER_WORKERS times
+DB_POOL_SIZE + DB_MAX_OVERFLOW connections per host.
+"""
+import bisect
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+from config import Config
+
+# Upper bounds (seconds) of the checkout wait histogram; the last bucket is unbounded
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolMetrics:
+    """Checkout counters of a pool, safe to update from any thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.wait_buckets = [0] * (len(POOL_WAIT_BUCKETS) + 1)
+
+    def record_wait(self, seconds):
+        with self.lock:
+            self.checkouts += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            self.wait_buckets[bisect.bisect_left(POOL_WAIT_BUCKETS, seconds)] += 1
+
+    def record_timeout(self):
+        with self.lock:
+            self.timeouts += 1
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': self.wait_seconds_total,
+                'wait_seconds_max': self.wait_seconds_max,
+                'wait_seconds_avg': self.wait_seconds_total / self.checkouts if self.checkouts else 0.0,
+                # Cumulative counts per upper bound, like a Prometheus histogram
+                'wait_buckets': {
+                    **{str(bound): sum(self.wait_buckets[:i + 1]) for i, bound in enumerate(POOL_WAIT_BUCKETS)},
+                    '+Inf': sum(self.wait_buckets),
+                },
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times every checkout, including the wait for a connection to be returned."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def recreate(self):
+        pool = super().recreate()
+        # engine.dispose() swaps in a recreated pool; keep counting into the same metrics
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.record_wait(time.perf_counter() - started)
+        return connection
+
+
+def engine_options(uri):
+    """Keyword arguments of create_engine for uri, from the DB_* settings in Config."""
+    url = make_url(uri)
+    options = {
+        'pool_pre_ping': Config.DB_POOL_PRE_PING,
+        'pool_recycle': Config.DB_POOL_RECYCLE,
+    }
+    # In-memory SQLite lives in its connection, so it keeps SQLAlchemy's default single-connection pool
+    if not (url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')):
+        options.update({
+            'poolclass': InstrumentedQueuePool,
+            'pool_size': Config.DB_POOL_SIZE,
+            'max_overflow': Config.DB_MAX_OVERFLOW,
+            'pool_timeout': Config.DB_POOL_TIMEOUT,
+        })
+    if url.get_backend_name() == 'postgresql' and Config.DB_STATEMENT_TIMEOUT_MS > 0:
+        # Server-side cap per statement, so a runaway query frees its connection instead of starving the pool; the
+        # ingestion lifts it for its own transaction (disable_statement_timeout in app/scripts/insert_data.py)
+        options['connect_args'] = {'options': f"-c statement_timeout={Config.DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def create_db_engine(uri=None, **overrides):
+    """Create an engine for uri (default: the app's database) with the configured options; overrides win."""
+    uri = uri or Config.SQLALCHEMY_DATABASE_URI
+    return create_engine(uri, **{**engine_options(uri), **overrides})
+
+
+def get_pool_stats(engine):
+    """Current usage of the engine's pool, plus the checkout wait metrics when the pool is instrumented."""
+    pool = engine.pool
+    stats = {'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'max_overflow': pool._max_overflow,
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'timeout': pool.timeout(),
+        })
+    metrics = getattr(pool, 'metrics', None)
+    if metrics is not None:
+        stats.update(metrics.snapshot())
+    return stats
@@ -0,0 +1,32 @@
+"""
+./app/models/job_models.py
+"""
+from sqlalchemy import Float, String, Text, UniqueConstraint
+
+from .base import Base, Mapped, mapped_column, Optional
+
+
+class BackgroundJob(Base):
+    __tablename__ = 'background_jobs'
+
+    # State of the jobs of a JobQueue (app/services/job_service.py), written by the process running each job so every
+    # worker process can serve it. Times are epoch seconds, as in the job's API responses.
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    queue: Mapped[str] = mapped_column(nullable=False)
+    key: Mapped[Optional[str]]
+    # The key while the job is queued or running, NULL afterwards: at most one job in flight per key and queue
+    active_key: Mapped[Optional[str]]
+    status: Mapped[str] = mapped_column(nullable=False)
+    description: Mapped[Optional[str]]
+    # JSON documents
+    events: Mapped[str] = mapped_column(Text, nullable=False)
+    result: Mapped[Optional[str]] = mapped_column(Text)
+    error: Mapped[Optional[str]] = mapped_column(Text)
+    created_at: Mapped[float] = mapped_column(Float, nullable=False)
+    started_at: Mapped[Optional[float]] = mapped_column(Float)
+    finished_at: Mapped[Optional[float]] = mapped_column(Float)
+    updated_at: Mapped[float] = mapped_column(Float, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('queue', 'active_key', name='uq_background_jobs_queue_active_key'),
+    )
@@ -36,6 +36,10 @@ class UserRecipeConfig(Base):
     recipe: Mapped["Recipe"] = relationship('Recipe', foreign_keys=[recipe_id], back_populates='user_recipe_configs')
     preferred_recipe: Mapped["Recipe"] = relationship('Recipe', foreign_keys=[preferred], back_populates='preferred_by_configs')
 
+    __table_args__ = (
+        UniqueConstraint('user_id', 'recipe_id', name='uq_user_recipes_user_id_recipe_id'),
+    )
+
 class UserProductionLine(Base):
     __tablename__ = 'production_lines'
 
@@ -0,0 +1,209 @@
+"""
+./app/profiling.py
+Per-request instrumentation.
+
+Every request gets a RequestProfile in a context variable. SQLAlchemy events add to it:
+- the number of SQL statements and the time spent in the database driver;
+- ORM time, which is the time ORM SELECTs spend outside the driver: compiling the statement and turning rows into
+  objects.
+
+Named spans add durations of their own, e.g. the optimizer phases. Code records a span with `with span('name'):` or
+record_span(name, seconds). Both do nothing outside a request, e.g. in job threads or scripts.
+
+When a request finishes, the profile goes to a Server-Timing response header, which browser dev tools show under
+Timing. It is also logged as one JSON line on the 'app.profiling' logger.
+
+Config.PROFILER_SAMPLE_RATE is opt-in. It runs cProfile on that fraction of requests. When a sampled request takes
+longer than PROFILER_SLOW_MS, its profile is written to PROFILER_DIR, or its top functions are logged if no
+directory is set.
+"""
+import cProfile
+import contextvars
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_current_profile = contextvars.ContextVar('request_profile', default=None)
+# cProfile can only run one profiler at a time (per thread before Python 3.12, per process since)
+_profiler_lock = threading.Lock()
+
+
+class RequestProfile:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.orm_time = 0.0
+        self.orm_depth = 0
+        # Span name -> total seconds, in the order the spans were first recorded
+        self.spans = {}
+
+    def add_span(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        """Value of the Server-Timing header (durations in milliseconds)."""
+        metrics = [
+            f'db;dur={1000 * self.sql_time:.2f};desc="{self.sql_count} queries"',
+            f'orm;dur={1000 * self.orm_time:.2f}',
+        ]
+        metrics += [f'{name};dur={1000 * seconds:.2f}' for name, seconds in self.spans.items()]
+        metrics.append(f'total;dur={1000 * self.elapsed():.2f}')
+        return ', '.join(metrics)
+
+    def to_dict(self):
+        return {
+            'duration_ms': round(1000 * self.elapsed(), 3),
+            'sql_count': self.sql_count,
+            'db_ms': round(1000 * self.sql_time, 3),
+            'orm_ms': round(1000 * self.orm_time, 3),
+            'spans_ms': {name: round(1000 * seconds, 3) for name, seconds in self.spans.items()},
+        }
+
+
+def current_profile():
+    return _current_profile.get()
+
+
+def record_span(name, seconds):
+    profile = _current_profile.get()
+    if profile is not None:
+        profile.add_span(name, seconds)
+
+
+@contextmanager
+def span(name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - started)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    if profile is not None and conn.info.get('query_started'):
+        profile.sql_count += 1
+        profile.sql_time += time.perf_counter() - conn.info['query_started'].pop()
+
+
+def _do_orm_execute(orm_execute_state):
+    """
+    Time ORM SELECTs including hydration: the rows are fetched and turned into objects here (the result is frozen and
+    replayed to the caller), and the driver time is subtracted. Only the outermost ORM statement is timed, so loader
+    queries it triggers are not counted twice. Streaming queries are left alone.
+    """
+    profile = _current_profile.get()
+    if (profile is None or profile.orm_depth or not orm_execute_state.is_select
+            or orm_execute_state.execution_options.get('yield_per')
+            or orm_execute_state.execution_options.get('stream_results')):
+        return None
+
+    started, sql_time = time.perf_counter(), profile.sql_time
+    profile.orm_depth += 1
+    try:
+        frozen = orm_execute_state.invoke_statement().freeze()
+    finally:
+        profile.orm_depth -= 1
+    profile.orm_time += max(time.perf_counter() - started - (profile.sql_time - sql_time), 0.0)
+    return frozen()
+
+
+def _start_request(sample_rate):
+    g.request_profile_token = _current_profile.set(RequestProfile())
+    g.profiler = None
+    if sample_rate > 0 and random.random() < sample_rate and _profiler_lock.acquire(blocking=False):
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+
+def _stop_profiler():
+    profiler = g.get('profiler')
+    if profiler is not None:
+        profiler.disable()
+        _profiler_lock.release()
+        g.profiler = None
+    return profiler
+
+
+def _finish_request(response, slow_ms, profiler_dir):
+    profile = _current_profile.get()
+    if profile is None:
+        return response
+    profiler = _stop_profiler()
+
+    response.headers['Server-Timing'] = profile.server_timing()
+    record = {
+        'event': 'request',
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        **profile.to_dict(),
+    }
+    logger.info(json.dumps(record))
+
+    if profiler is not None and 1000 * profile.elapsed() >= slow_ms:
+        if profiler_dir:
+            os.makedirs(profiler_dir, exist_ok=True)
+            path = os.path.join(profiler_dir, f"{request.endpoint or 'request'}-{time.time_ns()}.prof")
+            profiler.dump_stats(path)
+            logger.warning(f"Slow request {request.method} {request.path} profiled to {path}")
+        else:
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats('cumulative').print_stats(25)
+            logger.warning(f"Slow request {request.method} {request.path} profile:\n{output.getvalue()}")
+    return response
+
+
+def init_app(app, engine):
+    """Install the request hooks on app and the SQL listeners on engine."""
+    if not app.config.get('REQUEST_PROFILING', True):
+        return
+
+    # The listeners are global; an app created twice (tests, migrations) must not count every query twice
+    for target, name, listener in ((engine, 'before_cursor_execute', _before_cursor_execute),
+                                   (engine, 'after_cursor_execute', _after_cursor_execute),
+                                   (Session, 'do_orm_execute', _do_orm_execute)):
+        if not event.contains(target, name, listener):
+            event.listen(target, name, listener)
+
+    sample_rate = float(app.config.get('PROFILER_SAMPLE_RATE', 0.0))
+    slow_ms = float(app.config.get('PROFILER_SLOW_MS', 500))
+    profiler_dir = app.config.get('PROFILER_DIR', '')
+
+    @app.before_request
+    def start_request_profile():
+        _start_request(sample_rate)
+
+    @app.after_request
+    def finish_request_profile(response):
+        return _finish_request(response, slow_ms, profiler_dir)
+
+    @app.teardown_request
+    def reset_request_profile(exception=None):
+        # The profiler is normally stopped in after_request; this covers requests that failed before it
+        _stop_profiler()
+        token = g.pop('request_profile_token', None)
+        if token is not None:
+            _current_profile.reset(token)
@@ -11,13 +11,61 @@ For example:
 *register the blueprints in __init__.py*
 """
 
-from flask import Blueprint, jsonify
-from app.scripts.insert_data import initialize_database
+from flask import Blueprint, jsonify, request, url_for
+
+from app.services.data_version_service import DataVersionService
+from app.services.ingestion_service import IngestionService
+from app.services.job_service import JobQueueFullError
+from config import Config
 
 api_blueprint = Blueprint('data', __name__)
 
 
 @api_blueprint.route('/', methods=['GET'])
 def get_data():
-    initialize_database()
-    return jsonify({"message": "This is a sample API response"})
+    """Current data version and the latest ingestion job, of any worker process; ingesting is POST /ingest."""
+    job = IngestionService.latest_job()
+    return jsonify({
+        'data_version': DataVersionService.get_current_version(),
+        'ingestion': job.to_dict() if job is not None else None,
+    }), 200
+
+
+@api_blueprint.route('/ingest', methods=['POST'])
+def create_ingestion_job():
+    if not Config.INGEST_TOKEN:
+        return jsonify({'error': 'Ingestion is disabled, set INGEST_TOKEN to enable it'}), 403
+
+    auth_header = request.headers.get('Authorization')
+    if not auth_header or not auth_header.startswith('Bearer '):
+        return jsonify({'error': 'Authorization header with Bearer token is required'}), 401
+    if not IngestionService.is_authorized(auth_header.split('Bearer ')[1]):
+        return jsonify({'error': 'Invalid ingestion token'}), 401
+
+    data = request.get_json(silent=True) or {}
+    mode = data.get('mode', Config.INGEST_MODE)
+    if mode not in ('incremental', 'full'):
+        return jsonify({'error': "mode must be 'incremental' or 'full'"}), 400
+
+    try:
+        job, coalesced = IngestionService.submit_ingestion(incremental=mode == 'incremental')
+    except JobQueueFullError as e:
+        return jsonify({'error': 'An ingestion is already queued', 'details': str(e)}), 503, {'Retry-After': '30'}
+
+    location = url_for('data.get_ingestion_job', job_id=job.id)
+    return jsonify({
+        'job_id': job.id,
+        'status': job.status,
+        'coalesced': coalesced,
+        'status_url': location,
+    }), 202, {'Location': location}
+
+
+@api_blueprint.route('/ingest/<job_id>', methods=['GET'])
+def get_ingestion_job(job_id):
+    """Status of an ingestion job: one event per phase with its duration, rows and rows_per_second."""
+    job = IngestionService.get_job(job_id)
+    if job is None:
+        return jsonify({'message': 'Job not found'}), 404
+
+    return jsonify(job.to_dict()), 200
@@ -1,56 +1,69 @@
-from app.models import RecipeInputs, RecipeOutputs, Item
+from sqlalchemy import case, select, update
+
+from app.models import DataVersion, RecipeInputs, RecipeOutputs, Item
+from app.services.data_version_service import DataVersionService
 from app.utils import get_session
 
+# Recipe amounts of non-solid items are given in liters in the game data and stored in m³, in the integer quantity
+# columns: rounded half up, as (liters + 500) // 1000 in Python and in SQL alike
+LITERS_PER_CUBIC_METER = 1000
+QUANTITY_COLUMNS = ((RecipeInputs, "input_quantity"), (RecipeOutputs, "output_quantity"))
 
-from app.models import RecipeInputs, RecipeOutputs, Item
-from app.utils import get_session
 
 class UpdateLiquids:
     @staticmethod
-    def adjust_recipe_amounts_for_fluids():
-        with get_session() as session:
-            # Load all data at once
-            recipe_inputs = session.query(RecipeInputs).all()
-            recipe_outputs = session.query(RecipeOutputs).all()
-            items = session.query(Item).all()
-
-            # Create a lookup dictionary
-            item_forms = {item.id: item.form for item in items}
-
-            for ingredient in recipe_inputs:
-                form = item_forms.get(ingredient.item_id)
-                if form is not None and form != "RF_SOLID":
-                    print("adjusting input:", ingredient.item_id,
-                          "form:", form,
-                          "amount:", ingredient.input_quantity,
-                          "desired:", ingredient.input_quantity/1000)
-                    ingredient.input_quantity = ingredient.input_quantity / 1000
-
-            for ingredient in recipe_outputs:
-                form = item_forms.get(ingredient.item_id)
-                if form is not None and form != "RF_SOLID":
-                    print("adjusting output:", ingredient.item_id,
-                          "form:", form,
-                          "amount:", ingredient.output_quantity,
-                          "desired:", ingredient.output_quantity/1000)
-                    ingredient.output_quantity = ingredient.output_quantity / 1000
-
-            for ingredient in recipe_inputs:
-                form = item_forms.get(ingredient.item_id)
-                if form is not None and form == "RF_INVALID":
-                    print("adjusting input:", ingredient.item_id,
-                          "form:", form,
-                          "amount:", ingredient.input_quantity,
-                          "desired:", 1)
-                    ingredient.input_quantity = 1
-
-            for ingredient in recipe_outputs:
-                form = item_forms.get(ingredient.item_id)
-                if form is not None and form == "RF_INVALID":
-                    print("adjusting output:", ingredient.item_id,
-                          "form:", form,
-                          "amount:", ingredient.output_quantity,
-                          "desired:", 1)
-                    ingredient.output_quantity = 1
-
-            session.commit()
+    def adjusted_quantity(quantity, form):
+        """The quantity stored for a recipe input or output of an item with this form."""
+        # Amounts parsed from the game data are digit strings
+        quantity = int(quantity) if isinstance(quantity, str) else quantity
+        if form is None or form == "RF_SOLID":
+            return quantity
+        if form == "RF_INVALID":
+            return 1
+        return (quantity + LITERS_PER_CUBIC_METER // 2) // LITERS_PER_CUBIC_METER
+
+    @staticmethod
+    def adjust_recipe_objects(recipe_objects, item_forms):
+        """
+        Adjusts the input_quantity / output_quantity of extended recipe objects in place, before they are written.
+        The ingestion does this during classification, so the rows are stored adjusted.
+
+        :param recipe_objects: Extended recipe objects, each with an "item" class name.
+        :param item_forms: class_name -> form of the items.
+        """
+        for recipe_object in recipe_objects:
+            form = item_forms.get(recipe_object.get("item"))
+            for _, column_name in QUANTITY_COLUMNS:
+                if column_name in recipe_object:
+                    recipe_object[column_name] = UpdateLiquids.adjusted_quantity(recipe_object[column_name], form)
+
+    @staticmethod
+    def adjust_recipe_amounts_for_fluids(session=None):
+        """
+        Adjusts the stored recipe inputs and outputs of fluids with one set-based UPDATE ... FROM items per table, for
+        data written with raw amounts. Idempotent: nothing is done when the current data version is already
+        normalized, and a normalized version is stamped afterwards.
+
+        :return: The number of adjusted rows.
+        """
+        if session is None:
+            with get_session() as session:
+                return UpdateLiquids.adjust_recipe_amounts_for_fluids(session)
+
+        normalized = session.scalar(select(DataVersion.fluid_amounts_normalized)
+                                    .order_by(DataVersion.id.desc()).limit(1))
+        if normalized:
+            return 0
+
+        adjusted = 0
+        for model, column_name in QUANTITY_COLUMNS:
+            quantity = getattr(model, column_name)
+            cubic_meters = (quantity + LITERS_PER_CUBIC_METER // 2) // LITERS_PER_CUBIC_METER
+            adjusted += session.execute(
+                update(model)
+                .where(model.item_id == Item.id, Item.form != "RF_SOLID")
+                .values({column_name: case((Item.form == "RF_INVALID", 1), else_=cubic_meters)})
+            ).rowcount
+        DataVersionService.bump_version(session, "Fluid amounts adjusted")
+        session.commit()
+        return adjusted
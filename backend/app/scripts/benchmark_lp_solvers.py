@@ -0,0 +1,94 @@
+"""
+./app/scripts/benchmark_lp_solvers.py
+Benchmarks the LP solver backends against each other on a set of reference production lines.
+
+For every line the same LinearProgram is solved by each available backend; the table reports the best wall time
+of each and the relative difference between their objectives. By default the lines come from synthetic catalogs;
+with --from-db they are built from the current recipe graph with every component recipe known:
+
+    python -m app.scripts.benchmark_lp_solvers --sizes 100 400 1600
+    python -m app.scripts.benchmark_lp_solvers --from-db --targets 1:10 2:5
+"""
+import argparse
+import time
+
+from app.scripts.benchmark_model_build import synthetic_catalog
+from app.scripts.lp_model import IncidenceMatrix, build_linear_program
+from app.scripts.lp_solvers import available_backends, solve_lp
+
+HANDLING_FEE = 1e-6
+
+
+def synthetic_lines(sizes, lines_per_size=3):
+    """Yield (name, LinearProgram) for a few target sets on synthetic catalogs of each size."""
+    for size in sizes:
+        recipes, limits, _ = synthetic_catalog(size)
+        incidence = IncidenceMatrix.from_recipes(recipes)
+        costs = {rid: 1.0 / limit for rid, limit in limits.items()}
+        products = sorted({product['id'] for recipe in recipes for product in recipe['products']})
+        for line in range(lines_per_size):
+            # Targets drawn from the top of the item tiers, where production chains are deepest
+            targets = {products[-1 - line]: 10, products[-4 - line]: 5}
+            yield f"synthetic-{size}-{line}", build_linear_program(incidence, targets, limits, costs, HANDLING_FEE)
+
+
+def database_lines(target_specs):
+    """Yield (name, LinearProgram) for each target spec ("item_id:rate") on the current recipe graph."""
+    from app.scripts.pulp_optimizer import raw_resource_limits, unpackage_recipes
+    from app.services.recipe_graph_service import RecipeGraphService
+
+    graph = RecipeGraphService.get_graph()
+    recipe_ids = [recipe_id for recipe_id in graph.component_recipe_ids if recipe_id not in unpackage_recipes]
+    incidence = graph.incidence_matrix(recipe_ids)
+    costs = {rid: 1.0 / limit for rid, limit in raw_resource_limits.items()}
+    for spec in target_specs:
+        item_id, rate = spec.split(':')
+        targets = {int(item_id): float(rate)}
+        yield f"item-{item_id}", build_linear_program(incidence, targets, raw_resource_limits, costs, HANDLING_FEE)
+
+
+def time_solve(lp, backend, repeat):
+    best, solution = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        solution = solve_lp(lp, backend)
+        best = min(best, time.perf_counter() - start)
+    return best, solution
+
+
+def relative_gap(a, b):
+    if a is None or b is None:
+        return float('nan')
+    return abs(a - b) / max(1.0, abs(a), abs(b))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 400, 1600])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--from-db', action='store_true', help="Build the lines from the database recipe graph.")
+    parser.add_argument('--targets', nargs='+', default=[], help="item_id:rate pairs used with --from-db.")
+    args = parser.parse_args()
+
+    backends = available_backends()
+    lines = database_lines(args.targets) if args.from_db else synthetic_lines(args.sizes)
+
+    header = f"{'line':<16} {'rows':>6} {'cols':>6} {'nnz':>7}"
+    header += ''.join(f" {backend + ' (ms)':>11}" for backend in backends)
+    print(header + f" {'status':>10} {'obj. gap':>9}")
+    for name, lp in lines:
+        timings, solutions = [], []
+        for backend in backends:
+            elapsed, solution = time_solve(lp, backend, args.repeat)
+            timings.append(elapsed)
+            solutions.append(solution)
+
+        statuses = {solution.status for solution in solutions}
+        gap = max(relative_gap(solutions[0].objective, solution.objective) for solution in solutions)
+        row = f"{name:<16} {lp.shape[0]:>6} {lp.shape[1]:>6} {lp.nnz:>7}"
+        row += ''.join(f" {elapsed * 1000:11.2f}" for elapsed in timings)
+        print(row + f" {'/'.join(sorted(statuses)):>10} {gap:9.1e}")
+
+
+if __name__ == "__main__":
+    main()
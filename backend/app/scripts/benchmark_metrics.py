@@ -0,0 +1,58 @@
+"""
+./app/scripts/benchmark_metrics.py
+Measures what the Prometheus request metrics add to a request.
+
+Sends the same trivial request through two Flask apps, one without and one with MetricsService, and reports the
+difference per request. No database or running server is needed:
+
+    python -m app.scripts.benchmark_metrics --requests 20000
+"""
+import argparse
+import time
+
+from flask import Flask
+
+from app.services.metrics_service import MetricsService
+
+
+def create_app(with_metrics):
+    app = Flask(__name__)
+    if with_metrics:
+        MetricsService.init_app(app)
+
+    @app.route('/ping/<int:n>')
+    def ping(n):
+        return {'n': n}
+
+    return app
+
+
+def time_requests(app, n_requests):
+    """Seconds per request of GET /ping/<n> through the test client."""
+    client = app.test_client()
+    for i in range(min(n_requests, 500)):
+        client.get(f'/ping/{i}')
+    started = time.perf_counter()
+    for i in range(n_requests):
+        client.get(f'/ping/{i}')
+    return (time.perf_counter() - started) / n_requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3, help="Best of this many runs per variant.")
+    args = parser.parse_args()
+
+    plain, instrumented = create_app(False), create_app(True)
+    base = min(time_requests(plain, args.requests) for _ in range(args.repeat))
+    with_metrics = min(time_requests(instrumented, args.requests) for _ in range(args.repeat))
+
+    print(f"{'variant':<16} {'us/request':>12}")
+    print(f"{'plain':<16} {1e6 * base:>12.1f}")
+    print(f"{'with metrics':<16} {1e6 * with_metrics:>12.1f}")
+    print(f"{'overhead':<16} {1e6 * (with_metrics - base):>12.1f} ({100 * (with_metrics - base) / base:.1f}%)")
+
+
+if __name__ == '__main__':
+    main()
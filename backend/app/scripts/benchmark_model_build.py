@@ -0,0 +1,143 @@
+"""
+./app/scripts/benchmark_model_build.py
+Benchmarks LP model construction time against catalog size.
+
+Compares the sparse incidence builder used by the optimizer with the previous dense approach, which generated every
+constraint row over every recipe column. Runs on a synthetic catalog so no database is needed:
+
+    python -m app.scripts.benchmark_model_build --sizes 100 200 400 800
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+import pulp
+
+from app.scripts.lp_model import IncidenceMatrix, build_lp_problem
+
+RAW_RESOURCE_COUNT = 13
+
+
+def synthetic_catalog(n_recipes: int, seed: int = 0):
+    """
+    Generate a catalog shaped like the game's component recipes: each recipe consumes 1-4 items and produces
+    1-2 items, items are layered so lower tiers feed higher ones, and the first RAW_RESOURCE_COUNT items are raw.
+
+    :return: (recipes, raw_resource_limits, target_outputs)
+    """
+    rng = random.Random(seed)
+    n_items = max(RAW_RESOURCE_COUNT + 2, n_recipes // 2)
+    raw_ids = list(range(1, RAW_RESOURCE_COUNT + 1))
+    item_ids = list(range(1, n_items + 1))
+
+    def item(item_id, amount):
+        return {'id': item_id, 'amount': amount}
+
+    recipes = []
+    for r_id in range(1, n_recipes + 1):
+        # Every intermediate item gets at least one producing recipe, the rest are alternates
+        product = item_ids[RAW_RESOURCE_COUNT + (r_id - 1) % (n_items - RAW_RESOURCE_COUNT)]
+        lower_tier = item_ids[:product - 1]
+        ingredients = rng.sample(lower_tier, k=min(len(lower_tier), rng.randint(1, 4)))
+        products = [item(product, rng.randint(1, 5))]
+        if rng.random() < 0.1:
+            byproduct = rng.choice(item_ids[RAW_RESOURCE_COUNT:])
+            if byproduct != product and byproduct not in ingredients:
+                products.append(item(byproduct, rng.randint(1, 3)))
+        recipes.append({
+            'id': r_id,
+            'manufactoring_duration': rng.choice([2, 4, 6, 8, 12, 24]),
+            'ingredients': [item(i, rng.randint(1, 10)) for i in ingredients],
+            'products': products,
+        })
+
+    raw_resource_limits = {raw_id: 1e6 for raw_id in raw_ids}
+    target_outputs = {item_ids[-1]: 10, item_ids[-2]: 10}
+    return recipes, raw_resource_limits, target_outputs
+
+
+def build_dense_reference(recipes, target_outputs, raw_resource_limits, resource_costs, handling_fee):
+    """The dense construction the optimizer used before the sparse builder, kept here for comparison."""
+    items = list({item['id'] for recipe in recipes for item in (recipe['ingredients'] + recipe['products'])})
+    item_to_index = {item_id: idx for idx, item_id in enumerate(items)}
+    recipe_ids = [recipe['id'] for recipe in recipes]
+    recipe_to_index = {recipe_id: idx for idx, recipe_id in enumerate(recipe_ids)}
+
+    matrix = np.zeros((len(items), len(recipe_ids)))
+    for recipe in recipes:
+        r_idx = recipe_to_index[recipe['id']]
+        runs_per_minute = 60.0 / float(recipe['manufactoring_duration'])
+        for prod in recipe['products']:
+            matrix[item_to_index[prod['id']], r_idx] += prod['amount'] * runs_per_minute
+        for ing in recipe['ingredients']:
+            matrix[item_to_index[ing['id']], r_idx] -= ing['amount'] * runs_per_minute
+
+    prob = pulp.LpProblem("Satisfactory_Production_Optimizer", pulp.LpMinimize)
+    recipe_vars = {r_id: pulp.LpVariable(f"scale_{r_id}", lowBound=0) for r_id in recipe_ids}
+    raw_resources = set(raw_resource_limits.keys())
+
+    for item_id, required_scale in target_outputs.items():
+        i_idx = item_to_index[item_id]
+        prob += (pulp.lpSum(matrix[i_idx, recipe_to_index[rid]] * recipe_vars[rid] for rid in recipe_ids)
+                 >= required_scale, f"Target_output_{item_id}")
+    for item_id in items:
+        if item_id not in target_outputs and item_id not in raw_resources:
+            i_idx = item_to_index[item_id]
+            prob += (pulp.lpSum(matrix[i_idx, recipe_to_index[rid]] * recipe_vars[rid] for rid in recipe_ids) >= 0,
+                     f"Flow_balance_{item_id}")
+    for raw_id, max_amount in raw_resource_limits.items():
+        i_idx = item_to_index[raw_id]
+        prob += (pulp.lpSum(matrix[i_idx, recipe_to_index[rid]] * recipe_vars[rid] for rid in recipe_ids)
+                 >= -max_amount, f"Raw_resource_limit_{raw_id}")
+
+    prob += pulp.lpSum(
+        (-matrix[item_to_index[raw_id], recipe_to_index[rid]] * recipe_vars[rid] * resource_costs[raw_id])
+        for raw_id in raw_resources
+        for rid in recipe_ids
+        if matrix[item_to_index[raw_id], recipe_to_index[rid]] < 0
+    ) + pulp.lpSum(handling_fee * recipe_vars[rid] for rid in recipe_ids), "Minimize_Total_Cost"
+    return prob, recipe_vars
+
+
+def build_sparse(recipes, target_outputs, raw_resource_limits, resource_costs, handling_fee):
+    incidence = IncidenceMatrix.from_recipes(recipes)
+    return build_lp_problem(incidence, target_outputs, raw_resource_limits, resource_costs, handling_fee)
+
+
+def time_build(builder, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        builder(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 200, 400, 800])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-dense-above', type=int, default=1600,
+                        help="Skip the dense reference for catalogs larger than this (it grows quadratically).")
+    args = parser.parse_args()
+
+    print(f"{'recipes':>8} {'items':>6} {'nnz':>6} {'dense (ms)':>11} {'sparse (ms)':>12} {'speedup':>8}")
+    for size in args.sizes:
+        recipes, limits, targets = synthetic_catalog(size)
+        costs = {rid: 1.0 / limit for rid, limit in limits.items()}
+        build_args = (recipes, targets, limits, costs, 1e-6)
+        incidence = IncidenceMatrix.from_recipes(recipes)
+
+        sparse = time_build(build_sparse, *build_args, repeat=args.repeat)
+        if size <= args.skip_dense_above:
+            dense = time_build(build_dense_reference, *build_args, repeat=args.repeat)
+            dense_ms, speedup = f"{dense * 1000:11.1f}", f"{dense / sparse:7.1f}x"
+        else:
+            dense_ms, speedup = f"{'-':>11}", f"{'-':>8}"
+
+        print(f"{size:>8} {incidence.shape[0]:>6} {incidence.nnz:>6} {dense_ms} {sparse * 1000:12.1f} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
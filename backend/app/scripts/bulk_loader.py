@@ -0,0 +1,122 @@
+"""
+./app/scripts/bulk_loader.py
+Set-based table writes for the data ingestion.
+
+Rows are plain dicts with every foreign key already resolved, so each table is written in one statement stream
+instead of one ORM flush per object:
+- PostgreSQL (psycopg2): COPY <table> FROM STDIN, fed from an in-memory buffer.
+- Other databases: multi-row INSERT ... VALUES batches of BULK_INSERT_BATCH_SIZE rows.
+
+The writes run on the session's connection, so they are part of the caller's transaction. Rows carry their own
+primary keys; reset_sequences moves the PostgreSQL id sequences past them afterwards.
+"""
+import io
+import json
+import time
+
+from sqlalchemy import Integer, text
+
+BULK_INSERT_BATCH_SIZE = 1000
+
+
+class LoadReport:
+    """Rows and seconds per table of one load, in the order the tables were written."""
+
+    def __init__(self):
+        self.tables = {}
+
+    def add(self, table_name, rows, seconds):
+        entry = self.tables.setdefault(table_name, {'rows': 0, 'seconds': 0.0})
+        entry['rows'] += rows
+        entry['seconds'] += seconds
+
+    @property
+    def total_rows(self):
+        return sum(entry['rows'] for entry in self.tables.values())
+
+    @property
+    def total_seconds(self):
+        return sum(entry['seconds'] for entry in self.tables.values())
+
+    def to_dict(self):
+        return {
+            table_name: {**entry, 'rows_per_second': entry['rows'] / entry['seconds'] if entry['seconds'] else None}
+            for table_name, entry in self.tables.items()
+        }
+
+    def format(self):
+        lines = [f"{'table':<30} {'rows':>8} {'seconds':>9} {'rows/s':>10}"]
+        for table_name, entry in [*self.tables.items(), ('total', {'rows': self.total_rows,
+                                                                     'seconds': self.total_seconds})]:
+            rate = entry['rows'] / entry['seconds'] if entry['seconds'] else 0.0
+            lines.append(f"{table_name:<30} {entry['rows']:>8} {entry['seconds']:>9.3f} {rate:>10.0f}")
+        return '\n'.join(lines)
+
+
+def copy_value(value, column_type=None):
+    """
+    A value in PostgreSQL's COPY text format. COPY does not cast like INSERT does, so a float for an integer column
+    must be integral and is written without its '.0'.
+    """
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, float) and isinstance(column_type, Integer):
+        if not value.is_integer():
+            raise ValueError(f"{value} is not an integer, cannot be copied into an integer column")
+        value = int(value)
+    if isinstance(value, (list, dict)):
+        value = json.dumps(value)
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+            .replace('\r', '\\r'))
+
+
+def copy_rows(session, table, columns, rows):
+    column_types = [table.c[column].type for column in columns]
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(copy_value(row.get(column), column_type)
+                               for column, column_type in zip(columns, column_types)))
+        buffer.write('\n')
+    buffer.seek(0)
+    column_list = ', '.join(f'"{column}"' for column in columns)
+    dbapi_connection = session.connection().connection.dbapi_connection
+    with dbapi_connection.cursor() as cursor:
+        cursor.copy_expert(f'COPY "{table.name}" ({column_list}) FROM STDIN', buffer)
+
+
+def supports_copy(session):
+    dialect = session.get_bind().dialect
+    return dialect.name == 'postgresql' and dialect.driver == 'psycopg2'
+
+
+def write_rows(session, table, rows, report=None):
+    """
+    Insert rows (dicts) into table on the session's connection. Every row is written with the same columns, the
+    union of the rows' keys, missing values as NULL.
+    """
+    if not rows:
+        return
+    started = time.perf_counter()
+    columns = [column.name for column in table.columns if any(column.name in row for row in rows)]
+    if supports_copy(session):
+        copy_rows(session, table, columns, rows)
+    else:
+        statement = table.insert()
+        for start in range(0, len(rows), BULK_INSERT_BATCH_SIZE):
+            batch = [{column: row.get(column) for column in columns}
+                     for row in rows[start:start + BULK_INSERT_BATCH_SIZE]]
+            session.execute(statement, batch)
+    if report is not None:
+        report.add(table.name, len(rows), time.perf_counter() - started)
+
+
+def reset_sequences(session, tables):
+    """Move the id sequence of each table past its largest id, after ids were written explicitly (PostgreSQL)."""
+    if session.get_bind().dialect.name != 'postgresql':
+        return
+    for table in tables:
+        session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM \"{table.name}\"), 0) + 1, false)"))
@@ -0,0 +1,152 @@
+"""
+./app/scripts/classification.py
+The classification stage of the data ingestion as pure functions: no session and no shared state, so it can be
+tested and profiled without a database.
+
+Each object is turned into compact records (index, extra, subtypes):
+- index: position of the object in the list of its type;
+- extra: fields added to a copy of the object (a recipe is split per ingredient, product and building), or None when
+  the object itself is stored;
+- subtypes: ((sub_type, ((related table name, class_name), ...)), ...), the subtypes it is classified under with the
+  objects it relates to, by table name.
+
+classify_objects_into_subtypes (insert_data.py) assembles the records into the classified objects the loaders take.
+"""
+import re
+
+from app.scripts.adjust_recipe_amounts_for_fluids import UpdateLiquids
+
+building_subtypes = {
+    "Build_FrackingExtractor_C": "Extractor",
+    "Build_MinerMk2_C": "Extractor",
+    "Build_MinerMk1_C": "Extractor",
+    "Build_MinerMk3_C": "Extractor",
+    "Build_OilPump_C": "Extractor",
+    "Build_WaterPump_C": "Extractor",
+    "Build_AssemblerMk1_C": "Manufacturer",
+    "Build_Blender_C": "Manufacturer",
+    "Build_ConstructorMk1_C": "Manufacturer",
+    "Build_Converter_C": "Manufacturer",
+    "Build_HadronCollider_C": "Manufacturer",
+    "Build_ManufacturerMk1_C": "Manufacturer",
+    "Build_OilRefinery_C": "Manufacturer",
+    "Build_Packager_C": "Manufacturer",
+    "Build_QuantumEncoder_C": "Manufacturer",
+    "Build_FoundryMk1_C": "Smelter",
+    "Build_SmelterMk1_C": "Smelter"
+}
+
+item_subtypes_by_key_attribute = {
+    "extra_potential": "PowerShard",
+    "boost_duration": "AlienPowerFuel",
+    "resource_sink_points": "Sinkable",
+    "custom_hands_mesh_scale": "Consumable",
+    "amount_of_waste": "NuclearFuel",
+    "collect_speed_multiplier": "RawResource"
+}
+
+recipe_subtypes_by_key_attribute = {
+    "input_quantity": "RecipeInputs",
+    "output_quantity": "RecipeOutputs",
+    "is_produced_in_building": "RecipeCompatibleBuildings"
+}
+
+# Built once instead of per object; the key tuples keep the declaration order, so an object's subtypes are always
+# listed in the same order
+BUILDING_CLASS_NAMES = frozenset(building_subtypes)
+ITEM_SUBTYPE_KEYS = tuple(item_subtypes_by_key_attribute)
+RECIPE_SUBTYPE_KEYS = tuple(recipe_subtypes_by_key_attribute)
+CLASSIFIED_TYPES = frozenset({"Desc_", "Build_", "Recipe_"})
+
+# Asset references like ".../Desc_Wire/Desc_Wire.Desc_Wire_C'",Amount=2": matching from the dot instead of from every
+# position of the word before it avoids rescanning each word of the long asset paths
+RECIPE_PARTS = re.compile(r'(?<=[A-Za-z0-9_])\.([A-Za-z0-9_]+_C)\'",Amount=(\d+)')
+RECIPE_BUILDINGS = re.compile(r'(?<=[A-Za-z0-9_])\.([A-Za-z0-9_]+_C)"')
+
+
+def parse_recipe_strings(recipe_object):
+    """
+    The ingredients, products and production buildings of a recipe, parsed from its game data strings.
+
+    :return: (ingredients, products, buildings) as lists of dicts, see `parse_recipe_data` in insert_data.py.
+    """
+    recipe_ingredients = [{"recipeInputs_item": match.group(1), "amount": match.group(2)}
+                          for match in RECIPE_PARTS.finditer(recipe_object.get("ingredients") or "")]
+    recipe_products = [{"recipeOutputs_item": match.group(1), "amount": match.group(2)}
+                       for match in RECIPE_PARTS.finditer(recipe_object.get("product") or "")]
+    recipe_buildings = [{"recipeCompatibleBuilding_building": match.group(1)}
+                        for match in RECIPE_BUILDINGS.finditer(recipe_object.get("produced_in") or "")
+                        if match.group(1) in BUILDING_CLASS_NAMES]
+    return recipe_ingredients, recipe_products, recipe_buildings
+
+
+def recipe_extensions(recipe_ingredients, recipe_products, recipe_buildings):
+    """The fields added to a copy of a recipe for each of its ingredients, products and buildings."""
+    extensions = [{"item": ingredient["recipeInputs_item"], "input_quantity": ingredient["amount"]}
+                  for ingredient in recipe_ingredients]
+    extensions += [{"item": product["recipeOutputs_item"], "output_quantity": product["amount"]}
+                   for product in recipe_products]
+    if recipe_buildings:
+        extensions += [{"building": building["recipeCompatibleBuilding_building"], "is_produced_in_building": True}
+                       for building in recipe_buildings]
+    else:
+        extensions.append({"is_produced_in_building": False})
+    return extensions
+
+
+def recipe_relationships(class_name, sub_type, extension):
+    if sub_type in ("RecipeInputs", "RecipeOutputs"):
+        return ("recipes", class_name), ("items", extension["item"])
+    if sub_type == "RecipeCompatibleBuildings" and "building" in extension:
+        return ("recipes", class_name), ("buildings", extension["building"])
+    return (("recipes", class_name),)
+
+
+def classify_object_list(object_type, objects, item_forms=None):
+    """
+    Classifies the objects of one type.
+
+    :param object_type: "Desc_", "Build_" or "Recipe_".
+    :param objects: The objects of the type.
+    :param item_forms: class_name -> form of the items, to adjust the recipe amounts of fluids (recipes only).
+    :return: List of (index, extra, subtypes) records, in object order.
+    """
+    records = []
+    for index, game_object in enumerate(objects):
+        class_name = game_object["class_name"]
+
+        if object_type == "Desc_":
+            related = (("items", class_name),)
+            subtypes = tuple((item_subtypes_by_key_attribute[key], related)
+                             for key in ITEM_SUBTYPE_KEYS if key in game_object)
+            records.append((index, None, subtypes or (("None", related),)))
+
+        elif object_type == "Build_":
+            building_class = next((value for value in game_object.values() if value in BUILDING_CLASS_NAMES), None)
+            sub_type = building_subtypes[building_class] if building_class is not None else "None"
+            records.append((index, None, ((sub_type, (("buildings", class_name),)),)))
+
+        elif object_type == "Recipe_":
+            recipe_ingredients, recipe_products, recipe_buildings = parse_recipe_strings(game_object)
+            if not (recipe_ingredients or recipe_products or recipe_buildings):
+                records.append((index, None, (("None", (("recipes", class_name),)),)))
+                continue
+            extensions = recipe_extensions(recipe_ingredients, recipe_products, recipe_buildings)
+            UpdateLiquids.adjust_recipe_objects(extensions, item_forms or {})
+            for extension in extensions:
+                sub_types = [recipe_subtypes_by_key_attribute[key] for key in RECIPE_SUBTYPE_KEYS
+                             if key in extension or key in game_object]
+                if sub_types:
+                    records.append((index, extension, tuple(
+                        (sub_type, recipe_relationships(class_name, sub_type, extension)) for sub_type in sub_types)))
+    return records
+
+
+def classify_records(valid_objects, item_forms):
+    """
+    Classifies the supported objects.
+
+    :return: dict -- object type -> list of (index, extra, subtypes) records, in object order.
+    """
+    return {object_type: classify_object_list(object_type, objects, item_forms if object_type == "Recipe_" else None)
+            for object_type, objects in valid_objects.items() if object_type in CLASSIFIED_TYPES}
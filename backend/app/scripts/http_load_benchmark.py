@@ -0,0 +1,115 @@
+"""
+./app/scripts/http_load_benchmark.py
+Closed-loop HTTP load test: each of --concurrency clients sends requests back to back for --duration seconds and
+the table reports throughput and latency per path. Run it once against the dev server and once against gunicorn to
+compare the serving modes:
+
+    flask run --port 5000 &
+    python -m app.scripts.http_load_benchmark --url http://localhost:5000
+    gunicorn -c gunicorn.conf.py wsgi:app &
+    python -m app.scripts.http_load_benchmark --url http://localhost:5000 --concurrency 32
+
+The default paths are read-only catalog endpoints; add user endpoints with --path and --user-key.
+"""
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = [
+    '/api/recipes/summary/',
+    '/api/items/summary/',
+    '/api/buildings/summary/',
+    '/api/recipes/components/grouped/detail/',
+]
+
+
+class PathStats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+
+
+def client_loop(base_url, paths, headers, deadline, stats, lock):
+    """Send requests round-robin over paths on one keep-alive connection until the deadline."""
+    url = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+    conn = connection_class(url.hostname, url.port, timeout=60)
+    local = {path: PathStats() for path in paths}
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            conn.request('GET', path, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                local[path].errors += 1
+            else:
+                local[path].latencies.append(time.perf_counter() - started)
+        except (OSError, http.client.HTTPException):
+            local[path].errors += 1
+            conn.close()
+            conn = connection_class(url.hostname, url.port, timeout=60)
+    conn.close()
+    with lock:
+        for path, path_stats in local.items():
+            stats[path].latencies.extend(path_stats.latencies)
+            stats[path].errors += path_stats.errors
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run(base_url, paths, concurrency, duration, headers):
+    stats = {path: PathStats() for path in paths}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    clients = [threading.Thread(target=client_loop, args=(base_url, paths, headers, deadline, stats, lock))
+               for _ in range(concurrency)]
+    started = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"{base_url}: {concurrency} clients for {elapsed:.1f}s")
+    print(f"{'path':<45} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    total = 0
+    for path, path_stats in stats.items():
+        latencies = sorted(path_stats.latencies)
+        total += len(latencies)
+        print(f"{path:<45} {len(latencies) / elapsed:>9.1f} {1000 * percentile(latencies, 0.5):>9.2f} "
+              f"{1000 * percentile(latencies, 0.95):>9.2f} {1000 * percentile(latencies, 0.99):>9.2f} "
+              f"{path_stats.errors:>7}")
+    print(f"{'total':<45} {total / elapsed:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000', help="Base URL of the running backend.")
+    parser.add_argument('--path', action='append', dest='paths',
+                        help="Path to request (repeatable); defaults to the catalog summaries.")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=15.0, help="Seconds to run.")
+    parser.add_argument('--user-key', help="Sent as 'Authorization: Bearer <key>' for user endpoints.")
+    parser.add_argument('--gzip', action='store_true', help="Accept gzip-encoded responses.")
+    args = parser.parse_args()
+
+    headers = {}
+    if args.user_key:
+        headers['Authorization'] = f"Bearer {args.user_key}"
+    if args.gzip:
+        headers['Accept-Encoding'] = 'gzip'
+    run(args.url.rstrip('/'), args.paths or DEFAULT_PATHS, args.concurrency, args.duration, headers)
+
+
+if __name__ == '__main__':
+    main()
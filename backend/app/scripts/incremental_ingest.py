@@ -0,0 +1,262 @@
+"""
+./app/scripts/incremental_ingest.py
+Incremental ingestion: applies a game data update as a diff against the database instead of truncating and
+reloading every table.
+
+Every item, building and recipe is fingerprinted by class_name: a hash of its main row, its subtype rows and the
+class names they relate to (group_classified_objects in insert_data.py). Comparing the fingerprints with the ones
+stored in ingest_fingerprints at the last ingestion gives the objects that were added, changed or removed:
+- added objects are inserted with new ids, above every id the table ever had (tracked in ingest_id_marks);
+- changed objects are updated in place, so their ids, and the user_recipes and production_line_targets rows that
+  reference them, are kept; their subtype rows are rewritten;
+- removed objects are deleted. User data that references them cannot be kept as is: configurations of removed
+  recipes are deleted, preferences for them fall back to the recipe itself, and targets for removed items keep
+  their rate without an item.
+
+Recipes whose data did not change are still rewritten when an item or building they reference was added or
+removed. The recipe amounts of fluids are adjusted during classification, so a recipe whose item changed form
+changes fingerprint too.
+
+Objects ingested before fingerprints existed have none, so they count as changed once and are updated in place.
+"""
+import hashlib
+import json
+
+from sqlalchemy import bindparam, delete, select, update
+
+from app.models import AlienPowerFuel, Building, Component, Consumable, Extractor, IngestFingerprint, IngestIdMark, \
+    Item, Manufacturer, NuclearFuel, PowerShard, ProductionLineTarget, RawResource, Recipe, RecipeCompatibleBuildings, \
+    RecipeInputs, RecipeOutputs, Sinkable, Smelter, UserRecipeConfig
+from app.scripts.bulk_loader import LoadReport, reset_sequences, write_rows
+from app.utils import dialect_insert
+
+MAIN_MODELS = (Item, Building, Recipe)
+SUBTYPE_MODELS = {
+    Item: (AlienPowerFuel, Consumable, NuclearFuel, PowerShard, RawResource, Sinkable),
+    Building: (Extractor, Manufacturer, Smelter),
+    Recipe: (RecipeInputs, RecipeOutputs, RecipeCompatibleBuildings),
+}
+# Recipe rows that reference items and buildings besides their recipe
+REFERENCE_COLUMNS = {
+    Item: ((RecipeInputs, 'item_id'), (RecipeOutputs, 'item_id')),
+    Building: ((RecipeCompatibleBuildings, 'building_id'),),
+}
+# Ids per statement in IN lists
+DELETE_CHUNK_SIZE = 1000
+
+
+def fingerprint(entity):
+    """SHA-256 of an entity of group_classified_objects, independent of key order."""
+    payload = {
+        'row': entity['row'],
+        'subtypes': [[sub_class.__tablename__, sub_row,
+                      [[related_class.__tablename__, class_name] for related_class, class_name in relationships]]
+                     for sub_class, sub_row, relationships in entity['subtypes']],
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+def chunks(values, size=DELETE_CHUNK_SIZE):
+    values = list(values)
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class IngestDiff:
+    """Class names added, changed and removed per main model, plus recipes rewritten for their references."""
+
+    def __init__(self):
+        self.added = {model: [] for model in MAIN_MODELS}
+        self.changed = {model: [] for model in MAIN_MODELS}
+        self.removed = {model: [] for model in MAIN_MODELS}
+        self.rewritten_recipes = []
+        self.fingerprints = {model: {} for model in MAIN_MODELS}
+        self.user_rows = {}
+
+    def is_empty(self):
+        return not any(self.added[model] or self.changed[model] or self.removed[model] for model in MAIN_MODELS)
+
+    def to_dict(self):
+        return {
+            model.__tablename__: {'added': len(self.added[model]), 'changed': len(self.changed[model]),
+                                  'removed': len(self.removed[model])}
+            for model in MAIN_MODELS
+        } | {'rewritten_recipes': len(self.rewritten_recipes), 'user_rows': self.user_rows}
+
+    def summary(self):
+        parts = [f"{model.__tablename__} +{len(self.added[model])} ~{len(self.changed[model])} "
+                 f"-{len(self.removed[model])}" for model in MAIN_MODELS]
+        return ', '.join(parts)
+
+
+def compute_diff(session, entities):
+    """
+    Compare the grouped game data with the database.
+
+    :return: (IngestDiff, {main model: {class_name: id}} of the rows currently in the database)
+    """
+    diff = IngestDiff()
+    stored = {(table_name, class_name): value for table_name, class_name, value in session.execute(
+        select(IngestFingerprint.table_name, IngestFingerprint.class_name, IngestFingerprint.fingerprint))}
+    existing_ids = {model: dict(session.execute(select(model.class_name, model.id)).all()) for model in MAIN_MODELS}
+
+    for model in MAIN_MODELS:
+        new_entities = entities.get(model, {})
+        for class_name, entity in new_entities.items():
+            diff.fingerprints[model][class_name] = fingerprint(entity)
+            if class_name not in existing_ids[model]:
+                diff.added[model].append(class_name)
+            elif stored.get((model.__tablename__, class_name)) != diff.fingerprints[model][class_name]:
+                diff.changed[model].append(class_name)
+        diff.removed[model] = [class_name for class_name in existing_ids[model] if class_name not in new_entities]
+
+    # Unchanged recipes whose references now resolve differently
+    stale_references = {model: {*diff.added[model], *diff.removed[model]} for model in (Item, Building)}
+    changed_recipes = set(diff.changed[Recipe])
+    for class_name, entity in entities.get(Recipe, {}).items():
+        if class_name not in existing_ids[Recipe] or class_name in changed_recipes:
+            continue
+        if any(related_class in stale_references and related_name in stale_references[related_class]
+               for _, _, relationships in entity['subtypes'] for related_class, related_name in relationships):
+            diff.rewritten_recipes.append(class_name)
+    return diff, existing_ids
+
+
+def delete_where_in(session, model, column_name, ids):
+    deleted = 0
+    for chunk in chunks(ids):
+        deleted += session.execute(delete(model).where(getattr(model, column_name).in_(chunk))).rowcount
+    return deleted
+
+
+def release_user_references(session, diff, removed_ids):
+    """Detach user configurations and production line targets from removed recipes and items."""
+    recipe_ids, item_ids = removed_ids[Recipe], removed_ids[Item]
+    user_rows = {'user_recipes_deleted': 0, 'user_recipes_preference_reset': 0, 'targets_without_item': 0}
+    for chunk in chunks(recipe_ids):
+        user_rows['user_recipes_deleted'] += session.execute(
+            delete(UserRecipeConfig).where(UserRecipeConfig.recipe_id.in_(chunk))).rowcount
+        user_rows['user_recipes_preference_reset'] += session.execute(
+            update(UserRecipeConfig).where(UserRecipeConfig.preferred.in_(chunk))
+            .values(preferred=UserRecipeConfig.recipe_id)).rowcount
+    if user_rows['user_recipes_preference_reset']:
+        # Only deviations from the default configuration are stored
+        session.execute(delete(UserRecipeConfig).where(
+            UserRecipeConfig.known.is_(True), UserRecipeConfig.excluded.is_(False),
+            UserRecipeConfig.preferred == UserRecipeConfig.recipe_id))
+    for chunk in chunks(item_ids):
+        user_rows['targets_without_item'] += session.execute(
+            update(ProductionLineTarget).where(ProductionLineTarget.item_id.in_(chunk)).values(item_id=None)).rowcount
+    diff.user_rows = user_rows
+
+
+def update_main_rows(session, model, rows):
+    """Overwrite every column of existing rows (dicts with their id), so each matches a fresh insert."""
+    if not rows:
+        return
+    table = model.__table__
+    columns = [column.name for column in table.columns if column.name != 'id']
+    statement = (update(table).where(table.c.id == bindparam('row_id'))
+                 .values({column: bindparam(column) for column in columns}))
+    session.execute(statement, [{'row_id': row['id'], **{column: row.get(column) for column in columns}}
+                                for row in rows])
+
+
+def write_fingerprints(session, diff, class_names_by_model):
+    table = IngestFingerprint.__table__
+    rows = [{'table_name': model.__tablename__, 'class_name': class_name,
+             'fingerprint': diff.fingerprints[model][class_name]}
+            for model, class_names in class_names_by_model.items() for class_name in class_names]
+    for chunk in chunks(rows):
+        statement = dialect_insert(session, table).values(chunk)
+        session.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.table_name, table.c.class_name],
+            set_={'fingerprint': statement.excluded.fingerprint}))
+
+
+def write_id_marks(session, max_ids):
+    """Store the largest id used per table (table name -> id)."""
+    table = IngestIdMark.__table__
+    statement = dialect_insert(session, table).values(
+        [{'table_name': table_name, 'max_id': max_id} for table_name, max_id in max_ids.items()])
+    session.execute(statement.on_conflict_do_update(
+        index_elements=[table.c.table_name], set_={'max_id': statement.excluded.max_id}))
+
+
+def record_fingerprints(session, entities):
+    """Store the fingerprint of every grouped object, e.g. after a full ingestion."""
+    diff = IngestDiff()
+    for model in MAIN_MODELS:
+        diff.fingerprints[model] = {name: fingerprint(entity) for name, entity in entities.get(model, {}).items()}
+    write_fingerprints(session, diff, diff.fingerprints)
+
+
+def apply_incremental_ingest(session, entities, report: LoadReport = None):
+    """
+    Apply the difference between the grouped game data (group_classified_objects) and the database. Nothing is
+    committed, and the components table is emptied for the caller to repopulate.
+
+    :return: The IngestDiff; an empty one means nothing was written.
+    """
+    report = report if report is not None else LoadReport()
+    diff, existing_ids = compute_diff(session, entities)
+    if diff.is_empty():
+        return diff
+
+    session.execute(delete(Component))
+
+    # Subtype rows of removed, changed and rewritten objects go; the changed ones are written again below
+    rewritten = {model: [*diff.changed[model]] for model in MAIN_MODELS}
+    rewritten[Recipe] += diff.rewritten_recipes
+    removed_ids = {model: [existing_ids[model][name] for name in diff.removed[model]] for model in MAIN_MODELS}
+    foreign_key = {model: f"{model.__tablename__[:-1]}_id" for model in MAIN_MODELS}
+    for model in MAIN_MODELS:
+        cleared_ids = removed_ids[model] + [existing_ids[model][name] for name in rewritten[model]]
+        for sub_class in SUBTYPE_MODELS[model]:
+            delete_where_in(session, sub_class, foreign_key[model], cleared_ids)
+        for referencing_class, column_name in REFERENCE_COLUMNS.get(model, ()):
+            delete_where_in(session, referencing_class, column_name, removed_ids[model])
+
+    release_user_references(session, diff, removed_ids)
+    for model in reversed(MAIN_MODELS):
+        delete_where_in(session, model, 'id', removed_ids[model])
+
+    # New ids continue after the largest one ever used, the ids removed now and by earlier ingestions included, so
+    # removed ids are not handed out again
+    id_marks = dict(session.execute(select(IngestIdMark.table_name, IngestIdMark.max_id)).all())
+    max_ids = {}
+    ids_by_class_name = {model: {name: existing_ids[model][name] for name in entities.get(model, {})
+                                 if name in existing_ids[model]} for model in MAIN_MODELS}
+    for model in MAIN_MODELS:
+        next_id = max(max(existing_ids[model].values(), default=0), id_marks.get(model.__tablename__, 0)) + 1
+        for offset, class_name in enumerate(diff.added[model]):
+            ids_by_class_name[model][class_name] = next_id + offset
+        max_ids[model.__tablename__] = next_id + len(diff.added[model]) - 1
+
+        update_main_rows(session, model, [{'id': ids_by_class_name[model][name], **entities[model][name]['row']}
+                                          for name in diff.changed[model]])
+        write_rows(session, model.__table__, [{'id': ids_by_class_name[model][name], **entities[model][name]['row']}
+                                              for name in diff.added[model]], report)
+    reset_sequences(session, [model.__table__ for model in MAIN_MODELS])
+    write_id_marks(session, max_ids)
+
+    for model in MAIN_MODELS:
+        sub_rows = {sub_class: [] for sub_class in SUBTYPE_MODELS[model]}
+        for class_name in [*diff.added[model], *rewritten[model]]:
+            for sub_class, sub_row, relationships in entities[model][class_name]['subtypes']:
+                row = dict(sub_row)
+                for related_class, related_name in relationships:
+                    related_id = ids_by_class_name.get(related_class, {}).get(related_name)
+                    if related_id is not None:
+                        row[foreign_key[related_class]] = related_id
+                sub_rows[sub_class].append(row)
+        for sub_class, rows in sub_rows.items():
+            write_rows(session, sub_class.__table__, rows, report)
+
+    for model in MAIN_MODELS:
+        for chunk in chunks(diff.removed[model]):
+            session.execute(delete(IngestFingerprint).where(IngestFingerprint.table_name == model.__tablename__,
+                                                            IngestFingerprint.class_name.in_(chunk)))
+    write_fingerprints(session, diff, {model: [*diff.added[model], *rewritten[model]] for model in MAIN_MODELS})
+    return diff
@@ -6,8 +6,8 @@ This script processes data from a JSON file related to a game and inserts it int
 ### Features:
 
 1. **Data Loading**:
-   - The script loads a JSON file (e.g., `data/en-US.json`) which contains game data such as buildings, items, and recipes.
-   - Data is typed and converted as necessary using utility functions like `load_json_file` and `convert_data_types`.
+   - The script streams a JSON file (e.g., `data/en-US.json`) which contains game data such as buildings, items, and recipes.
+   - Records are read one at a time with `stream_json_records`, then typed and converted with `convert_data_types`.
 
 2. **Filtering and Classification**:
    - Filters game objects to include in the database, currently focusing on production buildings, items, and recipes.
@@ -67,109 +67,89 @@ less
 This documentation outlines the purpose of the script, describes its main features, and includes examples of how key functions are used. It also references the associated SQLAlchemy models for buildings, items, and recipes. Let me know if you need any additional details or modifications! &#8203;:contentReference[oaicite:0]{index=0}&#8203;
 
 """
-import re
+import time
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import insert, text
 from sqlalchemy.inspection import inspect
 from sqlalchemy.orm import Session, sessionmaker, aliased
 
 from app.models import Item, AlienPowerFuel, Component, Sinkable, Consumable, NuclearFuel, PowerShard, RawResource, \
     Building, \
     Manufacturer, Extractor, Recipe, RecipeInputs, RecipeOutputs, RecipeCompatibleBuildings, Smelter
-from app.scripts.adjust_recipe_amounts_for_fluids import UpdateLiquids
-from app.utils import load_json_file, convert_data_types
+from app.models.base import Base, engine
+from app.scripts.bulk_loader import LoadReport, reset_sequences, write_rows
+# The subtype mappings live with the classification stage; imported here for the existing users of this module
+from app.scripts.classification import building_subtypes, item_subtypes_by_key_attribute, \
+    recipe_subtypes_by_key_attribute, classify_records, parse_recipe_strings, recipe_extensions
+from app.scripts.incremental_ingest import apply_incremental_ingest, record_fingerprints
+from app.services.data_version_service import DataVersionService
+from app.services.recipe_graph_service import RecipeGraphService
+from app.utils import stream_json_records, convert_data_types
 from config import Config
 
 game_data_file_path = "data/en-US.json"
 
 
-def truncate_tables(session: Session):
+# Tables emptied before a full ingestion, user data included
+ingestion_tables = [
+    "alien_power_fuels",
+    "sinkables",
+    "consumables",
+    "extractors",
+    "manufacturers",
+    "nuclear_fuels",
+    "power_shards",
+    "raw_resources",
+    "recipe_compatible_buildings",
+    "recipe_inputs",
+    "recipe_outputs",
+    "smelters",
+    "components",
+    "buildings",
+    "production_line_targets",
+    "items",
+    "production_lines",
+    "user_recipes",
+    "recipes",
+    "users",
+    "ingest_fingerprints",
+]
+
+
+def truncate_tables(session: Session, commit: bool = True):
     """
     Truncates specified tables in the PostgreSQL database and restarts their identities.
     Cascading is applied to dependent tables to ensure all related records are also deleted.
 
     Parameters:
     - session (Session): SQLAlchemy database session used to execute the truncate statements.
+    - commit (bool): Commit right away; False leaves the truncation to the caller's transaction, so a failed load
+      keeps the previous data.
 
     Returns:
     None
     """
-    truncate_statements = [
-        "truncate table alien_power_fuels restart identity cascade;",
-        "truncate table sinkables restart identity cascade;",
-        "truncate table consumables restart identity cascade;",
-        "truncate table extractors restart identity cascade;",
-        "truncate table manufacturers restart identity cascade;",
-        "truncate table nuclear_fuels restart identity cascade;",
-        "truncate table power_shards restart identity cascade;",
-        "truncate table raw_resources restart identity cascade;",
-        "truncate table recipe_compatible_buildings restart identity cascade;",
-        "truncate table recipe_inputs restart identity cascade;",
-        "truncate table recipe_outputs restart identity cascade;",
-        "truncate table smelters restart identity cascade;",
-        "truncate table components restart identity cascade;",
-        "truncate table buildings restart identity cascade;",
-        "truncate table production_line_targets restart identity cascade;",
-        "truncate table items restart identity cascade;",
-        "truncate table production_lines restart identity cascade;",
-        "truncate table user_recipes restart identity cascade;",
-        "truncate table recipes restart identity cascade;",
-        "truncate table users restart identity cascade;",
-    ]
-    # truncate_statements = [
-    #     "truncate table alien_power_fuels restart identity cascade;",
-    #     "truncate table components restart identity cascade;",
-    #     "truncate table sinkables restart identity cascade;",
-    #     "truncate table consumables restart identity cascade;",
-    #     "truncate table extractors restart identity cascade;",
-    #     "truncate table manufacturers restart identity cascade;",
-    #     "truncate table nuclear_fuels restart identity cascade;",
-    #     "truncate table power_shards restart identity cascade;",
-    #     "truncate table raw_resources restart identity cascade;",
-    #     "truncate table recipe_compatible_buildings restart identity cascade;",
-    #     "truncate table recipe_inputs restart identity cascade;",
-    #     "truncate table recipe_outputs restart identity cascade;",
-    #     "truncate table items restart identity cascade;",
-    #     "truncate table recipes restart identity cascade;",
-    #     "truncate table smelters restart identity cascade;",
-    #     "truncate table buildings restart identity cascade;"
-    # ]
-    #
-    for statement in truncate_statements:
-        session.execute(text(statement))
-
-    session.commit()  # Commit after all truncates
+    for table_name in ingestion_tables:
+        session.execute(text(f"truncate table {table_name} restart identity cascade;"))
+
+    if commit:
+        session.commit()  # Commit after all truncates
     print("All tables truncated and identities restarted.")
 
 
-building_subtypes = {
-    "Build_FrackingExtractor_C": "Extractor",
-    "Build_MinerMk2_C": "Extractor",
-    "Build_MinerMk1_C": "Extractor",
-    "Build_MinerMk3_C": "Extractor",
-    "Build_OilPump_C": "Extractor",
-    "Build_WaterPump_C": "Extractor",
-    "Build_AssemblerMk1_C": "Manufacturer",
-    "Build_Blender_C": "Manufacturer",
-    "Build_ConstructorMk1_C": "Manufacturer",
-    "Build_Converter_C": "Manufacturer",
-    "Build_HadronCollider_C": "Manufacturer",
-    "Build_ManufacturerMk1_C": "Manufacturer",
-    "Build_OilRefinery_C": "Manufacturer",
-    "Build_Packager_C": "Manufacturer",
-    "Build_QuantumEncoder_C": "Manufacturer",
-    "Build_FoundryMk1_C": "Smelter",
-    "Build_SmelterMk1_C": "Smelter"
-}
+def delete_tables(session: Session):
+    """
+    Deletes the rows of the tables `truncate_tables` empties, referencing tables first, in the caller's transaction.
+    TRUNCATE locks the tables against readers until the commit; with DELETE the API keeps serving the previous data
+    until the new data is committed. Identities are not restarted: the bulk loader writes explicit ids and moves the
+    sequences past them.
+
+    :param session: SQLAlchemy session used to interact with the database.
+    """
+    for table in reversed(Base.metadata.sorted_tables):
+        if table.name in ingestion_tables:
+            session.execute(table.delete())
 
-item_subtypes_by_key_attribute = {
-    "extra_potential": "PowerShard",
-    "boost_duration": "AlienPowerFuel",
-    "resource_sink_points": "Sinkable",
-    "custom_hands_mesh_scale": "Consumable",
-    "amount_of_waste": "NuclearFuel",
-    "collect_speed_multiplier": "RawResource"
-}
 
 item_subtypes_to_ORM_models = {
     "AlienPowerFuel": AlienPowerFuel,
@@ -188,12 +168,6 @@ building_subtypes_to_ORM_models = {
     "None": None
 }
 
-recipe_subtypes_by_key_attribute = {
-    "input_quantity": "RecipeInputs",
-    "output_quantity": "RecipeOutputs",
-    "is_produced_in_building": "RecipeCompatibleBuildings"
-}
-
 recipe_subtypes_to_ORM_models = {
     "RecipeInputs": RecipeInputs,
     "RecipeOutputs": RecipeOutputs,
@@ -208,18 +182,15 @@ table_name_to_ORM_models = {
 }
 
 
-# Setup engine and session independent of the app
+# Session on the application's engine, for running the ingestion outside a request
 def setup_db():
     """
-    Sets up the database connection by creating an engine and establishing a session factory.
-    This function configures the connection to the PostgreSQL database.
+    Opens a session on the shared engine (app.models.base), so the ingestion uses the same pool settings
+    as the application.
 
     Returns:
     None
     """
-    # Create an engine using the database URI from the config
-    engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
-
     # Create a configured "Session" class
     Session = sessionmaker(bind=engine)
 
@@ -248,43 +219,18 @@ def parse_recipe_data(session: Session, recipe_object):
     Returns:
     None
     """
-    recipe_ingredients = []
-    recipe_products = []
-    recipe_buildings = []
-
-    r_ingredients = re.compile(r'([A-Za-z0-9_]+)\.([A-Za-z0-9_]+_C)\'",Amount=(\d+)')
-    r_products = r_ingredients
-    r_buildings = re.compile(r'([A-Za-z0-9_]+)\.([A-Za-z0-9_]+_C)"')
-
-    if "ingredients" in recipe_object and recipe_object["ingredients"]:
-        for match in r_ingredients.finditer(recipe_object["ingredients"]):
-            class_name = match.group(2)
-            amount = match.group(3)
-            recipe_ingredients.append({"recipeInputs_item": class_name, "amount": amount})
-
-    if "product" in recipe_object and recipe_object["product"]:
-        for match in r_products.finditer(recipe_object["product"]):
-            class_name = match.group(2)
-            amount = match.group(3)
-            recipe_products.append({"recipeOutputs_item": class_name, "amount": amount})
-
-    if "produced_in" in recipe_object and recipe_object["produced_in"]:
-        for match in r_buildings.finditer(recipe_object["produced_in"]):
-            class_name = match.group(2)
-            if class_name in building_subtypes.keys():
-                recipe_buildings.append({"recipeCompatibleBuilding_building": class_name})
-
-    return (recipe_ingredients, recipe_products, recipe_buildings)
+    return parse_recipe_strings(recipe_object)
 
 
-def populate_components_table(session):
+def populate_components_table(session, commit: bool = True):
     """
     Re-populates the component table with Items that:
     - Are related to recipe_outputs for recipes that have a non-null building_id in the RecipeCompatibleBuildings table.
     - Have non-null resource_sink_points in the Items table
     - Are not produced from recipes that have related_events: related_events must be null.
     :param session: SQLAlchemy session used for database interactions.
-    :return: None
+    :param commit: Commit right away; False leaves the rows to the caller's transaction.
+    :return: The number of components inserted.
     """
 
     # Alias for certified components
@@ -319,18 +265,14 @@ def populate_components_table(session):
                     'alternate' if recipe.display_name.startswith('Alternate') else 'byproduct')),
         })
 
-    # Insert the rows into the components table
-    for component_row in component_rows:
-        new_component = Component(
-            item_id=component_row['item_id'],
-            building_id=component_row['building_id'],
-            recipe_id=component_row['recipe_id'],
-            recipe_type=component_row['recipe_type']
-        )
-        session.add(new_component)
+    # Insert the rows into the components table, as one multi-row INSERT
+    if component_rows:
+        session.execute(insert(Component), component_rows)
 
     # Commit the changes to the database
-    session.commit()
+    if commit:
+        session.commit()
+    return len(component_rows)
 
 
 def insert_subtype_object(session, object_to_insert, subclass, subclass_columns, relationships):
@@ -367,7 +309,7 @@ def insert_subtype_object(session, object_to_insert, subclass, subclass_columns,
     return subtype_new_object
 
 
-def insert_objects_with_subtypes(session: Session, object_list, main_class, sub_class):
+def insert_objects_with_subtypes(session: Session, object_list, main_class, sub_class, commit: bool = True):
     """
     Inserts a list of objects that have specific subtypes into the database.
     The method dynamically handles inserting into the main class and its respective subtypes.
@@ -376,6 +318,7 @@ def insert_objects_with_subtypes(session: Session, object_list, main_class, sub_
     :param object_list: List of objects, where each object is a dictionary containing "object" and "relationships".
     :param main_class: The main SQLAlchemy model class for the object (e.g., Item, Building).
     :param sub_class: The SQLAlchemy model class representing the subtype (e.g., Sinkable, AlienPowerFuel).
+    :param commit: Commit the objects; False only flushes them, leaving the commit to the caller's transaction.
     :return: None
     """
 
@@ -415,10 +358,13 @@ def insert_objects_with_subtypes(session: Session, object_list, main_class, sub_
             continue  # Continue processing the next object
 
     # Commit the session to save all changes to the database
-    session.commit()
+    if commit:
+        session.commit()
+    else:
+        session.flush()
 
 
-def insert_objects_without_subtypes(session: Session, object_list, main_class):
+def insert_objects_without_subtypes(session: Session, object_list, main_class, commit: bool = True):
     """
     Inserts a list of objects into the database when no subtypes are involved.
     The method filters attributes relevant to the main class and bulk inserts the objects.
@@ -426,6 +372,7 @@ def insert_objects_without_subtypes(session: Session, object_list, main_class):
     :param session: SQLAlchemy session used for database interactions.
     :param object_list: List of objects (dictionaries) to be inserted.
     :param main_class: The main SQLAlchemy model class for the object (e.g., Item, Recipe).
+    :param commit: Commit the objects; False leaves the commit to the caller's transaction.
     :return: None
     """
 
@@ -447,10 +394,11 @@ def insert_objects_without_subtypes(session: Session, object_list, main_class):
     session.bulk_save_objects(main_objects_to_insert)
 
     # Commit the changes to the database
-    session.commit()
+    if commit:
+        session.commit()
 
 
-def insert_fully_classified_objects(session: Session, fully_classified_objects):
+def insert_fully_classified_objects(session: Session, fully_classified_objects, commit: bool = True):
     """
     Inserts fully classified objects (items, buildings, and recipes) into the database.
     Depending on the object type and subtype, the insertion is handled using either
@@ -459,6 +407,7 @@ def insert_fully_classified_objects(session: Session, fully_classified_objects):
     :param session: SQLAlchemy session used to interact with the database.
     :param fully_classified_objects: A dictionary of classified objects, keyed by main class
                                      names (e.g., "Desc_", "Build_", "Recipe_") and their subtypes.
+    :param commit: Commit after each class and subtype; False writes everything in the caller's transaction.
     :return: None
     """
 
@@ -469,7 +418,8 @@ def insert_fully_classified_objects(session: Session, fully_classified_objects):
             session,
             fully_classified_objects[main_class_name][item_subtype],
             Item,
-            item_subtypes_to_ORM_models[item_subtype]
+            item_subtypes_to_ORM_models[item_subtype],
+            commit=commit
         )
 
     # Insert "Build_" buildings (e.g., production buildings)
@@ -479,7 +429,8 @@ def insert_fully_classified_objects(session: Session, fully_classified_objects):
             session,
             fully_classified_objects[main_class_name][build_subtype],
             Building,
-            building_subtypes_to_ORM_models[build_subtype]
+            building_subtypes_to_ORM_models[build_subtype],
+            commit=commit
         )
 
     # Insert "Recipe_" recipes
@@ -489,7 +440,8 @@ def insert_fully_classified_objects(session: Session, fully_classified_objects):
         insert_objects_without_subtypes(
             session,
             fully_classified_objects[main_class_name]["None"],
-            Recipe
+            Recipe,
+            commit=commit
         )
     else:
         # Otherwise, insert recipes by subtype
@@ -498,42 +450,139 @@ def insert_fully_classified_objects(session: Session, fully_classified_objects):
                 session,
                 fully_classified_objects[main_class_name][recipe_subtype],
                 Recipe,
-                recipe_subtypes_to_ORM_models[recipe_subtype]
+                recipe_subtypes_to_ORM_models[recipe_subtype],
+                commit=commit
             )
 
 
+def iter_classified_rows(fully_classified_objects):
+    """
+    Yields the rows of fully classified objects in the order `insert_fully_classified_objects` inserts them: items and
+    buildings before recipes, subtype list by subtype list, following the rules of `insert_objects_with_subtypes` and
+    `insert_subtype_object` (a subtype row for each object having any of the subtype's attributes).
+
+    :param fully_classified_objects: A dictionary of classified objects, as for `insert_fully_classified_objects`.
+    :return: Generator of (main ORM model, main row without id, subtype ORM model or None, subtype row without ids or
+             None, [(related ORM model, class_name), ...]).
+    """
+    subtype_models = {
+        "Desc_": (Item, item_subtypes_to_ORM_models),
+        "Build_": (Building, building_subtypes_to_ORM_models),
+        "Recipe_": (Recipe, recipe_subtypes_to_ORM_models),
+    }
+
+    # Items and buildings before recipes, whose subtype rows reference both
+    for main_class_name in ("Desc_", "Build_", "Recipe_"):
+        main_class, subtypes_to_models = subtype_models[main_class_name]
+        main_columns = {col.name for col in inspect(main_class).columns} - {"id"}
+
+        for subtype, object_list in fully_classified_objects.get(main_class_name, {}).items():
+            sub_class = subtypes_to_models.get(subtype)
+            sub_columns = {col.name for col in inspect(sub_class).columns} - {"id"} if sub_class is not None else set()
+
+            for object_with_relationship_data in object_list:
+                object_data = object_with_relationship_data["object"]
+                main_row = {key: value for key, value in object_data.items() if key in main_columns}
+                if sub_class is None or not any(key in object_data for key in sub_columns):
+                    yield main_class, main_row, None, None, []
+                    continue
+                yield (
+                    main_class,
+                    main_row,
+                    sub_class,
+                    {key: value for key, value in object_data.items() if key in sub_columns},
+                    [(relationship["table"], relationship["class_name"])
+                     for relationship in object_with_relationship_data["relationships"]
+                     if isinstance(relationship, dict)],
+                )
+
+
+def group_classified_objects(fully_classified_objects):
+    """
+    Groups fully classified objects by the item, building or recipe they describe (see `iter_classified_rows`): one
+    main row per class_name (the first occurrence wins), with the subtype rows of the objects of that class_name.
+
+    :param fully_classified_objects: A dictionary of classified objects, as for `insert_fully_classified_objects`.
+    :return: dict -- main ORM model (Item, Building, Recipe) -> {class_name: {"row": main row without id,
+             "subtypes": [(subtype ORM model, subtype row without ids, [(related ORM model, class_name), ...])]}},
+             in insertion order.
+    """
+    entities = {main_class: {} for main_class in (Item, Building, Recipe)}
+    for main_class, main_row, sub_class, sub_row, relationships in iter_classified_rows(fully_classified_objects):
+        entity = entities[main_class].get(main_row["class_name"])
+        if entity is None:
+            entity = entities[main_class][main_row["class_name"]] = {"row": main_row, "subtypes": []}
+        if sub_class is not None:
+            entity["subtypes"].append((sub_class, sub_row, relationships))
+    return entities
+
+
+def resolve_subtype_row(sub_row, relationships, ids_by_class_name):
+    """
+    Returns the subtype row with a foreign key for each related object found in ids_by_class_name
+    ({ORM model: {class_name: id}}); like `insert_subtype_object`, objects that are not found are left out.
+    """
+    resolved_row = dict(sub_row)
+    for related_class, class_name in relationships:
+        related_id = ids_by_class_name.get(related_class, {}).get(class_name)
+        if related_id is not None:
+            resolved_row[f"{remove_optional_s(related_class.__tablename__)}_id"] = related_id
+    return resolved_row
+
+
+def build_classified_rows(fully_classified_objects):
+    """
+    Turns fully classified objects into table rows with every foreign key resolved in memory through
+    class_name -> id maps. Ids are assigned in insertion order, as the identity columns restarted by
+    `truncate_tables` would.
+
+    :param fully_classified_objects: A dictionary of classified objects, as for `insert_fully_classified_objects`.
+    :return: dict -- ORM model -> list of row dictionaries, in the order the tables must be written.
+    """
+    entities = group_classified_objects(fully_classified_objects)
+    ids_by_class_name = {main_class: {class_name: index + 1 for index, class_name in enumerate(main_entities)}
+                         for main_class, main_entities in entities.items()}
+
+    # Main tables first, then the subtype tables that reference them, each in the ORM path's insertion order
+    rows = {main_class: [{"id": ids_by_class_name[main_class][class_name], **entity["row"]}
+                         for class_name, entity in main_entities.items()]
+            for main_class, main_entities in entities.items()}
+    for _, _, sub_class, sub_row, relationships in iter_classified_rows(fully_classified_objects):
+        if sub_class is not None:
+            sub_rows = rows.setdefault(sub_class, [])
+            sub_rows.append({**resolve_subtype_row(sub_row, relationships, ids_by_class_name),
+                             "id": len(sub_rows) + 1})
+    return rows
+
+
+def bulk_insert_fully_classified_objects(session: Session, fully_classified_objects, report: LoadReport = None):
+    """
+    Inserts fully classified objects like `insert_fully_classified_objects`, but resolves all relationships in
+    memory and writes each table at once (COPY on PostgreSQL, multi-row INSERT batches elsewhere) instead of adding
+    ORM objects one by one and querying related objects back by class_name. Nothing is committed: the caller's
+    transaction covers every table.
+
+    :param session: SQLAlchemy session used to interact with the database.
+    :param fully_classified_objects: A dictionary of classified objects, keyed by main class names and subtypes.
+    :param report: Optional LoadReport receiving the rows and seconds per table.
+    :return: The LoadReport.
+    """
+    report = report if report is not None else LoadReport()
+    started = time.perf_counter()
+    rows_by_model = build_classified_rows(fully_classified_objects)
+    report.add("(resolve relationships)", 0, time.perf_counter() - started)
+
+    for model, rows in rows_by_model.items():
+        write_rows(session, model.__table__, rows, report)
+    reset_sequences(session, [model.__table__ for model in rows_by_model])
+    return report
+
+
 def append_recipe_object_with_production_relationships(recipe, recipe_ingredients, recipe_products, recipe_buildings):
     """Takes in a recipe, along with recipe ingredients, recipe outputs and recipe buildings to create individual
     recipe objects for each one of those items so they can all be inserted individually into the database"""
-    recipe_objects_extended = []
-
-    if recipe_ingredients:
-        for recipe_ingredient in recipe_ingredients:
-            recipe_extended_object = recipe.copy()
-            recipe_extended_object["item"] = recipe_ingredient["recipeInputs_item"]
-            recipe_extended_object["input_quantity"] = recipe_ingredient["amount"]
-            recipe_objects_extended.append(recipe_extended_object)
-
-    if recipe_products:
-        for recipe_product in recipe_products:
-            recipe_extended_object = recipe.copy()
-            recipe_extended_object["item"] = recipe_product["recipeOutputs_item"]
-            recipe_extended_object["output_quantity"] = recipe_product["amount"]
-            recipe_objects_extended.append(recipe_extended_object)
-
-    if recipe_buildings:
-        for recipe_building in recipe_buildings:
-            recipe_extended_object = recipe.copy()
-            recipe_extended_object["building"] = recipe_building["recipeCompatibleBuilding_building"]
-            recipe_extended_object["is_produced_in_building"] = True
-            recipe_objects_extended.append(recipe_extended_object)
-
-    else:
-        recipe_extended_object = recipe.copy()
-        recipe_extended_object["is_produced_in_building"] = False
-        recipe_objects_extended.append(recipe_extended_object)
-
-    return recipe_objects_extended
+    return [{**recipe, **extension}
+            for extension in recipe_extensions(recipe_ingredients, recipe_products, recipe_buildings)]
 
 
 def classify_objects_into_subtypes(session: Session, valid_objects):
@@ -543,166 +592,31 @@ def classify_objects_into_subtypes(session: Session, valid_objects):
     and organizes them into subcategories. Relationships between objects and database
     tables (e.g., Item, Recipe) are also tracked.
 
+    The classification itself, recipe parsing included, is the pure function stage of app/scripts/classification.py;
+    this function assembles its compact records.
+
     :param session: SQLAlchemy session for interacting with the database.
     :param valid_objects: Dictionary of valid objects to classify, keyed by object type.
                           Example: {"Desc_": [...], "Recipe_": [...]}
     :return: A dictionary of subclassified objects, organized by object type and subtype.
     """
-    subclassified_objects = {}
-
-    # Iterate over each type of object in the valid objects dictionary
-    for object_type in valid_objects.keys():
-        match object_type:
-
-            # Classification logic for "Desc_" (Items)
-            case "Desc_":
-                desc_objects = valid_objects[object_type]
-                for item in desc_objects:
-                    # Find common keys between the object and the item subtypes
-                    matching_keys = set(item.keys()).intersection(set(item_subtypes_by_key_attribute.keys()))
-
-                    if matching_keys:
-                        # If matching keys are found, classify the item by subtype
-                        for key in matching_keys:
-                            sub_type = item_subtypes_by_key_attribute[key]
-                            item_with_relationships = {
-                                "relationships": [{"table": Item, "class_name": item["class_name"]}],
-                                "object": item
-                            }
-                            # Add the item to the subclassified objects under the correct subtype
-                            if "Desc_" in subclassified_objects:
-                                if sub_type in subclassified_objects["Desc_"]:
-                                    subclassified_objects["Desc_"][sub_type].append(item_with_relationships)
-                                else:
-                                    subclassified_objects["Desc_"][sub_type] = [item_with_relationships]
-                            else:
-                                subclassified_objects["Desc_"] = {sub_type: [item_with_relationships]}
-                    else:
-                        # Items that do not match any subtype are classified as "None"
-                        sub_type = "None"
-                        item_with_relationships = {
-                            "relationships": [{"table": Item, "class_name": item["class_name"]}],
-                            "object": item
-                        }
-                        if "Desc_" in subclassified_objects:
-                            if sub_type in subclassified_objects["Desc_"]:
-                                subclassified_objects["Desc_"][sub_type].append(item_with_relationships)
-                            else:
-                                subclassified_objects["Desc_"][sub_type] = [item_with_relationships]
-                        else:
-                            subclassified_objects["Desc_"] = {sub_type: [item_with_relationships]}
-
-            # Classification logic for "Build_" (Buildings)
-            case "Build_":
-                build_objects = valid_objects[object_type]
-                for building in build_objects:
-                    matching_values = set(building.values()).intersection(set(building_subtypes.keys()))
-                    if matching_values:
-                        value = next(iter(matching_values))
-                        if value in building_subtypes:
-                            sub_type = building_subtypes[value]
-                            building_with_relationships = {
-                                "relationships": [{"table": Building, "class_name": building["class_name"]}],
-                                "object": building
-                            }
-                            if "Build_" in subclassified_objects:
-                                if sub_type in subclassified_objects["Build_"]:
-                                    subclassified_objects["Build_"][sub_type].append(building_with_relationships)
-                                else:
-                                    subclassified_objects["Build_"][sub_type] = [building_with_relationships]
-                            else:
-                                subclassified_objects["Build_"] = {sub_type: [building_with_relationships]}
-                    else:
-                        sub_type = "None"
-                        building_with_relationships = {
-                            "relationships": [{"table": Building, "class_name": building["class_name"]}],
-                            "object": building
-                        }
-                        if "Build_" in subclassified_objects:
-                            if sub_type in subclassified_objects["Build_"]:
-                                subclassified_objects["Build_"][sub_type].append(building_with_relationships)
-                            else:
-                                subclassified_objects["Build_"][sub_type] = [building_with_relationships]
-                        else:
-                            subclassified_objects["Build_"] = {sub_type: [building_with_relationships]}
-
-            # Classification logic for "Recipe_" (Recipes)
-            case "Recipe_":
-                recipe_objects = valid_objects[object_type]
-                for recipe in recipe_objects:
-                    recipe_ingredients, recipe_products, recipe_buildings = parse_recipe_data(session, recipe)
-                    if recipe_ingredients or recipe_products or recipe_buildings:
-                        recipe_objects_extended = append_recipe_object_with_production_relationships(recipe,
-                                                                                                     recipe_ingredients,
-                                                                                                     recipe_products,
-                                                                                                     recipe_buildings)
-                        for extended_recipe_object in recipe_objects_extended:
-                            matching_keys = set(extended_recipe_object.keys()).intersection(
-                                set(recipe_subtypes_by_key_attribute.keys()))
-                            if matching_keys:
-                                for key in matching_keys:
-                                    sub_type = recipe_subtypes_by_key_attribute[key]
-                                    if sub_type == "RecipeInputs" or sub_type == "RecipeOutputs":
-                                        extended_recipe_with_relationships = {
-                                            "relationships": [
-                                                {"table": Recipe, "class_name": extended_recipe_object["class_name"]},
-                                                {"table": Item, "class_name": extended_recipe_object["item"]},
-                                            ],
-                                            "object": extended_recipe_object
-                                        }
-                                    elif sub_type == "RecipeCompatibleBuildings":
-                                        if "building" in extended_recipe_object:
-                                            extended_recipe_with_relationships = {
-                                                "relationships": [
-                                                    {"table": Recipe,
-                                                     "class_name": extended_recipe_object["class_name"]},
-                                                    {"table": Building,
-                                                     "class_name": extended_recipe_object["building"]},
-                                                ],
-                                                "object": extended_recipe_object
-                                            }
-                                        else:
-                                            extended_recipe_with_relationships = {
-                                                "relationships": [
-                                                    {"table": Recipe,
-                                                     "class_name": extended_recipe_object["class_name"]},
-                                                ],
-                                                "object": extended_recipe_object
-                                            }
-                                    else:
-                                        extended_recipe_with_relationships = {
-                                            "relationships": [
-                                                {"table": Recipe, "class_name": extended_recipe_object["class_name"]},
-                                            ],
-                                            "object": extended_recipe_object
-                                        }
-                                    if "Recipe_" in subclassified_objects:
-                                        if sub_type in subclassified_objects["Recipe_"]:
-                                            subclassified_objects["Recipe_"][sub_type].append(
-                                                extended_recipe_with_relationships)
-                                        else:
-                                            subclassified_objects["Recipe_"][sub_type] = [
-                                                extended_recipe_with_relationships]
-                                    else:
-                                        subclassified_objects["Recipe_"] = {
-                                            sub_type: [extended_recipe_with_relationships]}
-                    else:
-                        sub_type = "None"
-                        recipe_with_relationships = {
-                            "relationships": [
-                                {"table": Recipe, "class_name": recipe["class_name"]},
-                            ],
-                            "object": recipe
-                        }
-
-                        if "Recipe_" in subclassified_objects:
-                            if sub_type in subclassified_objects["Recipe_"]:
-                                subclassified_objects["Recipe_"][sub_type].append(recipe_with_relationships)
-                            else:
-                                subclassified_objects["Recipe_"][sub_type] = [recipe_with_relationships]
-                        else:
-                            subclassified_objects["Recipe_"] = {sub_type: [recipe_with_relationships]}
+    # Forms of the items, to store the recipe amounts of fluids adjusted (see UpdateLiquids)
+    item_forms = {item["class_name"]: item.get("form") for item in valid_objects.get("Desc_", [])}
+    records = classify_records(valid_objects, item_forms)
 
+    subclassified_objects = {}
+    for object_type, object_records in records.items():
+        objects = valid_objects[object_type]
+        subtypes_of_type = subclassified_objects.setdefault(object_type, {})
+        for index, extra, subtypes in object_records:
+            # Objects stored as they are keep their identity; extended recipes are copies with the extra fields
+            game_object = objects[index] if extra is None else {**objects[index], **extra}
+            for sub_type, related in subtypes:
+                subtypes_of_type.setdefault(sub_type, []).append({
+                    "relationships": [{"table": table_name_to_ORM_models[table_name], "class_name": class_name}
+                                      for table_name, class_name in related],
+                    "object": game_object,
+                })
     return subclassified_objects
 
 
@@ -736,6 +650,49 @@ def filter_by_attributes(object_type: str, current_object: dict, filtering_attri
     return valid_object
 
 
+def supported_object_type(potential_object: dict):
+    """
+    Returns the object type prefix ("Build_", "Desc_" or "Recipe_") under which a game object is stored, or None when
+    the object is not supported by this app's database: only production-related buildings and items with a form are.
+
+    :param potential_object: A dictionary representing an object from the game data, with snake_case keys.
+    :return: The object type prefix, or None.
+    """
+    class_name = potential_object["class_name"]
+
+    # Filter Building objects: only include production-related buildings
+    if class_name.startswith("Build_"):
+        if filter_by_attributes("Build_", potential_object, "pipe_output_connections") is not None:
+            return "Build_"
+        return None
+
+    # Filter Recipe objects: all recipes are valid
+    if class_name.startswith("Recipe_"):
+        return "Recipe_"
+
+    # Filter Item objects
+    if filter_by_attributes("Desc_", potential_object, "form") is not None:
+        return "Desc_"
+    return None
+
+
+def filter_object_stream(objects):
+    """
+    Keeps the supported objects of an iterable of game objects, so unsupported ones can be dropped as soon as they
+    are read.
+
+    :param objects: Iterable of game objects (dictionaries with snake_case keys).
+    :return: dict -- A dictionary where keys represent object type prefixes (e.g., "Build_", "Desc_", "Recipe_")
+                     and values are lists of objects corresponding to these types.
+    """
+    supported_objects = {}
+    for potential_object in objects:
+        object_type = supported_object_type(potential_object)
+        if object_type is not None:
+            supported_objects.setdefault(object_type, []).append(potential_object)
+    return supported_objects
+
+
 def filter_objects(game_data_json):
     """
     Filters the `game_data_json` into a list of objects that are supported by this app's database.
@@ -748,90 +705,202 @@ def filter_objects(game_data_json):
     :return: dict -- A dictionary where keys represent object type prefixes (e.g., "Build_", "Desc_", "Recipe_")
                      and values are lists of objects corresponding to these types.
     """
-    supported_objects = {}
-    supported_object_types = set()
-
-    for native_class in game_data_json:
-        classes = native_class["classes"]
-        for potential_object in classes:
-            class_name = potential_object["class_name"]
-
-            # Filter Building objects
-            if class_name.startswith("Build_"):
-                # Only include production-related buildings
-                filtering_attribute = "pipe_output_connections"
-                valid_object = filter_by_attributes("Build_", potential_object, filtering_attribute)
-                if valid_object is not None:
-                    if "Build_" not in supported_object_types:
-                        supported_object_types.add("Build_")
-                        supported_objects["Build_"] = [valid_object]
-                    else:
-                        supported_objects["Build_"].append(valid_object)
-
-            # Filter Recipe objects
-            elif class_name.startswith("Recipe_"):
-                # All recipes are valid
-                if "Recipe_" not in supported_object_types:
-                    supported_object_types.add("Recipe_")
-                    supported_objects["Recipe_"] = [potential_object]
-                else:
-                    supported_objects["Recipe_"].append(potential_object)
-
-            # Filter Item objects
-            else:
-                filtering_attribute = "form"
-                valid_object = filter_by_attributes("Desc_", potential_object, filtering_attribute)
-                if valid_object is not None:
-                    if "Desc_" not in supported_object_types:
-                        supported_object_types.add("Desc_")
-                        supported_objects["Desc_"] = [valid_object]
-                    else:
-                        supported_objects["Desc_"].append(valid_object)
+    return filter_object_stream(
+        potential_object for native_class in game_data_json for potential_object in native_class["classes"])
 
-    return supported_objects
 
+def stream_game_objects(file_path):
+    """
+    Yields the objects of the game data file one at a time, with snake_case keys and cast values. Only the object
+    being converted is held in memory, not the file or a converted copy of it.
 
-def initialize_database():
+    :param file_path: Path of the game data JSON file.
+    :return: Generator of game objects.
     """
-    Initializes the database by processing game data, filtering supported objects, and inserting them
-    into the PostgreSQL database. It also handles truncating tables before the insertion.
+    for record in stream_json_records(file_path, "Classes"):
+        yield convert_data_types(record, snakify_key=True)
 
-    This function performs the following steps:
-    1. Loads game data from a JSON file.
-    2. Converts the data types (using utility functions like `convert_data_types`).
-    3. Filters supported objects such as items, buildings, and recipes.
-    4. Truncates existing tables in the database.
-    5. Classifies the filtered objects into subtypes.
-    6. Inserts the fully classified objects into the database.
-    7. Commits the transaction and handles any errors during insertion.
 
-    :return: None
+# Key of the PostgreSQL advisory lock held by the transaction of an ingestion
+INGESTION_LOCK_KEY = 5_271_003
+
+
+def acquire_ingestion_lock(session: Session):
     """
-    game_data = load_json_file(game_data_file_path)
-    game_data_json = convert_data_types(game_data, snakify_key=True)
-    supported_objects_list = filter_objects(game_data_json)
-    # Set up the database session
-    session, engine = setup_db()
-    try:
-        truncate_tables(session)
-        fully_classified_objects = classify_objects_into_subtypes(session, supported_objects_list)
-        # Perform the database insertions using session
-        insert_fully_classified_objects(session, fully_classified_objects)
+    Takes the ingestion's transaction-level advisory lock on PostgreSQL, so that processes which each run their own
+    ingestion jobs never write the tables at the same time. Raises RuntimeError when another ingestion holds it.
+    """
+    if session.get_bind().dialect.name != 'postgresql':
+        return
+    if not session.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": INGESTION_LOCK_KEY}).scalar():
+        raise RuntimeError("Another game data ingestion is running.")
 
-        # Commit the changes
-        session.commit()
 
-        UpdateLiquids.adjust_recipe_amounts_for_fluids()
+def disable_statement_timeout(session: Session):
+    """
+    Lifts DB_STATEMENT_TIMEOUT_MS for the rest of the session's transaction on PostgreSQL: the statements of an
+    ingestion legitimately run longer than the cap applied to API queries (see engine_options).
+    """
+    if session.get_bind().dialect.name == 'postgresql':
+        session.execute(text("SET LOCAL statement_timeout = 0"))
+
+
+def report_phase(progress, phase, started, rows=None, **details):
+    """
+    Reports an ingestion phase to progress (e.g. Job.report) with its duration and throughput.
+
+    :return: The current perf_counter, as the start of the next phase.
+    """
+    now = time.perf_counter()
+    if progress is not None:
+        seconds = now - started
+        rows_per_second = round(rows / seconds) if rows and seconds else None
+        progress(phase, duration=seconds, rows=rows, rows_per_second=rows_per_second, **details)
+    return now
+
+
+def apply_game_data_update(session: Session, fully_classified_objects, report: LoadReport = None, progress=None):
+    """
+    Applies the game data to the database as a diff (see app/scripts/incremental_ingest.py): only added, changed and
+    removed objects are written, ids stay stable and user data is kept. Repopulates the components and stamps a new
+    data version when anything changed, all in one transaction.
+
+    :param session: SQLAlchemy session used to interact with the database.
+    :param fully_classified_objects: A dictionary of classified objects, keyed by main class names and subtypes.
+    :param report: Optional LoadReport receiving the rows and seconds per table.
+    :param progress: Optional callback receiving each phase, as for `ingest_game_data`.
+    :return: The IngestDiff.
+    """
+    report = report if report is not None else LoadReport()
+    started = time.perf_counter()
+    disable_statement_timeout(session)
+    acquire_ingestion_lock(session)
+    diff = apply_incremental_ingest(session, group_classified_objects(fully_classified_objects), report)
+    started = report_phase(progress, "insert", started, report.total_rows, diff=diff.to_dict())
+    if diff.is_empty():
+        session.rollback()
+        return diff
+
+    component_count = populate_components_table(session, commit=False)
+    report.add(Component.__tablename__, component_count, time.perf_counter() - started)
+    started = report_phase(progress, "components", started, component_count)
+    DataVersionService.bump_version(session, f"Incremental game data ingestion: {diff.summary()}")
+    session.commit()
+    RecipeGraphService.invalidate()
+    report_phase(progress, "switchover", started)
+    return diff
+
+
+def ingest_game_data(session: Session, bulk_load: bool = None, incremental: bool = None, progress=None):
+    """
+    Loads the game data file into the database; see `initialize_database` for the steps. Errors are raised, after
+    which the caller rolls the session back.
+
+    :param session: SQLAlchemy session used to interact with the database.
+    :param bulk_load: Use the bulk loader; defaults to Config.INGEST_BULK_LOAD.
+    :param incremental: Apply the game data as a diff; defaults to Config.INGEST_MODE == 'incremental'.
+    :param progress: Optional callback progress(phase, duration=seconds, rows=..., rows_per_second=..., **details)
+                     called after each phase: load, classify, delete or truncate (full ingestion), insert, components
+                     and switchover, the commit after which the new data is visible.
+    :return: The LoadReport of the insertion.
+    """
+    bulk_load = Config.INGEST_BULK_LOAD if bulk_load is None else bulk_load
+    incremental = Config.INGEST_MODE == 'incremental' if incremental is None else incremental
+    report = LoadReport()
+
+    # Reading, converting and filtering the objects are one pass over the file
+    started = time.perf_counter()
+    object_count = 0
+
+    def counted(objects):
+        nonlocal object_count
+        for game_object in objects:
+            object_count += 1
+            yield game_object
+
+    supported_objects_list = filter_object_stream(counted(stream_game_objects(game_data_file_path)))
+    started = report_phase(progress, "load", started, object_count,
+                           supported=sum(len(objects) for objects in supported_objects_list.values()))
+    # Classification needs no database access, so it happens before the write transaction
+    fully_classified_objects = classify_objects_into_subtypes(session, supported_objects_list)
+    started = report_phase(progress, "classify", started, sum(
+        len(objects) for subtypes in fully_classified_objects.values() for objects in subtypes.values()))
+
+    if incremental:
+        diff = apply_game_data_update(session, fully_classified_objects, report, progress)
+        print(f"Game data applied incrementally: {diff.summary()}" if not diff.is_empty()
+              else "Game data unchanged, nothing to apply.")
+        print(report.format())
+        return report
+
+    # Perform the database insertions using session. Everything below is one transaction, so a failed load keeps the
+    # previous data
+    disable_statement_timeout(session)
+    acquire_ingestion_lock(session)
+    if bulk_load:
+        # Readers see the previous data until the commit
+        delete_tables(session)
+        started = report_phase(progress, "delete", started)
+        bulk_insert_fully_classified_objects(session, fully_classified_objects, report)
+    else:
+        # TRUNCATE blocks readers of the tables until the commit
+        truncate_tables(session, commit=False)
+        started = report_phase(progress, "truncate", started)
+        insert_fully_classified_objects(session, fully_classified_objects, commit=False)
+        report.add("(orm insert)", 0, time.perf_counter() - started)
+    # Fingerprints of what was loaded, for the next incremental ingestion
+    record_fingerprints(session, group_classified_objects(fully_classified_objects))
+    started = report_phase(progress, "insert", started, report.total_rows)
+    print("Data inserted successfully!")
+
+    component_count = populate_components_table(session, commit=False)
+    report.add(Component.__tablename__, component_count, time.perf_counter() - started)
+    started = report_phase(progress, "components", started, component_count)
+    print("Components successfully populated!")
+
+    # Stamp the new data version so every process drops its recipe graph snapshot
+    DataVersionService.bump_version(session, "Full game data ingestion")
+    session.commit()
+    RecipeGraphService.invalidate()
+    report_phase(progress, "switchover", started)
+    print(report.format())
+    return report
 
-        print("Data inserted successfully!")
 
-        populate_components_table(session)
-        print("Components successfully populated!")
+def initialize_database(bulk_load: bool = None, incremental: bool = None, progress=None):
+    """
+    Initializes the database by processing game data, filtering supported objects, and inserting them
+    into the PostgreSQL database. It also handles emptying the tables before the insertion.
 
+    This function performs the following steps:
+    1. Streams the objects of the game data JSON file, converting each one's data types as it is read.
+    2. Keeps only supported objects such as items, buildings, and recipes, dropping the rest right away.
+    3. Keeps the supported objects by type, since recipes may appear in the file before the items and buildings
+       they reference, which must be inserted first.
+    4. Classifies the filtered objects into subtypes, storing the recipe amounts of fluids in m³.
+    5. Empties the existing tables within the load's transaction: DELETE in bulk load mode, TRUNCATE otherwise.
+    6. Inserts the fully classified objects into the database, every table in the same transaction. In bulk load
+       mode the tables are written by `bulk_insert_fully_classified_objects` and a timing report is printed.
+    7. Repopulates the components and writes a new data version stamp, which invalidates the recipe graph snapshot.
+    8. Commits the transaction and handles any errors during insertion.
+
+    In incremental mode steps 5 to 7 are replaced by `apply_game_data_update`, which writes only what changed since
+    the last ingestion and keeps user data; the tables are not emptied.
+
+    :param bulk_load: Use the bulk loader; defaults to Config.INGEST_BULK_LOAD.
+    :param incremental: Apply the game data as a diff; defaults to Config.INGEST_MODE == 'incremental'.
+    :param progress: Optional callback receiving each phase, see `ingest_game_data`.
+    :return: The LoadReport of the insertion, or None if it failed.
+    """
+    # Set up the database session
+    session, engine = setup_db()
+    try:
+        return ingest_game_data(session, bulk_load, incremental, progress)
 
     except Exception as e:
         session.rollback()  # Rollback if any error occurs
         print(f"Error during insertion: {e}")
+        return None
     finally:
         session.close()  # Close the session
 
@@ -0,0 +1,324 @@
+"""
+./app/scripts/lp_model.py
+Sparse item x recipe incidence structure used to build the production LP.
+
+Every recipe only touches a handful of items, so the flow matrix is stored in CSR form (one row per item, one
+column per recipe) and the LP rows are emitted from the nonzero entries only.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+import numpy as np
+import pulp
+
+
+class IncidenceMatrix:
+    """
+    Item x recipe flow rates in compressed sparse row form.
+
+    data[k] > 0 means recipe indices[k] produces the row's item (per minute, per machine),
+    data[k] < 0 means recipe indices[k] consumes it.
+    """
+
+    def __init__(self, item_ids, recipe_ids, indptr, indices, data):
+        self.item_ids = list(item_ids)
+        self.recipe_ids = list(recipe_ids)
+        self.item_to_index = {item_id: idx for idx, item_id in enumerate(self.item_ids)}
+        self.recipe_to_index = {recipe_id: idx for idx, recipe_id in enumerate(self.recipe_ids)}
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+
+    @property
+    def shape(self):
+        return len(self.item_ids), len(self.recipe_ids)
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    @classmethod
+    def from_coo(cls, item_ids, recipe_ids, rows, cols, values):
+        """Build the CSR arrays from (row, col, value) triplets, summing duplicate entries."""
+        n_rows = len(item_ids)
+        n_cols = len(recipe_ids)
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+
+        if len(values):
+            # Collapse duplicates (an item listed twice, or both consumed and produced by one recipe)
+            flat = rows * n_cols + cols
+            unique_flat, inverse = np.unique(flat, return_inverse=True)
+            summed = np.zeros(len(unique_flat), dtype=np.float64)
+            np.add.at(summed, inverse, values)
+            keep = summed != 0
+            unique_flat, summed = unique_flat[keep], summed[keep]
+            rows, cols = np.divmod(unique_flat, n_cols)
+            values = summed
+
+        # np.unique returns the flat indices sorted, so entries are already in row-major order
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+        return cls(item_ids, recipe_ids, indptr, cols.astype(np.int64), values)
+
+    @classmethod
+    def from_recipes(cls, recipes):
+        """
+        Build the incidence matrix from recipe detail dicts as returned by
+        RecipeService.get_component_recipes_details().
+
+        :param recipes: List of recipe dicts with 'id', 'manufactoring_duration', 'ingredients' and 'products'.
+        :return: IncidenceMatrix with one row per item touched by any recipe.
+        """
+        recipe_ids = [recipe['id'] for recipe in recipes]
+        item_ids = list(dict.fromkeys(
+            item['id']
+            for recipe in recipes
+            for item in (recipe['ingredients'] + recipe['products'])
+        ))
+        item_to_index = {item_id: idx for idx, item_id in enumerate(item_ids)}
+
+        rows, cols, values = [], [], []
+        for r_idx, recipe in enumerate(recipes):
+            runs_per_minute = Decimal(60) / Decimal(recipe['manufactoring_duration'])
+            for prod in recipe['products']:
+                rows.append(item_to_index[prod['id']])
+                cols.append(r_idx)
+                values.append(float(Decimal(prod['amount']) * runs_per_minute))
+            for ing in recipe['ingredients']:
+                rows.append(item_to_index[ing['id']])
+                cols.append(r_idx)
+                values.append(-float(Decimal(ing['amount']) * runs_per_minute))
+
+        return cls.from_coo(item_ids, recipe_ids, rows, cols, values)
+
+    def row(self, item_id):
+        """Return (column indices, values) of the nonzero entries in the row of item_id."""
+        i_idx = self.item_to_index[item_id]
+        start, end = self.indptr[i_idx], self.indptr[i_idx + 1]
+        return self.indices[start:end], self.data[start:end]
+
+    def row_dot(self, item_id, x):
+        """Net flow of item_id for recipe scales x (indexed like recipe_ids)."""
+        cols, values = self.row(item_id)
+        return float(np.dot(values, x[cols]))
+
+    def to_dense(self):
+        dense = np.zeros(self.shape)
+        for i_idx in range(len(self.item_ids)):
+            start, end = self.indptr[i_idx], self.indptr[i_idx + 1]
+            dense[i_idx, self.indices[start:end]] = self.data[start:end]
+        return dense
+
+
+def raw_resource_cost_coefficients(incidence, resource_costs, handling_fee):
+    """
+    Objective coefficient per recipe column: weighted raw resource consumption plus a small handling fee.
+
+    :param incidence: IncidenceMatrix of the pruned recipes.
+    :param resource_costs: Dict of raw resource item id -> cost per unit consumed.
+    :param handling_fee: Cost added per unit of every recipe scale.
+    :return: numpy array with one coefficient per recipe column.
+    """
+    costs = np.full(len(incidence.recipe_ids), handling_fee, dtype=np.float64)
+    for raw_id, cost in resource_costs.items():
+        if raw_id not in incidence.item_to_index:
+            continue
+        cols, values = incidence.row(raw_id)
+        consumed = values < 0
+        # -value turns a consumption rate into a positive quantity
+        np.add.at(costs, cols[consumed], -values[consumed] * cost)
+    return costs
+
+
+class LinearProgram:
+    """
+    Solver-neutral form of the production LP: minimize c @ x subject to G @ x >= h and 0 <= x <= upper.
+
+    G is stored in CSR form, one row per constraint. Every row is a row of the incidence matrix, so its nonzero
+    pattern is shared with it rather than rebuilt per solve. upper is None when no column has an upper bound.
+    """
+
+    def __init__(self, recipe_ids, row_names, row_item_ids, indptr, indices, data, h, c, upper=None):
+        self.recipe_ids = list(recipe_ids)
+        self.row_names = list(row_names)
+        self.row_item_ids = list(row_item_ids)
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.h = h
+        self.c = c
+        self.upper = upper
+
+    def column_upper_bounds(self):
+        """Upper bound of every column, np.inf where unbounded."""
+        return self.upper if self.upper is not None else np.full(len(self.recipe_ids), np.inf)
+
+    @property
+    def shape(self):
+        return len(self.row_names), len(self.recipe_ids)
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    def to_pulp(self):
+        """
+        Build the equivalent PuLP problem, emitting only the nonzero terms of each row.
+
+        :return: (prob, recipe_vars) where recipe_vars maps recipe id -> LpVariable.
+        """
+        prob = pulp.LpProblem("Satisfactory_Production_Optimizer", pulp.LpMinimize)
+
+        # Variables: production scale for each recipe
+        upper = [bound if np.isfinite(bound) else None for bound in self.column_upper_bounds().tolist()]
+        variables = [pulp.LpVariable(f"scale_{r_id}", lowBound=0, upBound=bound)
+                     for r_id, bound in zip(self.recipe_ids, upper)]
+        recipe_vars = dict(zip(self.recipe_ids, variables))
+
+        indices, data, h = self.indices.tolist(), self.data.tolist(), self.h.tolist()
+        for row, name in enumerate(self.row_names):
+            start, end = self.indptr[row], self.indptr[row + 1]
+            expression = pulp.LpAffineExpression([(variables[col], value)
+                                                  for col, value in zip(indices[start:end], data[start:end])])
+            prob.addConstraint(pulp.LpConstraint(expression, pulp.LpConstraintGE, rhs=h[row]), name)
+
+        # Objective: one term per recipe column
+        prob.setObjective(pulp.LpAffineExpression(list(zip(variables, self.c.tolist()))))
+        prob.objective.name = "Minimize_Total_Cost"
+
+        return prob, recipe_vars
+
+
+def build_linear_program(incidence, target_outputs, raw_resource_limits, resource_costs, handling_fee):
+    """
+    Select the constraint rows of the production LP from the incidence matrix.
+
+    :param incidence: IncidenceMatrix of the pruned recipes.
+    :param target_outputs: Dict of item id -> required net output rate.
+    :param raw_resource_limits: Dict of raw resource item id -> maximum consumption rate.
+    :param resource_costs: Dict of raw resource item id -> cost per unit consumed.
+    :param handling_fee: Cost added per unit of every recipe scale.
+    :return: LinearProgram with rows Target_output_*, Flow_balance_* and Raw_resource_limit_*, in that order.
+    """
+    row_names, row_item_ids, rhs = [], [], []
+
+    # Target output constraints
+    for item_id, required_scale in target_outputs.items():
+        if item_id not in incidence.item_to_index:
+            raise ValueError(f"No available recipe produces target item {item_id}.")
+        row_names.append(f"Target_output_{item_id}")
+        row_item_ids.append(item_id)
+        rhs.append(required_scale)
+
+    # Flow constraints for intermediate items: They should not be net negative.
+    raw_resources = set(raw_resource_limits.keys())
+    for item_id in incidence.item_ids:
+        if item_id not in target_outputs and item_id not in raw_resources:
+            row_names.append(f"Flow_balance_{item_id}")
+            row_item_ids.append(item_id)
+            rhs.append(0)
+
+    # Raw resource constraints: consumption (negative flow) cannot exceed the limit.
+    # Resources that no recipe touches would only give an empty 0 >= -limit row, so they are skipped.
+    for raw_id, max_amount in raw_resource_limits.items():
+        if raw_id not in incidence.item_to_index:
+            continue
+        row_names.append(f"Raw_resource_limit_{raw_id}")
+        row_item_ids.append(raw_id)
+        rhs.append(-max_amount)
+
+    # Gather the selected incidence rows into a new CSR block
+    rows = np.array([incidence.item_to_index[item_id] for item_id in row_item_ids], dtype=np.int64)
+    starts, ends = incidence.indptr[rows], incidence.indptr[rows + 1]
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(ends - starts, out=indptr[1:])
+    positions = (np.concatenate([np.arange(start, end) for start, end in zip(starts, ends)])
+                 if len(rows) else np.zeros(0, dtype=np.int64))
+
+    # Objective: minimize weighted raw resource usage plus the handling fee, one term per recipe column.
+    costs = raw_resource_cost_coefficients(incidence, resource_costs, handling_fee)
+
+    return LinearProgram(incidence.recipe_ids, row_names, row_item_ids, indptr,
+                         incidence.indices[positions], incidence.data[positions],
+                         np.asarray(rhs, dtype=np.float64), costs)
+
+
+def stack_linear_programs(lps, shared_item_ids):
+    """
+    Combine LinearPrograms over the same recipe columns into one joint program.
+
+    Every program gets its own copy of the columns, and its rows apply to that block only, except the rows of
+    shared items (the raw resources). For those, the rows of all blocks are summed into one row, so the blocks
+    compete for a single limit; its right-hand side is taken from the first program that has the row.
+
+    :return: LinearProgram whose columns are the blocks' columns in order (block k at k * n_cols).
+    """
+    n_cols = lps[0].shape[1]
+    row_names, row_item_ids, rhs = [], [], []
+    rows, cols, values = [], [], []
+    shared_rows = {}
+
+    for block, lp in enumerate(lps):
+        if lp.recipe_ids != lps[0].recipe_ids:
+            raise ValueError("Only programs over the same recipe columns can be stacked.")
+        for row, (name, item_id) in enumerate(zip(lp.row_names, lp.row_item_ids)):
+            if item_id in shared_item_ids:
+                if item_id not in shared_rows:
+                    shared_rows[item_id] = len(row_names)
+                    row_names.append(name)
+                    row_item_ids.append(item_id)
+                    rhs.append(lp.h[row])
+                target_row = shared_rows[item_id]
+            else:
+                target_row = len(row_names)
+                row_names.append(f"{name}_line_{block}")
+                row_item_ids.append(item_id)
+                rhs.append(lp.h[row])
+
+            start, end = lp.indptr[row], lp.indptr[row + 1]
+            rows.append(np.full(end - start, target_row, dtype=np.int64))
+            cols.append(lp.indices[start:end] + block * n_cols)
+            values.append(lp.data[start:end])
+
+    rows, cols, values = np.concatenate(rows), np.concatenate(cols), np.concatenate(values)
+    order = np.argsort(rows, kind='stable')
+    indptr = np.zeros(len(row_names) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=len(row_names)), out=indptr[1:])
+    recipe_ids = [(block, recipe_id) for block in range(len(lps)) for recipe_id in lps[0].recipe_ids]
+
+    upper = None
+    if any(lp.upper is not None for lp in lps):
+        upper = np.concatenate([lp.column_upper_bounds() for lp in lps])
+
+    return LinearProgram(recipe_ids, row_names, row_item_ids, indptr, cols[order], values[order],
+                         np.asarray(rhs, dtype=np.float64), np.concatenate([lp.c for lp in lps]), upper)
+
+
+def build_lp_problem(incidence, target_outputs, raw_resource_limits, resource_costs, handling_fee):
+    """
+    Build the PuLP problem from the sparse incidence matrix, emitting only the nonzero terms of each row.
+
+    :return: (prob, recipe_vars) where recipe_vars maps recipe id -> LpVariable.
+    """
+    lp = build_linear_program(incidence, target_outputs, raw_resource_limits, resource_costs, handling_fee)
+    return lp.to_pulp()
+
+
+def raw_resource_usage_from_scales(incidence, raw_resources, scales, threshold=1e-6):
+    """
+    External supply needed for each raw resource given the solved recipe scales.
+
+    :param scales: numpy array of recipe scales indexed like incidence.recipe_ids.
+    :return: defaultdict of raw resource item id -> positive consumption rate.
+    """
+    raw_resource_usage = defaultdict(float)
+    for iid in raw_resources:
+        if iid not in incidence.item_to_index:
+            continue
+        net_flow = incidence.row_dot(iid, scales)
+        # A negative net flow is a net consumption of that resource from outside
+        if net_flow < -threshold:
+            raw_resource_usage[iid] = -net_flow
+    return raw_resource_usage
@@ -0,0 +1,133 @@
+"""
+./app/scripts/lp_presolve.py
+Presolve over the recipe graph: drop recipes that cannot take part in an optimal production line before the LP is
+built.
+
+Two passes, both on the net item sets precomputed by RecipeGraph:
+
+1. Forward: a recipe is unrunnable when it consumes an item that is not raw and that no runnable recipe produces.
+   Dropping one recipe can leave its products without a producer, so this repeats until nothing changes. What is
+   left are the recipes whose every input has a supplier, including recipes that feed each other (Recycled Plastic
+   and Recycled Rubber once the user excludes the standard recipes). The recipes of any feasible solution make such a
+   set, so the dropped ones are 0 in every feasible solution.
+2. Backward: starting from the targets, keep the runnable recipes that produce a needed item and mark what they
+   consume as needed. The other recipes only make items nobody downstream consumes (dead ends whose outputs have
+   no sink); running them only adds cost, so they are 0 in an optimal solution.
+"""
+import time
+from collections import defaultdict
+
+
+class PresolveReport:
+    def __init__(self, variables_before, variables_after, constraints_before, constraints_after, unrunnable,
+                 unreachable, duration):
+        self.variables_before = variables_before
+        self.variables_after = variables_after
+        self.constraints_before = constraints_before
+        self.constraints_after = constraints_after
+        self.unrunnable = unrunnable
+        self.unreachable = unreachable
+        self.duration = duration
+
+    def to_dict(self):
+        return {
+            'variables_before': self.variables_before,
+            'variables_after': self.variables_after,
+            'variables_removed': self.variables_before - self.variables_after,
+            'constraints_before': self.constraints_before,
+            'constraints_after': self.constraints_after,
+            'constraints_removed': self.constraints_before - self.constraints_after,
+            'unrunnable_recipes': self.unrunnable,
+            'unreachable_recipes': self.unreachable,
+            'time_ms': round(1000 * self.duration, 3),
+        }
+
+
+def runnable_recipes(consumed, produced, raw_item_ids):
+    """
+    Forward pass. consumed and produced map recipe id -> frozenset of item ids.
+
+    :return: Set of recipe ids whose every input is raw or produced by another recipe of the set.
+    """
+    raw_item_ids = set(raw_item_ids)
+    producers = defaultdict(set)
+    consumers = defaultdict(list)
+    for recipe_id in consumed:
+        for item_id in produced[recipe_id]:
+            producers[item_id].add(recipe_id)
+        for item_id in consumed[recipe_id] - raw_item_ids:
+            consumers[item_id].append(recipe_id)
+
+    runnable = set(consumed)
+    unsupplied = [item_id for item_id in consumers if not producers[item_id]]
+    while unsupplied:
+        for recipe_id in consumers[unsupplied.pop()]:
+            if recipe_id not in runnable:
+                continue
+            runnable.discard(recipe_id)
+            for item_id in produced[recipe_id]:
+                producers[item_id].discard(recipe_id)
+                if not producers[item_id] and item_id in consumers:
+                    unsupplied.append(item_id)
+    return runnable
+
+
+def reachable_recipes(consumed, produced, recipe_ids, target_item_ids):
+    """
+    Backward pass over recipe_ids.
+
+    :return: Set of recipe ids that produce a target or an item consumed by another reachable recipe.
+    """
+    producers = defaultdict(list)
+    for recipe_id in recipe_ids:
+        for item_id in produced[recipe_id]:
+            producers[item_id].append(recipe_id)
+
+    needed = set(target_item_ids)
+    stack = list(needed)
+    reachable = set()
+    while stack:
+        for recipe_id in producers.get(stack.pop(), ()):
+            if recipe_id in reachable:
+                continue
+            reachable.add(recipe_id)
+            for item_id in consumed[recipe_id] - needed:
+                needed.add(item_id)
+                stack.append(item_id)
+    return reachable
+
+
+def presolve_recipes(recipe_graph, recipe_ids, target_item_ids, raw_item_ids):
+    """
+    Drop the recipes that are 0 in every optimal solution.
+
+    :param recipe_graph: RecipeGraph snapshot the recipe ids belong to.
+    :param recipe_ids: Candidate recipe ids (the effective recipes of the user's configuration).
+    :param target_item_ids: Items with a production target.
+    :param raw_item_ids: Raw resources, supplied from outside the production line.
+    :return: (kept recipe ids in their original order, PresolveReport)
+    """
+    started = time.perf_counter()
+    consumed, produced = {}, {}
+    for recipe_id in recipe_ids:
+        r_idx = recipe_graph.recipe_index[recipe_id]
+        consumed[recipe_id] = recipe_graph.net_consumed_items[r_idx]
+        produced[recipe_id] = recipe_graph.net_produced_items[r_idx]
+
+    runnable = runnable_recipes(consumed, produced, raw_item_ids)
+    reachable = reachable_recipes(consumed, produced, [r for r in recipe_ids if r in runnable], target_item_ids)
+    kept = [recipe_id for recipe_id in recipe_ids if recipe_id in reachable]
+
+    def touched_items(ids):
+        return set().union(*(consumed[recipe_id] | produced[recipe_id] for recipe_id in ids))
+
+    report = PresolveReport(
+        variables_before=len(recipe_ids),
+        variables_after=len(kept),
+        constraints_before=len(touched_items(recipe_ids)),
+        constraints_after=len(touched_items(kept)),
+        unrunnable=len(recipe_ids) - len(runnable),
+        unreachable=len(runnable) - len(kept),
+        duration=time.perf_counter() - started,
+    )
+    return kept, report
@@ -0,0 +1,284 @@
+"""
+./app/scripts/lp_solvers.py
+Solver backends for the production LP.
+
+'highs' runs HiGHS in-process through highspy, passing the CSR arrays of the LinearProgram directly, so no
+subprocess is spawned and no model file is written. 'cbc' builds the PuLP problem and solves it with the bundled
+CBC binary; it is used when highspy is not installed. The default comes from Config.LP_SOLVER_BACKEND.
+"""
+import logging
+import time
+
+import numpy as np
+import pulp
+
+from app.scripts.lp_model import LinearProgram
+from config import Config
+
+try:
+    import highspy
+except ImportError:  # pragma: no cover - depends on the deployment
+    highspy = None
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('highs', 'cbc')
+
+# Callables observer(solution) run after every solve finished in or returned to this process (e.g. metrics)
+solve_observers = []
+
+
+def notify_solve_observers(solutions):
+    for solution in solutions:
+        for observer in solve_observers:
+            observer(solution)
+
+
+class LPSolution:
+    """
+    Outcome of one solve.
+
+    :param status: PuLP-style status string ('Optimal', 'Infeasible', 'Unbounded', 'Not Solved', 'Undefined').
+    :param x: numpy array of recipe scales indexed like the LinearProgram's recipe_ids.
+    :param objective: Objective value, or None when the solver did not report one.
+    :param backend: Name of the backend that produced the solution.
+    :param solve_time: Wall time of the solver call in seconds, model handoff included.
+    :param row_duals: Dual value of every constraint row at the optimum, or None.
+    :param reduced_costs: Reduced cost of every column at the optimum, or None.
+    :param rhs_ranging: (lower, upper) arrays: the range each row's right-hand side can move over while its dual
+                        stays valid, or None. Only HiGHS reports ranging.
+    """
+
+    def __init__(self, status, x, objective, backend, solve_time, warm_start=False, row_duals=None,
+                 reduced_costs=None, rhs_ranging=None):
+        self.status = status
+        self.x = x
+        self.objective = objective
+        self.backend = backend
+        self.solve_time = solve_time
+        self.warm_start = warm_start
+        self.row_duals = row_duals
+        self.reduced_costs = reduced_costs
+        self.rhs_ranging = rhs_ranging
+
+    @property
+    def is_optimal(self):
+        return self.status == 'Optimal'
+
+    def to_dict(self):
+        return {
+            'backend': self.backend,
+            'status': self.status,
+            'objective': self.objective,
+            'solve_time_ms': round(1000 * self.solve_time, 3),
+            'warm_start': self.warm_start,
+        }
+
+
+def available_backends():
+    return [backend for backend in BACKENDS if backend != 'highs' or highspy is not None]
+
+
+def resolve_backend(backend=None):
+    """Return the backend to use for a solve, falling back to CBC when the requested one is unavailable."""
+    backend = (backend or Config.LP_SOLVER_BACKEND).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown LP solver backend '{backend}', expected one of {', '.join(BACKENDS)}.")
+    if backend == 'highs' and highspy is None:
+        logger.warning("highspy is not installed, falling back to the CBC solver backend.")
+        return 'cbc'
+    return backend
+
+
+def solve_lp(lp, backend=None, ranging=False):
+    """
+    Solve a LinearProgram with the selected backend.
+
+    :param lp: LinearProgram built by lp_model.build_linear_program.
+    :param backend: 'highs' or 'cbc'; defaults to Config.LP_SOLVER_BACKEND.
+    :param ranging: Also compute right-hand side ranging (HiGHS only).
+    :return: LPSolution
+    """
+    backend = resolve_backend(backend)
+    solution = solve_with_highs(lp, ranging) if backend == 'highs' else solve_with_cbc(lp)
+    notify_solve_observers([solution])
+    return solution
+
+
+def solve_many(lps, backend=None, executor=None, ranging=False):
+    """
+    Solve several independent LinearPrograms, in parallel on executor (e.g. a ProcessPoolExecutor) when one is
+    given and there is more than one program. The programs and solutions are plain arrays, so they pickle cheaply.
+
+    :return: List of LPSolution in the order of lps.
+    """
+    backend = resolve_backend(backend)
+    if executor is None or len(lps) <= 1:
+        return [solve_lp(lp, backend, ranging) for lp in lps]
+    # Observers run in this process; the pool's processes have none
+    solutions = list(executor.map(solve_lp, lps, [backend] * len(lps), [ranging] * len(lps)))
+    notify_solve_observers(solutions)
+    return solutions
+
+
+if highspy is not None:
+    HIGHS_STATUSES = {
+        highspy.HighsModelStatus.kOptimal: 'Optimal',
+        highspy.HighsModelStatus.kInfeasible: 'Infeasible',
+        highspy.HighsModelStatus.kUnbounded: 'Unbounded',
+        highspy.HighsModelStatus.kUnboundedOrInfeasible: 'Infeasible',
+        highspy.HighsModelStatus.kModelEmpty: 'Optimal',
+    }
+
+
+def highs_model(lp):
+    """Translate a LinearProgram into a highspy.HighsLp with a row-wise constraint matrix."""
+    n_rows, n_cols = lp.shape
+    model = highspy.HighsLp()
+    model.num_col_ = n_cols
+    model.num_row_ = n_rows
+    model.col_cost_ = lp.c
+    model.col_lower_ = np.zeros(n_cols)
+    model.col_upper_ = np.minimum(lp.column_upper_bounds(), highspy.kHighsInf)
+    model.row_lower_ = lp.h
+    model.row_upper_ = np.full(n_rows, highspy.kHighsInf)
+    model.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+    model.a_matrix_.num_row_ = n_rows
+    model.a_matrix_.num_col_ = n_cols
+    model.a_matrix_.start_ = lp.indptr
+    model.a_matrix_.index_ = lp.indices
+    model.a_matrix_.value_ = lp.data
+    return model
+
+
+def new_highs():
+    highs = highspy.Highs()
+    highs.setOptionValue('output_flag', False)
+    return highs
+
+
+def highs_solution(highs, n_cols, started, warm_start=False, ranging=False):
+    """Read the result of the last run of highs into an LPSolution, with right-hand side ranging if asked."""
+    model_status = highs.getModelStatus()
+    status = HIGHS_STATUSES.get(model_status, 'Not Solved')
+    x = np.asarray(highs.getSolution().col_value, dtype=np.float64)
+    if len(x) != n_cols:
+        x = np.zeros(n_cols)
+    objective, row_duals, reduced_costs, rhs_ranging = None, None, None, None
+    if status == 'Optimal':
+        objective = highs.getInfo().objective_function_value
+        solution = highs.getSolution()
+        if solution.dual_valid:
+            row_duals = np.asarray(solution.row_dual, dtype=np.float64)
+            reduced_costs = np.asarray(solution.col_dual, dtype=np.float64)
+        if ranging:
+            ranging_status, highs_ranging = highs.getRanging()
+            if ranging_status == highspy.HighsStatus.kOk and highs_ranging.valid:
+                rhs_ranging = (np.asarray(highs_ranging.row_bound_dn.value_, dtype=np.float64),
+                               np.asarray(highs_ranging.row_bound_up.value_, dtype=np.float64))
+    return LPSolution(status, x, objective, 'highs', time.perf_counter() - started, warm_start=warm_start,
+                      row_duals=row_duals, reduced_costs=reduced_costs, rhs_ranging=rhs_ranging)
+
+
+def solve_with_highs(lp, ranging=False):
+    started = time.perf_counter()
+    highs = new_highs()
+    highs.passModel(highs_model(lp))
+    highs.run()
+    return highs_solution(highs, lp.shape[1], started, ranging=ranging)
+
+
+class HighsModel:
+    """
+    A LinearProgram loaded into a long-lived HiGHS instance.
+
+    HiGHS keeps the optimal basis of the last run, so after update_rhs only changes row bounds the next solve
+    re-optimizes from that basis (usually a handful of dual simplex iterations) instead of starting cold.
+
+    :param lp: LinearProgram to load.
+    :param structure_key: Hashable description of everything but the right-hand side; a model can only be reused
+                          for a request with the same structure key.
+    :param context: Anything the caller needs alongside the model to interpret its solutions (e.g. the incidence).
+    """
+
+    def __init__(self, lp, structure_key, context=None):
+        self.lp = lp
+        self.structure_key = structure_key
+        self.context = context
+        self.solves = 0
+        self._highs = new_highs()
+        self._highs.passModel(highs_model(lp))
+
+    @property
+    def h(self):
+        return self.lp.h
+
+    def update_rhs(self, h):
+        """
+        Set the lower bounds of the constraint rows to h, touching only the rows that changed.
+
+        :return: Number of rows changed.
+        """
+        h = np.asarray(h, dtype=np.float64)
+        changed = np.flatnonzero(h != self.h)
+        if len(changed):
+            self._highs.changeRowsBounds(len(changed), changed.astype(np.int32), h[changed],
+                                         np.full(len(changed), highspy.kHighsInf))
+            self.lp.h = h.copy()
+        return len(changed)
+
+    def solve(self, ranging=False):
+        started = time.perf_counter()
+        warm_start = self.solves > 0
+        self._highs.run()
+        self.solves += 1
+        solution = highs_solution(self._highs, self.lp.shape[1], started, warm_start=warm_start, ranging=ranging)
+        notify_solve_observers([solution])
+        return solution
+
+
+def solve_with_cbc(lp):
+    started = time.perf_counter()
+    prob, recipe_vars = lp.to_pulp()
+    prob.solve(pulp.PULP_CBC_CMD(msg=False))
+    x = np.array([var.value() or 0.0 for var in recipe_vars.values()])
+    objective = pulp.value(prob.objective)
+    status = pulp.LpStatus[prob.status]
+    row_duals, reduced_costs = None, None
+    if status == 'Optimal':
+        row_duals = np.array([constraint.pi or 0.0 for constraint in prob.constraints.values()])
+        reduced_costs = np.array([var.dj or 0.0 for var in recipe_vars.values()])
+    return LPSolution(status, x, objective, 'cbc', time.perf_counter() - started, row_duals=row_duals,
+                      reduced_costs=reduced_costs)
+
+
+def solve_column_releases(lp, columns, backend=None):
+    """
+    What-if solves: for each column in columns, lift its upper bound to infinity (every other bound as in lp)
+    and solve. With HiGHS the model is compiled once and each solve starts from the basis of the previous one.
+
+    :return: List of LPSolution, one per column.
+    """
+    backend = resolve_backend(backend)
+    upper = lp.column_upper_bounds()
+    solutions = []
+    if backend == 'highs':
+        highs = new_highs()
+        highs.passModel(highs_model(lp))
+        for column in columns:
+            started = time.perf_counter()
+            highs.changeColBounds(int(column), 0.0, highspy.kHighsInf)
+            highs.run()
+            solutions.append(highs_solution(highs, lp.shape[1], started, warm_start=True))
+            highs.changeColBounds(int(column), 0.0, min(upper[column], highspy.kHighsInf))
+        notify_solve_observers(solutions)
+        return solutions
+
+    for column in columns:
+        released = upper.copy()
+        released[column] = np.inf
+        lp_copy = LinearProgram(lp.recipe_ids, lp.row_names, lp.row_item_ids, lp.indptr, lp.indices, lp.data, lp.h,
+                                lp.c, released)
+        solutions.append(solve_with_cbc(lp_copy))
+    notify_solve_observers(solutions)
+    return solutions
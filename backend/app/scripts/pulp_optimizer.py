@@ -1,213 +1,275 @@
-import json
-from collections import defaultdict
-from decimal import Decimal
+import time
 
 import numpy as np
-import pulp
-from numpy import float128
-
-from app.services.recipe_service import RecipeService
-
-
-def optimizer(recipes, targets):
-    unpackage_recipes = [
-        118,
-        128,
-        159,
-        197,
-        198,
-        199,
-        200,
-        201,
-        219,
-        265,
-        277,
-        293,
-    ]
-    # Assume RecipeService.get_component_recipes_details() provides structured recipe data
-    known_recipes = [int(key) for key, value in recipes.items() if "known" in value and value["known"] is True]
-    excluded_recipes = [int(key) for key, value in recipes.items() if "excluded" in value and value["excluded"] is True]
-    excluded_recipes = [*excluded_recipes, *unpackage_recipes]
-    recipes_overridden_by_preference = [int(recipe_id) for recipe_id, config in recipes.items() if "preferred in config"
-                            and config["preferred"] != recipe_id]
-
-    recipes_detail = RecipeService.get_component_recipes_details()
-    pruned_recipes = [
-        recipe for recipe in recipes_detail
-        if recipe['id'] in known_recipes
-           and recipe['id'] not in excluded_recipes
-           and recipe['id'] not in recipes_overridden_by_preference
+
+from app.profiling import record_span
+from app.scripts.lp_model import build_linear_program, raw_resource_usage_from_scales
+from app.scripts.lp_presolve import presolve_recipes
+from app.scripts.lp_solvers import HighsModel, resolve_backend, solve_lp
+from app.services.recipe_graph_service import RecipeGraphService
+from config import Config
+
+
+# Unpackaging recipes are never part of an optimal production line
+unpackage_recipes = [
+    118,
+    128,
+    159,
+    197,
+    198,
+    199,
+    200,
+    201,
+    219,
+    265,
+    277,
+    293,
+]
+
+# Define raw resources and their global limits.
+# You can adjust these to reflect the actual availability in your world.
+raw_resource_limits = {
+    155: 92100,  # Iron Ore
+    156: 42300,  # Coal
+    157: 1e9,  # Water (just a large number; effectively abundant)
+    158: 12000,  # Nitrogen Gas
+    159: 10800,  # Sulfur *
+    160: 10200,  # Sam Ore
+    161: 12300,  # Bauxite *
+    162: 15000,  # Caterium Ore
+    163: 36900,  # Copper Ore
+    164: 13500,  # Raw Quartz *
+    165: 69900,  # Limestone *
+    166: 2100,  # Uranium
+    167: 12600,  # Crude Oil
+}
+
+
+def effective_recipe_ids(recipes, recipe_graph):
+    """
+    Component recipe ids the LP may use for a user's recipe configuration: known, minus excluded, minus recipes
+    overridden by a preferred alternative, minus the unpackaging blacklist.
+    """
+    known_recipes = {int(key) for key, value in recipes.items() if "known" in value and value["known"] is True}
+    excluded_recipes = {int(key) for key, value in recipes.items() if "excluded" in value and value["excluded"] is True}
+    excluded_recipes = {*excluded_recipes, *unpackage_recipes}
+    recipes_overridden_by_preference = {int(recipe_id) for recipe_id, config in recipes.items() if "preferred in config"
+                            and config["preferred"] != recipe_id}
+
+    return [
+        recipe_id for recipe_id in recipe_graph.component_recipe_ids
+        if recipe_id in known_recipes
+           and recipe_id not in excluded_recipes
+           and recipe_id not in recipes_overridden_by_preference
     ]
 
 
-    # Define raw resources and their global limits.
-    # You can adjust these to reflect the actual availability in your world.
-    raw_resource_limits = {
-        155: 92100,  # Iron Ore
-        156: 42300,  # Coal
-        157: 1e9,  # Water (just a large number; effectively abundant)
-        158: 12000,  # Nitrogen Gas
-        159: 10800,  # Sulfur *
-        160: 10200,  # Sam Ore
-        161: 12300,  # Bauxite *
-        162: 15000,  # Caterium Ore
-        163: 36900,  # Copper Ore
-        164: 13500,  # Raw Quartz *
-        165: 69900,  # Limestone *
-        166: 2100,  # Uranium
-        167: 12600,  # Crude Oil
-    }
+def target_outputs_from_targets(targets):
+    """Map each production target to item id -> required rate."""
+    target_outputs = {}
+    for target in targets:
+        # target['product']['id'] and target['rate'] are assumed keys
+        target_outputs[target['product']['id']] = target['rate']
+    return target_outputs
 
-    raw_resources = set(raw_resource_limits.keys())
+
+def build_models(recipe_graph, pruned_recipe_ids, target_outputs_by_line):
+    """
+    Build one incidence matrix shared by several production lines and a LinearProgram per line. Unless
+    Config.LP_PRESOLVE is off, recipes that cannot be part of an optimal solution for any of the lines are
+    dropped first, so all programs share the same columns.
+
+    :param target_outputs_by_line: Dict of line id -> dict of item id -> target rate.
+    :return: (incidence, dict of line id -> lp, dict of line id -> error message, presolve report or None)
+    """
+    presolve_report = None
+    if Config.LP_PRESOLVE:
+        target_item_ids = {item_id for target_outputs in target_outputs_by_line.values() for item_id in target_outputs}
+        pruned_recipe_ids, presolve_report = presolve_recipes(recipe_graph, pruned_recipe_ids, target_item_ids,
+                                                              raw_resource_limits.keys())
 
     # Calculate cost based on availability: cost = 1 / global_limit.
     # More abundant = lower cost, more scarce = higher cost.
     resource_costs = {rid: (1.0 / limit) for rid, limit in raw_resource_limits.items()}
 
-    # Extract all item IDs involved
-    items = list({
-        item['id']
-        for recipe in pruned_recipes
-        for item in (recipe['ingredients'] + recipe['products'])
-    })
-
-    item_to_index = {item_id: idx for idx, item_id in enumerate(items)}
-    recipe_ids = [recipe['id'] for recipe in pruned_recipes]
-    recipe_to_index = {recipe_id: idx for idx, recipe_id in enumerate(recipe_ids)}
-
-    # Matrix rows: items, columns: recipes
-    # matrix[i, j] > 0 means recipe j produces item i
-    # matrix[i, j] < 0 means recipe j consumes item i
-    matrix = np.zeros((len(items), len(recipe_ids)))
-
-    recipes_struct = {}
-    for recipe in pruned_recipes:
-        r_idx = recipe_to_index[recipe['id']]
-        duration = Decimal(recipe['manufactoring_duration'])  # Incorporate the recipe duration
-        runs_per_minute = Decimal(Decimal(60.0) / duration)
-
-        recipes_struct[recipe['id']] = {
-            "inputs": {ing['id']: int(ing['amount']) for ing in recipe['ingredients']},
-            "outputs": {prod['id']: int(prod['amount']) for prod in recipe['products']}
-        }
-
-        for prod in recipe['products']:
-            i_idx = item_to_index[prod['id']]
-            matrix[i_idx, r_idx] += float128(prod['amount'] * runs_per_minute)
-        for ing in recipe['ingredients']:
-            i_idx = item_to_index[ing['id']]
-            matrix[i_idx, r_idx] -= float128(ing['amount'] * runs_per_minute)
-
-    # Initialize LP problem
-    # We minimize cost of scarce resource usage
-    prob = pulp.LpProblem("Satisfactory_Production_Optimizer", pulp.LpMinimize)
-
-    # Variables: production scale for each recipe
-    recipe_vars = {r_id: pulp.LpVariable(f"scale_{r_id}", lowBound=0) for r_id in recipe_ids}
-
-    # Parse target outputs
-    target_outputs = {}
-    for target in targets:
-        # target['product']['id'] and target['rate'] are assumed keys
-        target_outputs[target['product']['id']] = target['rate']
-
-    # Target output constraints
-    for item_id, required_scale in target_outputs.items():
-        i_idx = item_to_index[item_id]
-        prob += (
-            pulp.lpSum(matrix[i_idx, recipe_to_index[rid]] * recipe_vars[rid] for rid in recipe_ids) >= required_scale,
-            f"Target_output_{item_id}"
-        )
-
-    # Flow constraints for intermediate items: They should not be net negative.
-    # This means the production of these items is at least 0.
-    # If you find you need stricter constraints (like exact balances), you could do:
-    # == 0 for items that should have no net surplus/deficit.
-    for item_id in items:
-        if item_id not in target_outputs and item_id not in raw_resources:
-            i_idx = item_to_index[item_id]
-            prob += (
-                pulp.lpSum(matrix[i_idx, recipe_to_index[rid]] * recipe_vars[rid] for rid in recipe_ids) >= 0,
-                f"Flow_balance_{item_id}"
-            )
-
-    # Raw resource constraints: Cannot exceed the limit.
-    # Remember that matrix[i, j] is negative for inputs, so summation is negative when consuming.
-    # We want sum(...) >= -limit, which ensures consumption <= limit.
-    for raw_id, max_amount in raw_resource_limits.items():
-        i_idx = item_to_index[raw_id]
-        prob += (
-            pulp.lpSum(matrix[i_idx, recipe_to_index[rid]] * recipe_vars[rid] for rid in recipe_ids) >= -max_amount,
-            f"Raw_resource_limit_{raw_id}"
-        )
+    # Sparse item x recipe incidence: only the nonzero flow rates of each recipe are stored
+    incidence = recipe_graph.incidence_matrix(pruned_recipe_ids)
 
     handling_fee = 1e-6  # example small fee
 
     # Objective: Minimize weighted resource usage.
-    # We sum over all raw resources the consumed amount * resource_cost.
-    # matrix[i,j]<0 means consumption of that resource.
-    # Multiply by -1 to get positive consumption.
-    # Then multiply by resource_costs to weight scarcity.
     # The solver will try to minimize the total cost, preferring cheap (abundant) resources over expensive (scarce) ones.
-    prob += pulp.lpSum(
-        (-matrix[item_to_index[raw_id], recipe_to_index[rid]] * recipe_vars[rid] * resource_costs[raw_id])
-        for raw_id in raw_resources
-        for rid in recipe_ids
-        if matrix[item_to_index[raw_id], recipe_to_index[rid]] < 0
-    ) + pulp.lpSum(handling_fee * recipe_vars[rid] for rid in recipe_ids), "Minimize_Total_Cost"
-
-    # Solve
-    prob.solve()
-    # prob.solve(pulp.PULP_CBC_CMD(msg=True, gapRel=1e-9))
-
-    # Build result
-    production_line = {}
-    raw_resource_usage = defaultdict(float)
-    r_ids = [r_id for r_id, var in recipe_vars.items()]
-
-    significance = 1e-6
-    significant_r_ids = [r_id for r_id, var in recipe_vars.items() if var.value() and var.value() > significance]
-    recipe_details = RecipeService.get_recipe_by_id_detail(significant_r_ids)
+    lps, errors = {}, {}
+    for line, target_outputs in target_outputs_by_line.items():
+        try:
+            lps[line] = build_linear_program(incidence, target_outputs, raw_resource_limits, resource_costs,
+                                             handling_fee)
+        except ValueError as e:
+            errors[line] = str(e)
+    return incidence, lps, errors, presolve_report
+
+
+def build_model(recipe_graph, pruned_recipe_ids, target_outputs):
+    """
+    Build the incidence matrix and the LinearProgram for a set of recipes and target outputs.
+
+    :return: (incidence, lp, presolve report or None)
+    """
+    incidence, lps, errors, presolve_report = build_models(recipe_graph, pruned_recipe_ids, {None: target_outputs})
+    if errors:
+        raise ValueError(errors[None])
+    return incidence, lps[None], presolve_report
+
+
+def sensitivity_report(lp, solution, target_outputs):
+    """
+    Shadow prices, right-hand side ranges and reduced costs of a solved production LP.
+
+    - raw_resources: marginal_value is how much the objective drops per extra unit of the limit; it holds while
+      the limit stays within limit_range. A resource is binding when its whole limit is used.
+    - targets: marginal_cost is how much the objective rises per extra unit of the target rate, valid while the
+      rate stays within rate_range.
+    - reduced_costs: per recipe, how much the objective rises per unit of scale forced into the solution (0 for
+      recipes in use).
+
+    Ranges are only reported by the HiGHS backend.
+    """
+    def bound(value):
+        return float(value) + 0.0 if np.isfinite(value) else None
+
+    activity = np.zeros(lp.shape[0])
+    for row in range(lp.shape[0]):
+        start, end = lp.indptr[row], lp.indptr[row + 1]
+        activity[row] = np.dot(lp.data[start:end], solution.x[lp.indices[start:end]])
+
+    raw_resources, targets = [], []
+    for row, (name, item_id) in enumerate(zip(lp.row_names, lp.row_item_ids)):
+        binding = bool(activity[row] - lp.h[row] <= 1e-7 * max(1.0, abs(lp.h[row])))
+        # + 0.0 turns the solver's -0.0 into 0.0
+        dual = float(solution.row_duals[row]) + 0.0 if binding else 0.0
+        lower, upper = None, None
+        if not binding:
+            # A slack row keeps its zero dual until the right-hand side reaches the row's activity
+            lower, upper = -np.inf, activity[row]
+        elif solution.rhs_ranging is not None:
+            lower, upper = solution.rhs_ranging[0][row], solution.rhs_ranging[1][row]
+
+        if name.startswith('Raw_resource_limit_'):
+            # The row is net flow >= -limit, so the limit range is the negated right-hand side range
+            raw_resources.append({
+                'item_id': item_id,
+                'limit': -float(lp.h[row]),
+                'usage': max(0.0, -float(activity[row])),
+                'binding': binding,
+                'marginal_value': dual,
+                'limit_range': [bound(-upper), bound(-lower)] if lower is not None else None,
+            })
+        elif name.startswith('Target_output_'):
+            targets.append({
+                'item_id': item_id,
+                'rate': target_outputs[item_id],
+                'marginal_cost': dual,
+                'rate_range': [bound(lower), bound(upper)] if lower is not None else None,
+            })
+
+    return {
+        'raw_resources': raw_resources,
+        'targets': targets,
+        'reduced_costs': {r_id: float(cost) + 0.0 for r_id, cost in zip(lp.recipe_ids, solution.reduced_costs)},
+    }
 
-    for r_id, var in recipe_vars.items():
-        val = var.value()
-        if val and val > significance:
-            scale = val
 
-            recipe_data = next((recipe for recipe in recipe_details if recipe["id"] == r_id), None)
-            print("got recipe data structured ", recipe_data['display_name'])
+def assemble_result(recipe_graph, incidence, target_outputs, solution, presolve_report=None, lp=None):
+    """
+    Turn the recipe scales of a solution into the production line payload returned to the frontend. When the
+    LinearProgram is given and the solution carries duals, a 'sensitivity' report is included.
+    """
+    production_line = {}
 
-            production_line[r_id] = {"recipe_data": recipe_data, "scale": scale}
+    significance = 1e-6
+    scales = solution.x
+    significant_r_ids = [r_id for r_id, scale in zip(incidence.recipe_ids, scales) if scale > significance]
+    for r_id in significant_r_ids:
+        scale = float(scales[incidence.recipe_to_index[r_id]])
+        production_line[r_id] = {"recipe_data": recipe_graph.recipe_details_by_id.get(r_id), "scale": scale}
 
     # Calculate Raw Resource Usage
-    raw_resource_usage = defaultdict(float)
-
-    for iid in raw_resources:
-        i_idx = item_to_index[iid]
-        net_flow = 0.0
-        for r_id, var in recipe_vars.items():
-            val = var.value()
-            if val and val > significance:
-                r_idx = recipe_to_index[r_id]
-                # matrix[i_idx, r_idx] is the per-machine net rate (positive = produce, negative = consume)
-                # Multiply by 'val' (number of machines) to get the total net flow for this item from this recipe.
-                net_flow += matrix[i_idx, r_idx] * val
-
-        # If net_flow is negative, we have a net consumption of that resource from outside:
-        if net_flow < -1e-6:
-            # Convert negative to positive quantity, as we list the external requirement
-            raw_resource_usage[iid] = -net_flow
-        # If net_flow >= 0, it means we're balanced or producing a surplus. We don't need external supply of that resource.
-
-    print("before compiling result")
+    raw_resource_usage = raw_resource_usage_from_scales(incidence, set(raw_resource_limits.keys()), scales)
+
     result = {
         "target_output": [{"item_id": iid, "amount": rt} for iid, rt in target_outputs.items()],
         "production_line": production_line,
         "raw_resource_usage": [{"item_id": iid, "total_quantity": round(q, 3)} for iid, q in raw_resource_usage.items() if
-                               q > 1e-6]
+                               q > 1e-6],
+        "solver": solution.to_dict(),
     }
+    if presolve_report is not None:
+        result["presolve"] = presolve_report.to_dict()
+    if lp is not None and solution.row_duals is not None:
+        result["sensitivity"] = sensitivity_report(lp, solution, target_outputs)
+    return result
+
+
+def optimizer(recipes, targets, recipe_graph=None, progress=None, backend=None, model_slot=None):
+    """
+    Solve for the cheapest set of recipe scales that meets the production targets.
+
+    :param recipes: The user's recipe configuration, keyed by recipe id.
+    :param targets: Production targets, each with a 'product' dict and a 'rate'.
+    :param recipe_graph: Snapshot to build the model from; defaults to the current one.
+    :param progress: Optional callback progress(phase, duration) invoked as model_build (or model_update), solve
+                     and result_assembly complete, with the phase's duration in seconds.
+    :param backend: LP solver backend ('highs' or 'cbc'); defaults to Config.LP_SOLVER_BACKEND.
+    :param model_slot: Optional ModelSlot holding the line's compiled model from a previous solve. When only the
+                       target rates changed since then, its right-hand side is updated and the model re-solved
+                       from the last optimal basis; otherwise a new model is compiled into the slot. Used with
+                       the 'highs' backend only.
+    """
+    def report(phase, started):
+        duration = time.perf_counter() - started
+        record_span(phase, duration)
+        if progress is not None:
+            progress(phase, duration)
+
+    phase_started = time.perf_counter()
+    # The recipe graph snapshot provides structured recipe data without touching the database
+    recipe_graph = recipe_graph or RecipeGraphService.get_graph()
+    pruned_recipe_ids = effective_recipe_ids(recipes, recipe_graph)
+
+    # Parse target outputs
+    target_outputs = target_outputs_from_targets(targets)
+
+    if model_slot is not None and resolve_backend(backend) == 'highs':
+        # Everything but the target rates determines the LP's structure
+        structure_key = (recipe_graph.version, tuple(pruned_recipe_ids), tuple(target_outputs))
+        model = model_slot.model
+        if model is not None and model.structure_key == structure_key:
+            h = model.h.copy()
+            h[:len(target_outputs)] = list(target_outputs.values())
+            model.update_rhs(h)
+            report('model_update', phase_started)
+        else:
+            incidence, lp, presolve_report = build_model(recipe_graph, pruned_recipe_ids, target_outputs)
+            model = model_slot.model = HighsModel(lp, structure_key, context=(incidence, presolve_report))
+            report('model_build', phase_started)
+        incidence, presolve_report = model.context
+
+        lp = model.lp
+
+        phase_started = time.perf_counter()
+        solution = model.solve(ranging=True)
+    else:
+        incidence, lp, presolve_report = build_model(recipe_graph, pruned_recipe_ids, target_outputs)
+        report('model_build', phase_started)
+
+        phase_started = time.perf_counter()
+        solution = solve_lp(lp, backend, ranging=True)
+    report('solve', phase_started)
+    phase_started = time.perf_counter()
+
+    result = assemble_result(recipe_graph, incidence, target_outputs, solution, presolve_report, lp)
 
-    print("after compiling result")
     # result_json = json.dumps(result, indent=4)
+    report('result_assembly', phase_started)
 
     return result
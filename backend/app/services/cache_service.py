@@ -1,15 +1,111 @@
+import hashlib
+import json
+import threading
+
+from cachetools import TTLCache
+
+from config import Config
+
+
+class SolutionTagIndex(TTLCache):
+    """
+    Tag -> cache keys stored under it, bounded like the solution cache. A tag expires with the newest entry stored
+    under it; a tag evicted to make room drops its entries too, so a save can never miss one of them.
+    """
+
+    def popitem(self):
+        tag, keys = super().popitem()
+        for key in keys:
+            solution_cache.pop(key, None)
+        return tag, keys
+
+
+# Solved production lines, LRU-evicted once SOLUTION_CACHE_MAXSIZE is reached and expired after SOLUTION_CACHE_TTL
+solution_cache = TTLCache(maxsize=Config.SOLUTION_CACHE_MAXSIZE, ttl=Config.SOLUTION_CACHE_TTL)
+# Tag (e.g. "user:<key>") -> cache keys stored under it, so a save only drops the entries it affects
+solution_cache_tags = SolutionTagIndex(maxsize=Config.SOLUTION_CACHE_MAXSIZE, ttl=Config.SOLUTION_CACHE_TTL)
+solution_cache_stats = {'hits': 0, 'misses': 0}
+solution_cache_lock = threading.Lock()
+
+
 class CacheService:
+    @staticmethod
+    def solution_key(recipe_ids, blacklist, target_outputs, raw_resource_limits, data_version) -> str:
+        """
+        Canonical digest of everything that determines an optimizer result. Ids and rates are sorted so equivalent
+        inputs hash the same regardless of the order they arrive in.
+
+        :param recipe_ids: Effective recipe ids (known, minus excluded, minus overridden by preference).
+        :param blacklist: Recipe ids that are always excluded (unpackaging recipes).
+        :param target_outputs: Dict of item id -> target rate.
+        :param raw_resource_limits: Dict of raw resource item id -> limit.
+        :param data_version: Game data version the recipe graph was built from.
+        """
+        canonical = {
+            'data_version': data_version,
+            'recipes': sorted(int(recipe_id) for recipe_id in recipe_ids),
+            'blacklist': sorted(int(recipe_id) for recipe_id in blacklist),
+            'targets': sorted([int(item_id), float(rate)] for item_id, rate in target_outputs.items()),
+            'raw_resource_limits': sorted([int(item_id), float(limit)] for item_id, limit in raw_resource_limits.items()),
+        }
+        encoded = json.dumps(canonical, separators=(',', ':')).encode('utf-8')
+        return hashlib.sha256(encoded).hexdigest()
+
     @staticmethod
     def get_cached_result(key):
-        # Retrieved the result from in-memory cache (e.g. Redis) based on the key
-        pass
+        """Return the cached result for key, or None. Every lookup counts as a hit or a miss."""
+        with solution_cache_lock:
+            result = solution_cache.get(key)
+            solution_cache_stats['hits' if result is not None else 'misses'] += 1
+            return result
 
     @staticmethod
-    def set_cached_result(key, result, expires=3600):
-        # Cache result with an expiration time
-        pass
+    def set_cached_result(key, result, tags=()):
+        """
+        Cache result under key. Tags name the owners of the entry (a user, a user's production line) so
+        invalidate_tag can drop only the entries a save affects.
+        """
+        with solution_cache_lock:
+            solution_cache[key] = result
+            for tag in tags:
+                keys = solution_cache_tags.get(tag, set())
+                keys.add(key)
+                if len(keys) > solution_cache.maxsize:
+                    # Forget keys the LRU/TTL policy already evicted
+                    keys = {k for k in keys if k in solution_cache}
+                # Reassigned rather than updated in place, to restart the tag's time to live
+                solution_cache_tags[tag] = keys
 
     @staticmethod
     def invalidate_cache(key):
         # Remove a specific key from the cache
-        pass
+        with solution_cache_lock:
+            solution_cache.pop(key, None)
+
+    @staticmethod
+    def invalidate_tag(tag):
+        """Remove every entry stored under tag."""
+        with solution_cache_lock:
+            for key in solution_cache_tags.pop(tag, set()):
+                solution_cache.pop(key, None)
+
+    @staticmethod
+    def user_tag(user_key):
+        return f"user:{user_key}"
+
+    @staticmethod
+    def line_tag(user_key, line):
+        return f"line:{user_key}:{line}"
+
+    @staticmethod
+    def get_stats():
+        with solution_cache_lock:
+            lookups = solution_cache_stats['hits'] + solution_cache_stats['misses']
+            return {
+                'size': len(solution_cache),
+                'maxsize': solution_cache.maxsize,
+                'ttl': solution_cache.ttl,
+                'hits': solution_cache_stats['hits'],
+                'misses': solution_cache_stats['misses'],
+                'hit_ratio': solution_cache_stats['hits'] / lookups if lookups else 0.0,
+            }
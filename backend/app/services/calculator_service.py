@@ -7,12 +7,258 @@ and BuildingService.fetchData.
 in most cases, there's no immediate need to create an instance of the service class. Static methods allow you to use the
 service without instantiating it.
 """
-from app.services.configuration_service import ConfigurationService
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from app.scripts.lp_model import stack_linear_programs, raw_resource_usage_from_scales
+from app.scripts.lp_solvers import LPSolution, notify_solve_observers, solve_lp, solve_many, solve_column_releases
+from app.scripts.pulp_optimizer import optimizer, effective_recipe_ids, target_outputs_from_targets, \
+    unpackage_recipes, raw_resource_limits, build_models, assemble_result
+from app.services.cache_service import CacheService
+from app.services.job_service import JobQueue, JobStore
+from app.services.model_cache_service import ModelCacheService
+from app.services.recipe_graph_service import RecipeGraphService
+from config import Config
+
+calculator_jobs = JobQueue(
+    'calculator',
+    max_workers=Config.CALCULATOR_JOB_WORKERS,
+    max_pending=Config.CALCULATOR_JOB_MAX_PENDING,
+    result_ttl=Config.CALCULATOR_JOB_RESULT_TTL,
+    # Jobs are looked up and coalesced across the server's worker processes
+    store=JobStore('calculator', stale_after=Config.CALCULATOR_JOB_RESULT_TTL),
+)
+
+# Solver processes for batch requests, started on first use
+_batch_pool = None
+_batch_pool_lock = threading.Lock()
+
+
+def batch_pool():
+    global _batch_pool
+    if Config.CALCULATOR_BATCH_PROCESSES <= 1:
+        return None
+    with _batch_pool_lock:
+        if _batch_pool is None:
+            # spawn: the worker processes must not inherit the locks of the request and job threads
+            _batch_pool = ProcessPoolExecutor(max_workers=Config.CALCULATOR_BATCH_PROCESSES,
+                                              mp_context=multiprocessing.get_context('spawn'))
+        return _batch_pool
 
 
 class CalculatorService:
     @staticmethod
-    def calculate_production_for_user(user_key, targets):
-        # Load configuration
-        config = ConfigurationService.load_user_configuration(user_key)
+    def solution_key(recipes, targets, recipe_graph):
+        """Cache key of the optimizer result for a recipe configuration and a list of production targets."""
+        return CacheService.solution_key(
+            effective_recipe_ids(recipes, recipe_graph),
+            unpackage_recipes,
+            target_outputs_from_targets(targets),
+            raw_resource_limits,
+            recipe_graph.version,
+        )
+
+    @staticmethod
+    def solve_production_line(user_key, line, recipes, targets, progress=None):
+        """
+        Optimize a production line, serving repeated requests for the same effective recipe set and targets from
+        the solution cache. The returned dict carries a 'cache' entry with the key and whether it was a hit.
+        progress is passed on to the optimizer to report its phases.
+
+        On a cache miss the line's compiled model is reused when only target rates changed, so rate edits are
+        re-solved from the previous optimal basis.
+        """
+        recipe_graph = RecipeGraphService.get_graph()
+        key = CalculatorService.solution_key(recipes, targets, recipe_graph)
+
+        cached_solution = CacheService.get_cached_result(key)
+        if cached_solution is not None:
+            if progress is not None:
+                progress('cache_hit')
+            return {**cached_solution, 'cache': {'hit': True, 'key': key}}
+
+        with ModelCacheService.checkout(user_key, line) as model_slot:
+            solution = optimizer(recipes, targets, recipe_graph, progress=progress, model_slot=model_slot)
+        CacheService.set_cached_result(key, solution, tags=(
+            CacheService.user_tag(user_key),
+            CacheService.line_tag(user_key, line),
+        ))
+        return {**solution, 'cache': {'hit': False, 'key': key}}
+
+    @staticmethod
+    def submit_production_line_job(user_key, line, recipes, targets):
+        """
+        Queue solve_production_line on the calculator worker pool. Identical requests (same solution key) that are
+        still queued or running share one job.
+
+        :return: (job, coalesced)
+        """
+        key = CalculatorService.solution_key(recipes, targets, RecipeGraphService.get_graph())
+        return calculator_jobs.submit(
+            lambda job: CalculatorService.solve_production_line(user_key, line, recipes, targets, progress=job.report),
+            key=key,
+            description=f"Optimize production line {line}",
+        )
+
+    @staticmethod
+    def get_job(job_id):
+        return calculator_jobs.get(job_id)
+
+    @staticmethod
+    def solve_production_lines(user_key, recipes, production_lines, joint=False):
+        """
+        Optimize several production lines of one user together. The lines share one recipe snapshot, one presolve
+        and one incidence matrix; lines missing from the solution cache are solved in parallel on the batch pool.
+
+        :param production_lines: Production line dicts as returned by ConfigurationService.load_production_lines.
+        :param joint: Also solve all lines as one program in which they compete for the global raw resource limits.
+        :return: {'lines': {line id: result or {'error': ...}}, 'joint': ...} ('joint' only when requested).
+        """
+        recipe_graph = RecipeGraphService.get_graph()
+        recipe_ids = effective_recipe_ids(recipes, recipe_graph)
+
+        results, keys, target_outputs_by_line = {}, {}, {}
+        for production_line in production_lines:
+            line = production_line['id']
+            targets = production_line.get('production_targets') or []
+            if not targets:
+                results[line] = {'error': 'no production targets in production line'}
+                continue
+            target_outputs_by_line[line] = target_outputs_from_targets(targets)
+            keys[line] = CalculatorService.solution_key(recipes, targets, recipe_graph)
+
+            cached_solution = CacheService.get_cached_result(keys[line])
+            if cached_solution is not None:
+                results[line] = {**cached_solution, 'cache': {'hit': True, 'key': keys[line]}}
+
+        to_solve = [line for line in target_outputs_by_line if line not in results]
+        if not to_solve and not joint:
+            return {'lines': results}
+
+        incidence, lps, errors, presolve_report = build_models(recipe_graph, recipe_ids, target_outputs_by_line)
+        for line, error in errors.items():
+            results[line] = {'error': error}
+        to_solve = [line for line in to_solve if line in lps]
+
+        solutions = solve_many([lps[line] for line in to_solve], executor=batch_pool(), ranging=True)
+        for line, lp_solution in zip(to_solve, solutions):
+            solution = assemble_result(recipe_graph, incidence, target_outputs_by_line[line], lp_solution,
+                                       presolve_report, lps[line])
+            CacheService.set_cached_result(keys[line], solution, tags=(
+                CacheService.user_tag(user_key),
+                CacheService.line_tag(user_key, line),
+            ))
+            results[line] = {**solution, 'cache': {'hit': False, 'key': keys[line]}}
+
+        response = {'lines': results}
+        if joint and lps:
+            response['joint'] = CalculatorService.solve_joint(recipe_graph, incidence, lps, target_outputs_by_line,
+                                                              presolve_report)
+        return response
+
+    @staticmethod
+    def solve_joint(recipe_graph, incidence, lps, target_outputs_by_line, presolve_report):
+        """Solve the lines' programs stacked into one, sharing the raw resource limit rows."""
+        lines = list(lps)
+        joint_lp = stack_linear_programs([lps[line] for line in lines], set(raw_resource_limits))
+        joint_solution = solve_lp(joint_lp)
+
+        n_cols = len(incidence.recipe_ids)
+        line_results = {}
+        for block, line in enumerate(lines):
+            x = joint_solution.x[block * n_cols:(block + 1) * n_cols]
+            line_solution = LPSolution(joint_solution.status, x, None, joint_solution.backend,
+                                       joint_solution.solve_time)
+            line_results[line] = assemble_result(recipe_graph, incidence, target_outputs_by_line[line],
+                                                 line_solution, presolve_report)
+
+        total_scales = joint_solution.x.reshape(len(lines), n_cols).sum(axis=0)
+        raw_resource_usage = raw_resource_usage_from_scales(incidence, set(raw_resource_limits), total_scales)
+        return {
+            'lines': line_results,
+            'raw_resource_usage': [{"item_id": iid, "total_quantity": round(q, 3)}
+                                   for iid, q in raw_resource_usage.items() if q > 1e-6],
+            'solver': joint_solution.to_dict(),
+        }
+
+    @staticmethod
+    def rank_alternates(recipes, targets):
+        """
+        Rank every alternate recipe the user has not unlocked by how much unlocking it alone would lower the
+        objective of a production line.
+
+        The base model contains the candidates as columns fixed at 0. A candidate whose reduced cost in the base
+        optimum is not negative cannot improve it (the base solution stays optimal with the column released), so
+        only the others get a what-if solve. Those solves are spread over the batch pool, each worker compiling the
+        base model once and re-solving from the previous basis for every candidate in its chunk.
+
+        :return: Dict with the base objective, the ranking (best first) and how many candidates were skipped.
+        """
+        recipe_graph = RecipeGraphService.get_graph()
+        known_ids = set(effective_recipe_ids(recipes, recipe_graph))
+        candidate_ids = {
+            int(recipe_id) for recipe_id, config in recipes.items()
+            if int(recipe_id) in recipe_graph.alternate_recipe_ids
+               and not config.get('known') and not config.get('excluded')
+               and int(recipe_id) not in unpackage_recipes
+        }
+        recipe_ids = [recipe_id for recipe_id in recipe_graph.component_recipe_ids
+                      if recipe_id in known_ids or recipe_id in candidate_ids]
+
+        target_outputs = target_outputs_from_targets(targets)
+        incidence, lps, errors, presolve_report = build_models(recipe_graph, recipe_ids, {None: target_outputs})
+        if errors:
+            raise ValueError(errors[None])
+        lp = lps[None]
+        candidate_columns = [column for column, recipe_id in enumerate(lp.recipe_ids) if recipe_id in candidate_ids]
+        lp.upper = np.full(len(lp.recipe_ids), np.inf)
+        lp.upper[candidate_columns] = 0.0
+
+        base = solve_lp(lp)
+        if not base.is_optimal:
+            raise ValueError(f"The production line cannot be solved with the known recipes ({base.status}).")
+
+        # Reduced cost >= 0: releasing the column leaves the base optimum optimal
+        to_solve = [column for column in candidate_columns if base.reduced_costs[column] < -1e-12]
+        skipped = sorted(set(candidate_columns) - set(to_solve))
+
+        pool = batch_pool()
+        if pool is None or len(to_solve) <= 1:
+            solutions = solve_column_releases(lp, to_solve)
+        else:
+            chunks = [chunk for chunk in np.array_split(to_solve, Config.CALCULATOR_BATCH_PROCESSES) if len(chunk)]
+            solutions = [solution for chunk_solutions in pool.map(solve_column_releases, [lp] * len(chunks), chunks)
+                         for solution in chunk_solutions]
+            notify_solve_observers(solutions)
+
+        def entry(column, objective):
+            recipe_id = lp.recipe_ids[column]
+            improvement = base.objective - objective
+            return {
+                'recipe_id': recipe_id,
+                'display_name': recipe_graph.recipe_details_by_id[recipe_id].get('display_name'),
+                'objective': objective,
+                'improvement': improvement,
+                'improvement_pct': 100 * improvement / base.objective if base.objective else 0.0,
+                'reduced_cost': float(base.reduced_costs[column]),
+            }
+
+        ranking = [entry(column, solution.objective if solution.is_optimal else base.objective)
+                   for column, solution in zip(to_solve, solutions)]
+        ranking += [entry(column, base.objective) for column in skipped]
+        ranking.sort(key=lambda candidate: -candidate['improvement'])
 
+        # Candidates the presolve dropped cannot contribute to this line at all
+        dropped = candidate_ids - set(lp.recipe_ids)
+        return {
+            'base_objective': base.objective,
+            'candidates': len(candidate_ids),
+            'solved': len(to_solve),
+            'skipped_by_reduced_cost': len(skipped),
+            'skipped_by_presolve': len(dropped),
+            'ranking': ranking,
+            'presolve': presolve_report.to_dict() if presolve_report is not None else None,
+        }
@@ -0,0 +1,256 @@
+"""
+./app/services/config_cache_service.py
+Cache of user configurations (recipe configs and production lines) shared by every worker process.
+
+Entries are keyed by a per-user generation counter stored in the same backend:
+
+    config:<kind>:<user key>:d<data version>:g<generation>:<part>
+
+A save bumps the generation instead of deleting entries, so every worker sharing the backend stops reading the
+old entries at once, and a load that read the generation before a concurrent save writes its (stale) result under a
+key nobody looks up anymore. Old entries simply expire.
+
+Backends (Config.CONFIG_CACHE_BACKEND):
+- 'memory': a TTLCache in this process; invalidation does not reach other workers.
+- 'sqlite': a SQLite file shared by the workers of one host (Config.CONFIG_CACHE_URL is the file path).
+- 'redis': any client with Redis' get/set/incr (Config.CONFIG_CACHE_URL is the Redis URL; needs the redis package).
+"""
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from cachetools import TTLCache
+
+from app.services.recipe_graph_service import RecipeGraphService
+from config import Config
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - depends on the deployment
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+CONFIG_CACHE_BACKENDS = ('memory', 'sqlite', 'redis')
+
+
+class GenerationCounters(TTLCache):
+    """
+    Generation counters of the in-process cache. A counter dropped to make room takes the entries of its kind and user
+    along, so a generation that restarts at 0 never reads an entry written under the old one.
+    """
+
+    def __init__(self, maxsize, ttl, entries):
+        super().__init__(maxsize=maxsize, ttl=ttl)
+        self.entries = entries
+
+    def popitem(self):
+        key, generation = super().popitem()
+        prefix = key[:-len('generation')]
+        for entry_key in [entry_key for entry_key in self.entries if entry_key.startswith(prefix)]:
+            self.entries.pop(entry_key, None)
+        return key, generation
+
+
+class MemoryCacheBackend:
+    name = 'memory'
+
+    def __init__(self, maxsize, ttl):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        # Generations must outlive the entries written under them: a counter's time to live restarts on every read
+        # and is twice the entries', covering a store that follows its lookup
+        self.counters = GenerationCounters(maxsize=maxsize, ttl=2 * ttl, entries=self.entries)
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            return self.entries.get(key)
+
+    def set(self, key, value, ttl):
+        # The TTL is fixed per cache; ttl only matters for the shared backends
+        with self.lock:
+            self.entries[key] = value
+
+    def get_counter(self, key):
+        with self.lock:
+            generation = self.counters.get(key)
+            if generation is None:
+                return 0
+            self.counters[key] = generation
+            return generation
+
+    def incr(self, key):
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+            return self.counters[key]
+
+
+class SQLiteCacheBackend:
+    """One connection per thread on a WAL-mode file; writers of all processes are serialized by SQLite."""
+    name = 'sqlite'
+    # Purge expired rows every this many writes
+    PURGE_INTERVAL = 500
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        self.writes = 0
+        with self.connection() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS config_cache "
+                         "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)")
+
+    def connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, key):
+        row = self.connection().execute(
+            "SELECT value FROM config_cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, key, value, ttl):
+        conn = self.connection()
+        conn.execute("INSERT OR REPLACE INTO config_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                     (key, value, time.time() + ttl))
+        self.writes += 1
+        if self.writes % self.PURGE_INTERVAL == 0:
+            conn.execute("DELETE FROM config_cache WHERE expires_at <= ?", (time.time(),))
+
+    def get_counter(self, key):
+        value = self.get(key)
+        return int(value) if value is not None else 0
+
+    def incr(self, key):
+        row = self.connection().execute(
+            "INSERT INTO config_cache (key, value, expires_at) VALUES (?, '1', NULL) "
+            "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1 RETURNING value",
+            (key,)).fetchone()
+        return int(row[0])
+
+
+class RedisCacheBackend:
+    """Works with redis.Redis or any stand-in exposing get, set(ex=) and incr."""
+    name = 'redis'
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        value = self.client.get(key)
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, ex=max(1, int(ttl)))
+
+    def get_counter(self, key):
+        value = self.client.get(key)
+        return int(value) if value is not None else 0
+
+    def incr(self, key):
+        return int(self.client.incr(key))
+
+
+def create_backend(name=None, url=None):
+    """Create the configured backend, falling back to the in-process cache when it cannot be used."""
+    name = (name or Config.CONFIG_CACHE_BACKEND).lower()
+    url = url if url is not None else Config.CONFIG_CACHE_URL
+    if name not in CONFIG_CACHE_BACKENDS:
+        raise ValueError(f"Unknown config cache backend '{name}', expected one of {', '.join(CONFIG_CACHE_BACKENDS)}.")
+    if name == 'sqlite':
+        return SQLiteCacheBackend(url or os.path.join(tempfile.gettempdir(), 'config_cache.sqlite'))
+    if name == 'redis':
+        if redis is not None and url:
+            return RedisCacheBackend(redis.Redis.from_url(url))
+        logger.warning("Redis config cache needs the redis package and CONFIG_CACHE_URL, falling back to memory.")
+    return MemoryCacheBackend(Config.CONFIG_CACHE_MAXSIZE, Config.CONFIG_CACHE_TTL)
+
+
+_backend = None
+_backend_lock = threading.Lock()
+config_cache_stats = {'hits': 0, 'misses': 0, 'errors': 0}
+
+
+class ConfigCacheService:
+    RECIPES = 'recipes'
+    LINES = 'lines'
+
+    @staticmethod
+    def get_backend():
+        global _backend
+        if _backend is None:
+            with _backend_lock:
+                if _backend is None:
+                    _backend = create_backend()
+        return _backend
+
+    @staticmethod
+    def set_backend(backend):
+        """Replace the backend (e.g. with a stand-in in tests). None recreates the configured one on next use."""
+        global _backend
+        with _backend_lock:
+            _backend = backend
+
+    @staticmethod
+    def generation_key(kind, user_key):
+        return f"config:{kind}:{user_key}:generation"
+
+    @staticmethod
+    def lookup(kind, user_key, part=''):
+        """
+        Look up a cached configuration.
+
+        :return: (value or None, key) - on a miss, pass key to store() once the value is loaded. The key pins the
+                 generation read here, so a save in between makes the stored value unreachable rather than stale.
+        """
+        backend = ConfigCacheService.get_backend()
+        try:
+            generation = backend.get_counter(ConfigCacheService.generation_key(kind, user_key))
+            data_version = RecipeGraphService.get_graph().version
+            key = f"config:{kind}:{user_key}:d{data_version}:g{generation}:{part}"
+            value = backend.get(key)
+        except Exception as e:
+            # The cache is an optimization; a broken backend must not fail the request
+            logger.warning(f"Config cache lookup failed: {e}")
+            config_cache_stats['errors'] += 1
+            return None, None
+        config_cache_stats['hits' if value is not None else 'misses'] += 1
+        return (json.loads(value) if value is not None else None), key
+
+    @staticmethod
+    def store(key, value):
+        if key is None:
+            return
+        try:
+            ConfigCacheService.get_backend().set(key, json.dumps(value, separators=(',', ':')), Config.CONFIG_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Config cache store failed: {e}")
+            config_cache_stats['errors'] += 1
+
+    @staticmethod
+    def invalidate(kind, user_key):
+        """Drop every cached entry of this kind for the user, in every process sharing the backend."""
+        try:
+            ConfigCacheService.get_backend().incr(ConfigCacheService.generation_key(kind, user_key))
+        except Exception as e:
+            logger.error(f"Config cache invalidation failed for user {user_key}: {e}")
+            config_cache_stats['errors'] += 1
+
+    @staticmethod
+    def get_stats():
+        lookups = config_cache_stats['hits'] + config_cache_stats['misses']
+        return {
+            'backend': ConfigCacheService.get_backend().name,
+            'ttl': Config.CONFIG_CACHE_TTL,
+            **config_cache_stats,
+            'hit_ratio': config_cache_stats['hits'] / lookups if lookups else 0.0,
+        }
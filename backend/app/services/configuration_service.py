@@ -1,74 +1,69 @@
 import logging
 
-from cachetools import TTLCache
+from sqlalchemy import delete, or_, select
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.models import UserRecipeConfig, UserProductionLine, ProductionLineTarget, Item
+from app.services.cache_service import CacheService
+from app.services.config_cache_service import ConfigCacheService
 from app.services.item_service import ItemService
-from app.services.recipe_service import RecipeService
+from app.services.recipe_graph_service import RecipeGraphService
 from app.services.service_utils import ServiceUtils
 from app.services.user_service import UserService
-from app.utils import get_session
+from app.utils import dialect_insert, get_session
 
-user_config_cache = TTLCache(maxsize=1000, ttl=300)
 logger = logging.getLogger(__name__)
 
+# Columns of UserRecipeConfig a user may change
+CONFIGURABLE_RECIPE_COLUMNS = ('known', 'excluded', 'preferred')
+
 
 class UserNotFoundError(Exception):
     pass
 
 
 class ConfigurationService:
+    @staticmethod
+    def default_recipe_config(recipe_id):
+        """Configuration of a recipe the user never changed. Rows equal to it are not stored."""
+        return {'id': recipe_id, 'known': True, 'excluded': False, 'preferred': recipe_id}
+
     @staticmethod
     def load_user_configuration(user_key):
-        # Check the cache first
-        if user_key in user_config_cache:
-            return user_config_cache[user_key]
+        # Check the cache first. Configs are cached as a list: JSON object keys would turn the recipe ids into strings
+        cached, cache_key = ConfigCacheService.lookup(ConfigCacheService.RECIPES, user_key)
+        if cached is not None:
+            return {recipe_config['id']: recipe_config for recipe_config in cached}
 
         try:
+            component_recipe_ids = RecipeGraphService.get_graph().component_recipe_ids
+            if not component_recipe_ids:
+                raise RuntimeError("Failed to fetch component recipes.")
+
             with get_session() as session:
                 # Ensure the user exists
                 user = UserService.load_user(user_key, session)
 
-                # Query for existing configurations
-                user_config = session.query(UserRecipeConfig).filter(
+                # Only the user's deviations from the defaults are stored
+                deviations = session.query(UserRecipeConfig).filter(
                     UserRecipeConfig.user_id == user.id
                 ).all()
 
-                if not user_config:
-                    # Pull component recipes and create default configs
-                    component_recipes = RecipeService.get_component_recipes_details()
-                    if not component_recipes:
-                        raise RuntimeError("Failed to fetch component recipes.")
-
-                    default_configs = [
-                        UserRecipeConfig(
-                            user_id=user.id,
-                            recipe_id=component_recipe['id'],
-                            known=True,
-                            excluded=False,
-                            preferred=component_recipe['id'],
-                        )
-                        for component_recipe in component_recipes
-                    ]
-                    session.bulk_save_objects(default_configs)
-                    session.commit()
-                    user_config = session.query(UserRecipeConfig).filter(
-                        UserRecipeConfig.user_id == user.id
-                    ).all()
-
-            # Convert to JSON and cache the result
+            # Merge them over the default configuration of every component recipe and cache the result
             user_config_json = {
-                recipe_config.recipe_id: {
-                    'id': recipe_config.recipe_id,
-                    'known': recipe_config.known,
-                    'excluded': recipe_config.excluded,
-                    'preferred': recipe_config.preferred,
-                }
-                for recipe_config in user_config
+                recipe_id: ConfigurationService.default_recipe_config(recipe_id) for recipe_id in component_recipe_ids
             }
+            for recipe_config in deviations:
+                # Rows of recipes that left the catalog are ignored
+                if recipe_config.recipe_id in user_config_json:
+                    user_config_json[recipe_config.recipe_id] = {
+                        'id': recipe_config.recipe_id,
+                        'known': recipe_config.known,
+                        'excluded': recipe_config.excluded,
+                        'preferred': recipe_config.preferred,
+                    }
 
-            user_config_cache[user_key] = user_config_json
+            ConfigCacheService.store(cache_key, list(user_config_json.values()))
             return user_config_json
 
         except UserNotFoundError:
@@ -80,7 +75,8 @@ class ConfigurationService:
     @staticmethod
     def save_user_configuration(user_key: str, config: dict):
         """
-        Save or update the recipe configurations for a user.
+        Save or update the recipe configurations for a user. Only configurations that differ from
+        default_recipe_config are stored.
 
         Args:
             user_key (str): The unique key of the user.
@@ -88,7 +84,7 @@ class ConfigurationService:
                            and values are dictionaries with update data.
 
         Returns:
-            dict: A success message.
+            dict: A success message with the number of changed configurations.
             int: HTTP status code.
         """
         if not isinstance(config, dict):
@@ -101,43 +97,78 @@ class ConfigurationService:
 
             # Extract and validate recipe IDs
             try:
-                recipe_ids = [int(key) for key in config.keys()]
+                updates_by_recipe_id = {int(key): update_data for key, update_data in config.items()}
             except ValueError:
                 logger.error("Invalid recipe ID in configuration keys.")
                 return {"message": "Invalid recipe ID format in configuration."}, 400
 
-            # Retrieve existing recipe configurations in one query
-            recipe_configs = session.query(UserRecipeConfig).filter(
-                UserRecipeConfig.user_id == user.id,
-                UserRecipeConfig.recipe_id.in_(recipe_ids)
-            ).all()
-
-            # Map recipe IDs to their corresponding UserRecipeConfig rows
-            recipe_config_map = {rc.recipe_id: rc for rc in recipe_configs}
-
-            # Update relevant recipe configurations
-            for recipe_id in recipe_ids:
-                if recipe_id not in recipe_config_map:
-                    logger.warning(f"Recipe ID {recipe_id} not found for user {user.id}. Skipping.")
+            # Stored deviations of the affected recipes, in one query
+            columns = [getattr(UserRecipeConfig, column) for column in CONFIGURABLE_RECIPE_COLUMNS]
+            stored_by_recipe_id = {
+                recipe_id: dict(zip(CONFIGURABLE_RECIPE_COLUMNS, values))
+                for recipe_id, *values in session.execute(
+                    select(UserRecipeConfig.recipe_id, *columns).where(
+                        UserRecipeConfig.user_id == user.id,
+                        UserRecipeConfig.recipe_id.in_(updates_by_recipe_id.keys())
+                    )
+                )
+            }
+            component_recipe_ids = set(RecipeGraphService.get_graph().component_recipe_ids)
+
+            # Diff the request against the effective values. Configs that differ from the defaults are upserted,
+            # configs brought back to the defaults lose their row; nothing else is written.
+            upserts, reset_recipe_ids = [], []
+            for recipe_id, update_data in updates_by_recipe_id.items():
+                if recipe_id not in component_recipe_ids:
+                    logger.warning(f"Recipe ID {recipe_id} is not a component recipe. Skipping.")
                     continue
 
-                recipe_config = recipe_config_map[recipe_id]
-                update_data = config.get(str(recipe_id), {})
+                default = {column: value for column, value in
+                           ConfigurationService.default_recipe_config(recipe_id).items()
+                           if column in CONFIGURABLE_RECIPE_COLUMNS}
+                current = stored_by_recipe_id.get(recipe_id, default)
+                updated = {**current, **{key: value for key, value in (update_data or {}).items()
+                                         if key in CONFIGURABLE_RECIPE_COLUMNS}}
+                if updated == current:
+                    continue
+                if updated == default:
+                    reset_recipe_ids.append(recipe_id)
+                else:
+                    upserts.append({'user_id': user.id, 'recipe_id': recipe_id, **updated})
 
-                # Apply updates to the recipe configuration
-                for key, value in update_data.items():
-                    if key != 'recipe_id' and hasattr(recipe_config, key):
-                        setattr(recipe_config, key, value)
-                        logger.debug(f"Updated {key} for recipe ID {recipe_id} to {value}.")
+            if not upserts and not reset_recipe_ids:
+                logger.info(f"Recipe configurations of user {user.id} are unchanged.")
+                return {"message": "Recipe configurations are unchanged", "changed": 0}, 200
 
-            # Commit the updates
             try:
+                changed = 0
+                if upserts:
+                    # The IS DISTINCT FROM guard keeps rows a concurrent save already brought to the same values from
+                    # being rewritten
+                    table = UserRecipeConfig.__table__
+                    stmt = dialect_insert(session, table).values(upserts)
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=[table.c.user_id, table.c.recipe_id],
+                        set_={column: stmt.excluded[column] for column in CONFIGURABLE_RECIPE_COLUMNS},
+                        where=or_(*(table.c[column].is_distinct_from(stmt.excluded[column])
+                                    for column in CONFIGURABLE_RECIPE_COLUMNS)),
+                    )
+                    result = session.execute(stmt)
+                    changed += result.rowcount if result.rowcount >= 0 else len(upserts)
+                if reset_recipe_ids:
+                    result = session.execute(delete(UserRecipeConfig).where(
+                        UserRecipeConfig.user_id == user.id,
+                        UserRecipeConfig.recipe_id.in_(reset_recipe_ids)
+                    ))
+                    changed += result.rowcount if result.rowcount >= 0 else len(reset_recipe_ids)
                 session.commit()
-                if user_key in user_config_cache:
-                    user_config_cache.pop(user_key, None)
-                logger.info(f"Recipe configurations updated successfully for user {user.id}.")
-                return {"message": "Recipe configurations updated successfully"}, 200
+                ConfigCacheService.invalidate(ConfigCacheService.RECIPES, user_key)
+                # Solutions computed from the old configuration can no longer be served to this user
+                CacheService.invalidate_tag(CacheService.user_tag(user_key))
+                logger.info(f"Updated {changed} recipe configurations for user {user.id}.")
+                return {"message": "Recipe configurations updated successfully", "changed": changed}, 200
             except SQLAlchemyError as e:
+                session.rollback()
                 logger.exception(f"Database error during save_user_configuration: {e}")
                 return {"message": "An error occurred while saving configurations."}, 500
 
@@ -153,6 +184,10 @@ class ConfigurationService:
         Returns:
             list: A list of production line dictionaries.
         """
+        cached, cache_key = ConfigCacheService.lookup(ConfigCacheService.LINES, user_key, line or '*')
+        if cached is not None:
+            return cached
+
         with get_session() as session:
             # Validate the user exists
             user = UserService.load_user(user_key, session)
@@ -219,6 +254,7 @@ class ConfigurationService:
                 ).all()
 
                 if not user_targets_by_line:
+                    ConfigCacheService.store(cache_key, list(production_lines.values()))
                     return list(production_lines.values())
 
                 user_targets_by_line.sort(key=lambda pLineTarget: pLineTarget.id)
@@ -238,6 +274,7 @@ class ConfigurationService:
                             "rate": target.rate,
                         })
 
+                ConfigCacheService.store(cache_key, list(production_lines.values()))
                 return list(production_lines.values())
 
             except SQLAlchemyError as e:
@@ -331,6 +368,8 @@ class ConfigurationService:
             # Commit all changes
             try:
                 session.commit()
+                ConfigCacheService.invalidate(ConfigCacheService.LINES, user_key)
+                CacheService.invalidate_tag(CacheService.line_tag(user_key, line))
                 logger.info(f"Production line '{line}' updated successfully for user {user.id}")
                 return {"message": "Production line updated successfully"}, 200
             except SQLAlchemyError as e:
@@ -0,0 +1,41 @@
+import logging
+
+from sqlalchemy import func
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models import DataVersion
+from app.utils import get_session
+
+logger = logging.getLogger(__name__)
+
+
+class DataVersionService:
+    @staticmethod
+    def get_current_version(session: Session = None) -> int:
+        """
+        Return the version stamp of the game data currently in the database, or 0 if no ingestion has been stamped
+        (including when the data_versions table has not been migrated yet).
+        """
+        if session is None:
+            with get_session() as session:
+                return DataVersionService.get_current_version(session)
+
+        try:
+            return session.query(func.max(DataVersion.id)).scalar() or 0
+        except SQLAlchemyError as e:
+            session.rollback()
+            logger.warning(f"Could not read the data version stamp: {e}")
+            return 0
+
+    @staticmethod
+    def bump_version(session: Session, description: str = None, fluid_amounts_normalized: bool = True) -> int:
+        """
+        Append a new data version stamp. The caller owns the transaction, so the stamp becomes visible together with
+        the data it describes.
+        """
+        data_version = DataVersion(description=description, fluid_amounts_normalized=fluid_amounts_normalized)
+        session.add(data_version)
+        session.flush()
+        logger.info(f"Game data version bumped to {data_version.id}")
+        return data_version.id
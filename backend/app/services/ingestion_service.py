@@ -0,0 +1,60 @@
+"""
+./app/services/ingestion_service.py
+Game data ingestion as a background job, with progress per phase (rows and rows/sec), instead of in a request.
+"""
+import hmac
+
+from app.scripts.insert_data import ingest_game_data, setup_db
+from app.services.data_version_service import DataVersionService
+from app.services.job_service import JobQueue, JobStore
+from config import Config
+
+# One ingestion at a time; a request while one is queued or running, in any worker process, gets that job
+ingestion_jobs = JobQueue('ingestion', max_workers=1, max_pending=1, result_ttl=Config.INGEST_JOB_RESULT_TTL,
+                          store=JobStore('ingestion', stale_after=Config.INGEST_JOB_RESULT_TTL))
+INGESTION_JOB_KEY = 'ingestion'
+
+
+class IngestionService:
+    @staticmethod
+    def is_authorized(token):
+        """Whether token is the configured INGEST_TOKEN; always False when none is configured."""
+        return bool(Config.INGEST_TOKEN) and token is not None and hmac.compare_digest(token, Config.INGEST_TOKEN)
+
+    @staticmethod
+    def run_ingestion(job, bulk_load=None, incremental=None):
+        """Job body: ingest the game data in one session, reporting each phase on the job."""
+        session, _ = setup_db()
+        try:
+            report = ingest_game_data(session, bulk_load, incremental, progress=job.report)
+            return {'data_version': DataVersionService.get_current_version(session), 'tables': report.to_dict(),
+                    'total_rows': report.total_rows}
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    @staticmethod
+    def submit_ingestion(bulk_load=None, incremental=None):
+        """
+        Queue an ingestion of the game data file. API reads keep being served from the current data version until the
+        job commits the new one.
+
+        :return: (job, coalesced) where coalesced is True if an ingestion was already queued or running.
+        """
+        mode = 'incremental' if (Config.INGEST_MODE == 'incremental' if incremental is None else incremental) \
+            else 'full'
+        return ingestion_jobs.submit(
+            lambda job: IngestionService.run_ingestion(job, bulk_load, incremental),
+            key=INGESTION_JOB_KEY,
+            description=f"Game data ingestion ({mode})",
+        )
+
+    @staticmethod
+    def get_job(job_id):
+        return ingestion_jobs.get(job_id)
+
+    @staticmethod
+    def latest_job():
+        return ingestion_jobs.latest()
@@ -0,0 +1,382 @@
+"""
+./app/services/job_service.py
+Background jobs run on a bounded worker pool, with per-phase progress events that can be polled or streamed.
+
+A job runs in the process that accepted it. With a JobStore, its state is also kept in the background_jobs table, so
+every worker process of the server can serve it and identical submissions to different workers share one job.
+"""
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app.models import BackgroundJob
+from app.models.base import engine
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {'finished', 'failed'}
+# How often a job run by another process is re-read while waiting for its events
+STORED_JOB_POLL_SECONDS = 0.5
+# Seconds between deletions of expired jobs from a JobQueue's store
+STORE_PRUNE_INTERVAL_SECONDS = 60
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+class JobView:
+    """What the API exposes of a job, whether it runs in this process (Job) or another one (StoredJob)."""
+
+    @property
+    def done(self):
+        return self.status in TERMINAL_STATUSES
+
+    def to_dict(self, include_result=True):
+        job_dict = {
+            'id': self.id,
+            'status': self.status,
+            'description': self.description,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'events': list(self.events),
+            'error': self.error,
+        }
+        if include_result and self.status == 'finished':
+            job_dict['result'] = self.result
+        return job_dict
+
+
+class Job(JobView):
+    def __init__(self, key=None, description=None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.description = description
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.events = []
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Set by the JobQueue once the job is recorded in its store
+        self.store = None
+        self._condition = threading.Condition()
+        self._phase_started = time.perf_counter()
+        self.report('queued')
+
+    def report(self, phase, duration=None, **details):
+        """
+        Record a progress event. duration is the phase's own time in seconds; when it is omitted, the time since the
+        previous event is used.
+        """
+        self._record(phase, duration, details)
+        self._publish()
+
+    def _record(self, phase, duration, details):
+        now = time.perf_counter()
+        event = {
+            'phase': phase,
+            'duration_ms': round(1000 * (duration if duration is not None else now - self._phase_started), 3),
+            'elapsed_ms': round(1000 * (time.time() - self.created_at), 3),
+            **details,
+        }
+        with self._condition:
+            self._phase_started = now
+            self.events.append(event)
+            self._condition.notify_all()
+
+    def _publish(self):
+        """Write the job's state to its store, for the other processes."""
+        if self.store is None:
+            return
+        try:
+            self.store.save(self)
+        except Exception as e:
+            logger.warning(f"Could not store the state of job {self.id}: {e}")
+
+    def wait_for_events(self, cursor, timeout):
+        """Block until there are events past cursor, the job is done, or timeout elapses; return the new events."""
+        with self._condition:
+            if cursor >= len(self.events) and not self.done:
+                self._condition.wait(timeout)
+            return self.events[cursor:]
+
+    def _run(self, fn):
+        self.status = 'running'
+        self.started_at = time.time()
+        self.report('started')
+        result, error, status = None, None, 'finished'
+        try:
+            result = fn(self)
+        except Exception as e:
+            logger.exception(f"Job {self.id} failed: {e}")
+            error, status = str(e), 'failed'
+
+        # The terminal event is appended before the job reports done, so a reader that sees it done has every event
+        with self._condition:
+            self.result, self.error = result, error
+            self.finished_at = time.time()
+            self._record(status, self.finished_at - self.started_at, {})
+            self.status = status
+            self._condition.notify_all()
+        self._publish()
+
+
+class StoredJob(JobView):
+    """A job as last written to a JobStore, typically by another process. Read-only."""
+
+    def __init__(self, store, row):
+        self.store = store
+        self._load(row)
+
+    def _load(self, row):
+        self.id = row.id
+        self.key = row.key
+        self.description = row.description
+        self.status = row.status
+        self.result = json.loads(row.result) if row.result is not None else None
+        self.error = row.error
+        self.events = json.loads(row.events)
+        self.created_at = row.created_at
+        self.started_at = row.started_at
+        self.finished_at = row.finished_at
+
+    def wait_for_events(self, cursor, timeout):
+        """Like Job.wait_for_events, re-reading the job from the store every STORED_JOB_POLL_SECONDS."""
+        deadline = time.monotonic() + timeout
+        while cursor >= len(self.events) and not self.done:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(STORED_JOB_POLL_SECONDS, remaining))
+            row = self.store.row(self.id)
+            if row is not None:
+                self._load(row)
+        return self.events[cursor:]
+
+
+class JobStore:
+    """
+    Keeps the jobs of one queue in the background_jobs table. The process running a job writes it after every event;
+    the other processes read it.
+
+    :param queue: Name of the queue, e.g. 'calculator'.
+    :param stale_after: Seconds after its last write a queued or running job is taken for abandoned (its process was
+                        stopped), so its key no longer coalesces new submissions.
+    :param session_factory: Creates the store's sessions; defaults to sessions on the application's engine. The store
+                            commits on its own, never in the caller's transaction.
+    """
+
+    def __init__(self, queue, stale_after, session_factory=None):
+        self.queue = queue
+        self.stale_after = stale_after
+        self.session_factory = session_factory or sessionmaker(bind=engine)
+
+    @staticmethod
+    def columns(job):
+        return {
+            'key': job.key,
+            'active_key': None if job.done else job.key,
+            'status': job.status,
+            'description': job.description,
+            # Serialized like jsonify would (Decimal and other non-JSON values as strings)
+            'events': json.dumps(list(job.events), default=str),
+            'result': json.dumps(job.result, default=str) if job.status == 'finished' else None,
+            'error': job.error,
+            'created_at': job.created_at,
+            'started_at': job.started_at,
+            'finished_at': job.finished_at,
+            'updated_at': time.time(),
+        }
+
+    def claim(self, job):
+        """
+        Record a new job. A job with the same key that is queued or running, in any process, wins.
+
+        :return: None once job is recorded, or the StoredJob holding its key.
+        """
+        with self.session_factory() as session:
+            # Two rounds at most: a second after finding the key held by an abandoned job
+            for _ in range(2):
+                session.add(BackgroundJob(id=job.id, queue=self.queue, **self.columns(job)))
+                try:
+                    session.commit()
+                    return None
+                except IntegrityError:
+                    session.rollback()
+                    if job.key is None:
+                        raise
+
+                active = session.scalars(select(BackgroundJob).where(
+                    BackgroundJob.queue == self.queue, BackgroundJob.active_key == job.key)).first()
+                if active is not None and active.updated_at >= time.time() - self.stale_after:
+                    return StoredJob(self, active)
+                if active is not None:
+                    active.status, active.active_key = 'failed', None
+                    active.error = "Abandoned: the process running the job stopped."
+                    session.commit()
+        return None
+
+    def save(self, job):
+        with self.session_factory() as session:
+            session.execute(update(BackgroundJob).where(BackgroundJob.id == job.id).values(**self.columns(job)))
+            session.commit()
+
+    def row(self, job_id):
+        with self.session_factory() as session:
+            return session.scalars(select(BackgroundJob).where(
+                BackgroundJob.queue == self.queue, BackgroundJob.id == job_id)).first()
+
+    def get(self, job_id):
+        row = self.row(job_id)
+        return StoredJob(self, row) if row is not None else None
+
+    def latest(self):
+        with self.session_factory() as session:
+            row = session.scalars(select(BackgroundJob).where(BackgroundJob.queue == self.queue)
+                                  .order_by(BackgroundJob.created_at.desc()).limit(1)).first()
+        return StoredJob(self, row) if row is not None else None
+
+    def prune(self, expired_before):
+        """Delete the jobs finished before expired_before, and the abandoned ones as long after they went stale."""
+        with self.session_factory() as session:
+            session.execute(delete(BackgroundJob).where(BackgroundJob.queue == self.queue, or_(
+                BackgroundJob.finished_at < expired_before,
+                and_(BackgroundJob.finished_at.is_(None), BackgroundJob.updated_at < expired_before - self.stale_after),
+            )))
+            session.commit()
+
+
+class JobQueue:
+    """
+    Runs jobs on at most max_workers threads. Submissions with the same key while a job for it is still queued or
+    running are coalesced onto that job. At most max_pending jobs may be waiting at once, and finished jobs are
+    kept for result_ttl seconds.
+
+    With a store, jobs and coalescing are shared by every process using the same database: get() also returns the
+    jobs of the other processes. The queue keeps working with its own jobs when the store fails. The store is never
+    called while the queue's lock is held, so a slow database does not hold up lookups of the queue's own jobs.
+    """
+
+    def __init__(self, name, max_workers, max_pending, result_ttl, store=None):
+        self.name = name
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._jobs = {}
+        self._in_flight = {}
+        # Key -> Event set once the store claim of a job with that key is settled
+        self._claims = {}
+        self._store_pruned_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def submit(self, fn, key=None, description=None):
+        """
+        Queue fn(job) to run in the background.
+
+        :return: (job, coalesced) where coalesced is True if an identical in-flight job was reused.
+        """
+        while True:
+            with self._lock:
+                prune_store = self._prune()
+                if key is not None and key in self._in_flight:
+                    return self._jobs[self._in_flight[key]], True
+                claim = self._claims.get(key) if key is not None else None
+                if claim is None:
+                    pending = sum(1 for job in self._jobs.values() if job.status == 'queued')
+                    if pending >= self.max_pending:
+                        raise JobQueueFullError(f"{self.name} queue is full ({pending} jobs waiting).")
+
+                    job = Job(key=key, description=description)
+                    if self.store is None:
+                        self._add(job)
+                    elif key is not None:
+                        # Same-key submissions of this process wait for the claim below, then coalesce on its outcome
+                        claim = self._claims[key] = threading.Event()
+                    break
+            claim.wait()
+
+        if self.store is not None:
+            expired_before = time.time() - self.result_ttl
+            if prune_store:
+                self._from_store(self.store.prune, expired_before)
+            active = self._from_store(self.store.claim, job)
+            with self._lock:
+                if active is None:
+                    job.store = self.store
+                    self._add(job)
+                if claim is not None:
+                    del self._claims[key]
+                    claim.set()
+            if active is not None:
+                return active, True
+
+        self._executor.submit(self._run, job, fn)
+        return job, False
+
+    def _add(self, job):
+        self._jobs[job.id] = job
+        if job.key is not None:
+            self._in_flight[job.key] = job.id
+
+    def _run(self, job, fn):
+        try:
+            job._run(fn)
+        finally:
+            with self._lock:
+                if job.key is not None and self._in_flight.get(job.key) == job.id:
+                    del self._in_flight[job.key]
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = self._from_store(self.store.get, job_id)
+        return job
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def latest(self):
+        """The most recently submitted job, of any process when there is a store."""
+        if self.store is not None:
+            job = self._from_store(self.store.latest)
+            if job is not None:
+                with self._lock:
+                    # This process' own job is live, not a snapshot
+                    return self._jobs.get(job.id, job)
+        jobs = self.jobs()
+        return max(jobs, key=lambda job: job.created_at) if jobs else None
+
+    def _from_store(self, method, *args):
+        try:
+            return method(*args)
+        except Exception as e:
+            logger.warning(f"{self.name} job store unavailable: {e}")
+            return None
+
+    def _prune(self):
+        """
+        Forget this process' expired jobs. Called with the lock held.
+
+        :return: Whether the store is due for its own pruning, which the caller does after releasing the lock.
+        """
+        expired_before = time.time() - self.result_ttl
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.done and job.finished_at < expired_before]:
+            del self._jobs[job_id]
+        if self.store is None or time.monotonic() - self._store_pruned_at < STORE_PRUNE_INTERVAL_SECONDS:
+            return False
+        self._store_pruned_at = time.monotonic()
+        return True
@@ -0,0 +1,151 @@
+"""
+./app/services/metrics_service.py
+Prometheus metrics, served in the text exposition format at GET /metrics.
+
+- Requests: count and latency histogram per route template (bounded label set: method, blueprint, route, status).
+- Solver: solves and solve duration histogram per backend and status, fed by lp_solvers.solve_observers.
+- Caches and the database pool: gauges of this worker's solution cache, config cache, model cache and pool, refreshed
+  at most every Config.METRICS_GAUGE_REFRESH_SECONDS while requests come in and on every scrape.
+
+Under gunicorn set PROMETHEUS_MULTIPROC_DIR: each worker then writes its samples to that directory and a scrape of any
+worker aggregates all of them (counters and histograms summed, gauges reported per pid). gunicorn.conf.py clears the
+directory at startup and marks exited workers dead.
+
+Overhead is one counter increment and one histogram observation per request, on already labelled series, plus the
+throttled gauge refresh: around 10-20 microseconds, within the noise of a test client request
+(app/scripts/benchmark_metrics.py measures it).
+"""
+import os
+import threading
+import time
+
+from flask import g, request
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, \
+    generate_latest, multiprocess
+
+from app.scripts import lp_solvers
+from config import Config
+
+# In multiprocess mode every metric is backed by a file in this directory
+if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SOLVE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 10.0)
+
+REQUESTS = Counter('http_requests_total', 'HTTP requests handled.',
+                   ['method', 'blueprint', 'route', 'status'])
+REQUEST_LATENCY = Histogram('http_request_duration_seconds', 'Time from request start to response.',
+                            ['method', 'blueprint', 'route'], buckets=LATENCY_BUCKETS)
+SOLVES = Counter('lp_solves_total', 'LP solver invocations.', ['backend', 'status', 'warm_start'])
+SOLVE_DURATION = Histogram('lp_solve_duration_seconds', 'Wall time of LP solver invocations.', ['backend'],
+                           buckets=SOLVE_BUCKETS)
+
+# Gauges describe this worker's state; with several workers each one reports its own series
+CACHE_SIZE = Gauge('cache_entries', 'Entries held by a cache.', ['cache'], multiprocess_mode='liveall')
+CACHE_HITS = Gauge('cache_hits', 'Cache lookups that hit since the worker started.', ['cache'],
+                   multiprocess_mode='liveall')
+CACHE_MISSES = Gauge('cache_misses', 'Cache lookups that missed since the worker started.', ['cache'],
+                     multiprocess_mode='liveall')
+CACHE_HIT_RATIO = Gauge('cache_hit_ratio', 'Share of cache lookups that hit since the worker started.', ['cache'],
+                        multiprocess_mode='liveall')
+POOL_CONNECTIONS = Gauge('db_pool_connections', 'Database pool connections by state.', ['state'],
+                         multiprocess_mode='liveall')
+POOL_CHECKOUTS = Gauge('db_pool_checkouts', 'Database pool checkouts since the worker started.',
+                       multiprocess_mode='liveall')
+POOL_TIMEOUTS = Gauge('db_pool_checkout_timeouts', 'Checkouts that gave up waiting for a connection.',
+                      multiprocess_mode='liveall')
+POOL_WAIT = Gauge('db_pool_checkout_wait_seconds', 'Total time checkouts waited for a connection.',
+                  multiprocess_mode='liveall')
+
+# (method, blueprint, route, status) -> (counter, histogram) children; labels() is the costly part of an observation
+_request_series = {}
+_gauges_refreshed = 0.0
+_gauges_lock = threading.Lock()
+
+
+class MetricsService:
+    @staticmethod
+    def init_app(app):
+        """Count and time every request of app, and record every LP solve of this process."""
+        if not app.config.get('METRICS_ENABLED', True):
+            return
+        if MetricsService.observe_solve not in lp_solvers.solve_observers:
+            lp_solvers.solve_observers.append(MetricsService.observe_solve)
+
+        @app.before_request
+        def start_request_timer():
+            g.metrics_started = time.perf_counter()
+
+        @app.after_request
+        def observe_request(response):
+            started = g.pop('metrics_started', None)
+            if started is not None:
+                MetricsService.observe_request(request.method, request.blueprint, request.url_rule,
+                                               response.status_code, time.perf_counter() - started)
+            return response
+
+    @staticmethod
+    def observe_request(method, blueprint, url_rule, status, seconds):
+        # The route template, not the path, so ids in URLs do not create new series
+        route = url_rule.rule if url_rule is not None else '<unmatched>'
+        series = _request_series.get((method, blueprint, route, status))
+        if series is None:
+            series = _request_series[(method, blueprint, route, status)] = (
+                REQUESTS.labels(method, blueprint or '', route, str(status)),
+                REQUEST_LATENCY.labels(method, blueprint or '', route),
+            )
+        series[0].inc()
+        series[1].observe(seconds)
+        MetricsService.refresh_gauges()
+
+    @staticmethod
+    def observe_solve(solution):
+        SOLVES.labels(solution.backend, solution.status, str(solution.warm_start).lower()).inc()
+        SOLVE_DURATION.labels(solution.backend).observe(solution.solve_time)
+
+    @staticmethod
+    def refresh_gauges(force=False):
+        global _gauges_refreshed
+        now = time.monotonic()
+        if not force and now - _gauges_refreshed < Config.METRICS_GAUGE_REFRESH_SECONDS:
+            return
+        if not _gauges_lock.acquire(blocking=False):
+            return
+        try:
+            _gauges_refreshed = now
+            from app.models.base import engine
+            from app.models.engine import get_pool_stats
+            from app.services.cache_service import CacheService
+            from app.services.config_cache_service import ConfigCacheService
+            from app.services.model_cache_service import ModelCacheService
+
+            for cache, stats in (('solution', CacheService.get_stats()), ('config', ConfigCacheService.get_stats())):
+                CACHE_HITS.labels(cache).set(stats['hits'])
+                CACHE_MISSES.labels(cache).set(stats['misses'])
+                CACHE_HIT_RATIO.labels(cache).set(stats['hit_ratio'])
+            CACHE_SIZE.labels('solution').set(CacheService.get_stats()['size'])
+            CACHE_SIZE.labels('model').set(ModelCacheService.get_stats()['size'])
+
+            pool = get_pool_stats(engine)
+            if 'checked_out' in pool:
+                POOL_CONNECTIONS.labels('checked_out').set(pool['checked_out'])
+                POOL_CONNECTIONS.labels('checked_in').set(pool['checked_in'])
+                POOL_CONNECTIONS.labels('overflow').set(pool['overflow'])
+            if 'checkouts' in pool:
+                POOL_CHECKOUTS.set(pool['checkouts'])
+                POOL_TIMEOUTS.set(pool['timeouts'])
+                POOL_WAIT.set(pool['wait_seconds_total'])
+        finally:
+            _gauges_lock.release()
+
+    @staticmethod
+    def render():
+        """(body, content type) of the exposition for a scrape."""
+        MetricsService.refresh_gauges(force=True)
+        if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,48 @@
+"""
+./app/services/model_cache_service.py
+Compiled solver models kept per (user, production line), so rate-only edits re-solve from the last optimal basis.
+"""
+import threading
+from contextlib import contextmanager
+
+from cachetools import TTLCache
+
+from config import Config
+
+
+class ModelSlot:
+    """Holds the compiled model of one production line. Solves on a slot are serialized by its lock."""
+
+    def __init__(self):
+        self.model = None
+        self.lock = threading.Lock()
+
+
+# (user key, line) -> ModelSlot. Every checkout re-inserts the slot, so the TTL measures idle time.
+compiled_models = TTLCache(maxsize=Config.MODEL_CACHE_MAXSIZE, ttl=Config.MODEL_CACHE_IDLE_SECONDS)
+compiled_models_lock = threading.Lock()
+
+
+class ModelCacheService:
+    @staticmethod
+    @contextmanager
+    def checkout(user_key, line):
+        """
+        Lock and yield the ModelSlot of a production line, creating an empty one on first use. The caller may
+        reuse slot.model if its structure matches, or replace it.
+        """
+        key = (user_key, str(line))
+        with compiled_models_lock:
+            slot = compiled_models.get(key) or ModelSlot()
+            compiled_models[key] = slot
+        with slot.lock:
+            yield slot
+
+    @staticmethod
+    def get_stats():
+        with compiled_models_lock:
+            return {
+                'size': len(compiled_models),
+                'maxsize': compiled_models.maxsize,
+                'idle_ttl': compiled_models.ttl,
+            }
@@ -0,0 +1,180 @@
+"""
+./app/services/recipe_graph_service.py
+Process-wide, immutable snapshot of the component recipe graph.
+
+The game data only changes when the database is re-ingested, so the component recipes are loaded once, flattened into
+compact numpy arrays for the optimizer, and kept alongside the pre-built endpoint payloads. The snapshot is tagged with
+the data version stamp written during ingestion and reloaded when that stamp moves.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal
+
+import numpy as np
+
+from app.scripts.lp_model import IncidenceMatrix
+from app.services.data_version_service import DataVersionService
+from app.services.recipe_service import RecipeService
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def _flatten_adjacency(recipes, key, durations):
+    """CSR-style adjacency (indptr, item ids, amounts, per-minute rates) of the ingredients or products of recipes."""
+    indptr = np.zeros(len(recipes) + 1, dtype=np.int64)
+    item_ids, amounts, rates = [], [], []
+    for r_idx, recipe in enumerate(recipes):
+        runs_per_minute = Decimal(60) / durations[r_idx]
+        for entry in recipe[key] or []:
+            item_ids.append(entry['id'])
+            amounts.append(entry['amount'])
+            rates.append(float(Decimal(entry['amount']) * runs_per_minute))
+        indptr[r_idx + 1] = len(item_ids)
+    return (indptr, np.array(item_ids, dtype=np.int64), np.array(amounts, dtype=np.float64),
+            np.array(rates, dtype=np.float64))
+
+
+def _gather(indptr, positions):
+    """Entry indices covered by the rows at positions, plus the position each entry belongs to."""
+    starts = indptr[positions]
+    counts = indptr[positions + 1] - starts
+    total = int(counts.sum())
+    owner = np.repeat(np.arange(len(positions), dtype=np.int64), counts)
+    # Offset of every entry within its own row, added to that row's start
+    within_row = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+    return np.repeat(starts, counts) + within_row, owner
+
+
+class RecipeGraph:
+    """
+    Read-only view of the component recipes at one data version. The payload lists and dicts are shared between
+    requests and must not be mutated by callers.
+    """
+
+    def __init__(self, version: int, component_recipes: list, component_recipes_grouped: list):
+        self.version = version
+        self.loaded_at = time.time()
+
+        # Endpoint payloads, built once per data version
+        self.component_recipes_details = component_recipes
+        self.component_recipes_grouped_details = component_recipes_grouped
+        self.component_recipe_ids = [recipe['id'] for recipe in component_recipes]
+        self.recipe_details_by_id = {recipe['id']: recipe for recipe in component_recipes}
+        self.alternate_recipe_ids = frozenset(
+            recipe['id'] for group in component_recipes_grouped for recipe in group['alternate'])
+
+        # Compact arrays for model construction
+        self.recipe_ids = np.array(self.component_recipe_ids, dtype=np.int64)
+        self.recipe_index = {recipe_id: idx for idx, recipe_id in enumerate(self.component_recipe_ids)}
+        durations = [Decimal(recipe['manufactoring_duration']) for recipe in component_recipes]
+        self.durations = np.array([float(duration) for duration in durations], dtype=np.float64)
+        (self.ingredient_indptr, self.ingredient_item_ids, self.ingredient_amounts,
+         self.ingredient_rates) = _flatten_adjacency(component_recipes, 'ingredients', durations)
+        (self.product_indptr, self.product_item_ids, self.product_amounts,
+         self.product_rates) = _flatten_adjacency(component_recipes, 'products', durations)
+
+        self.building_indptr = np.zeros(len(component_recipes) + 1, dtype=np.int64)
+        building_ids = []
+        for r_idx, recipe in enumerate(component_recipes):
+            building_ids.extend(building['id'] for building in recipe['produced_in'] or [])
+            self.building_indptr[r_idx + 1] = len(building_ids)
+        self.building_ids = np.array(building_ids, dtype=np.int64)
+
+        self.item_ids = np.unique(np.concatenate([self.ingredient_item_ids, self.product_item_ids]))
+
+        # Items each recipe consumes or produces on net (an item on both sides counts once, by its net rate)
+        self.net_consumed_items = []
+        self.net_produced_items = []
+        for r_idx in range(len(component_recipes)):
+            net_rates = defaultdict(float)
+            for start, end, item_ids, rates, sign in (
+                    (self.product_indptr[r_idx], self.product_indptr[r_idx + 1],
+                     self.product_item_ids, self.product_rates, 1.0),
+                    (self.ingredient_indptr[r_idx], self.ingredient_indptr[r_idx + 1],
+                     self.ingredient_item_ids, self.ingredient_rates, -1.0)):
+                for item_id, rate in zip(item_ids[start:end].tolist(), rates[start:end].tolist()):
+                    net_rates[item_id] += sign * rate
+            self.net_consumed_items.append(frozenset(i for i, rate in net_rates.items() if rate < 0))
+            self.net_produced_items.append(frozenset(i for i, rate in net_rates.items() if rate > 0))
+
+    def __len__(self):
+        return len(self.component_recipe_ids)
+
+    def recipe_details(self, recipe_ids):
+        return [self.recipe_details_by_id[recipe_id] for recipe_id in recipe_ids if recipe_id in self.recipe_details_by_id]
+
+    def incidence_matrix(self, recipe_ids) -> IncidenceMatrix:
+        """
+        Sparse item x recipe flow matrix restricted to recipe_ids (columns keep the given order).
+        Only items touched by those recipes get a row.
+        """
+        recipe_ids = list(recipe_ids)
+        positions = np.array([self.recipe_index[recipe_id] for recipe_id in recipe_ids], dtype=np.int64)
+
+        product_entries, product_cols = _gather(self.product_indptr, positions)
+        ingredient_entries, ingredient_cols = _gather(self.ingredient_indptr, positions)
+
+        entry_items = np.concatenate([self.product_item_ids[product_entries],
+                                      self.ingredient_item_ids[ingredient_entries]])
+        cols = np.concatenate([product_cols, ingredient_cols])
+        values = np.concatenate([self.product_rates[product_entries], -self.ingredient_rates[ingredient_entries]])
+
+        item_ids = np.unique(entry_items)
+        rows = np.searchsorted(item_ids, entry_items)
+        return IncidenceMatrix.from_coo(item_ids.tolist(), recipe_ids, rows, cols, values)
+
+
+_graph = None
+_graph_lock = threading.Lock()
+_last_version_check = 0.0
+
+
+class RecipeGraphService:
+    @staticmethod
+    def load() -> RecipeGraph:
+        """Build a fresh snapshot from the database and make it the current one."""
+        global _graph, _last_version_check
+        with _graph_lock:
+            version = DataVersionService.get_current_version()
+            component_recipes = RecipeService.get_component_recipes_details()
+            component_recipes_grouped = RecipeService.get_component_recipes_grouped_details()
+            _graph = RecipeGraph(version, component_recipes, component_recipes_grouped)
+            _last_version_check = time.monotonic()
+            logger.info(f"Loaded recipe graph snapshot v{version} with {len(_graph)} component recipes")
+            return _graph
+
+    @staticmethod
+    def get_graph() -> RecipeGraph:
+        """
+        Return the current snapshot. The data version stamp is re-checked at most once every
+        Config.RECIPE_GRAPH_VERSION_CHECK_SECONDS, so requests in between do not touch the database.
+        """
+        global _last_version_check
+        graph = _graph
+        if graph is None:
+            return RecipeGraphService.load()
+
+        if time.monotonic() - _last_version_check >= Config.RECIPE_GRAPH_VERSION_CHECK_SECONDS:
+            _last_version_check = time.monotonic()
+            if DataVersionService.get_current_version() != graph.version:
+                return RecipeGraphService.load()
+
+        return graph
+
+    @staticmethod
+    def invalidate():
+        """Drop the snapshot so the next request reloads it (used after an ingestion in this process)."""
+        global _graph
+        with _graph_lock:
+            _graph = None
+
+    @staticmethod
+    def warm_up():
+        """Load the snapshot at startup. Failures are logged rather than raised so the app can still start."""
+        try:
+            RecipeGraphService.load()
+        except Exception as e:
+            logger.warning(f"Recipe graph snapshot could not be preloaded, it will be loaded on first use: {e}")
@@ -0,0 +1,138 @@
+"""
+./app/services/static_response_service.py
+Catalog responses serialized once per data version.
+
+The catalog endpoints return the same JSON until the game data is re-ingested, so each payload is rendered once,
+compressed ahead of time (gzip, and brotli when the package is installed) and served from memory with a strong
+ETag per encoding (the content-coding is part of the representation). A request whose If-None-Match matches the tag
+of the encoding it would be served gets an empty 304.
+"""
+import gzip
+import hashlib
+import logging
+import threading
+
+from flask import Response, current_app, request
+
+from app.services.recipe_graph_service import RecipeGraphService
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the deployment
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+# Content-Encoding -> suffix of the ETag of the payload in that encoding
+ETAG_SUFFIXES = {None: '', 'gzip': '-gz', 'br': '-br'}
+
+
+class StaticPayload:
+    def __init__(self, version, etag, body, gzip_body, brotli_body, empty):
+        self.version = version
+        self.etag = etag
+        self.body = body
+        self.gzip_body = gzip_body
+        self.brotli_body = brotli_body
+        # The loader returned no data; the route decides how to answer that
+        self.empty = empty
+
+    def encoded(self, accept_encodings):
+        """(body, Content-Encoding or None, ETag) of the payload for a request's Accept-Encoding."""
+        if self.brotli_body is not None and 'br' in accept_encodings:
+            body, encoding = self.brotli_body, 'br'
+        elif 'gzip' in accept_encodings:
+            body, encoding = self.gzip_body, 'gzip'
+        else:
+            body, encoding = self.body, None
+        return body, encoding, f"{self.etag}{ETAG_SUFFIXES[encoding]}"
+
+
+# Payload name -> loader returning the data to serialize
+_loaders = {}
+# Payload name -> StaticPayload of the current data version
+_payloads = {}
+_payloads_lock = threading.Lock()
+
+
+class StaticResponseService:
+    @staticmethod
+    def register(name, loader):
+        """Register the loader of a catalog payload. Called at import time by the blueprints."""
+        _loaders[name] = loader
+
+    @staticmethod
+    def current_version():
+        # The graph re-checks the data version stamp periodically, so this does not query the database per request
+        return RecipeGraphService.get_graph().version
+
+    @staticmethod
+    def build(name, version):
+        data = _loaders[name]()
+        body = current_app.json.dumps(data).encode('utf-8')
+        digest = hashlib.sha256(body).hexdigest()[:16]
+        return StaticPayload(
+            version=version,
+            etag=f"v{version}-{digest}",
+            body=body,
+            gzip_body=gzip.compress(body, compresslevel=9),
+            brotli_body=brotli.compress(body, quality=11) if brotli is not None else None,
+            empty=not data,
+        )
+
+    @staticmethod
+    def get_payload(name):
+        """Return the payload of the current data version, rendering it on first use."""
+        version = StaticResponseService.current_version()
+        payload = _payloads.get(name)
+        if payload is not None and payload.version == version:
+            return payload
+
+        with _payloads_lock:
+            payload = _payloads.get(name)
+            if payload is None or payload.version != version:
+                payload = StaticResponseService.build(name, version)
+                _payloads[name] = payload
+                logger.info(f"Rendered static payload {name} v{version}: {len(payload.body)} bytes, "
+                            f"{len(payload.gzip_body)} gzipped")
+            return payload
+
+    @staticmethod
+    def respond(name, empty_response=None):
+        """
+        Serve a registered payload for the current request.
+
+        :param empty_response: Returned instead when the loader produced no data (e.g. a 404 tuple).
+        """
+        payload = StaticResponseService.get_payload(name)
+        if payload.empty and empty_response is not None:
+            return empty_response
+
+        body, encoding, etag = payload.encoded(request.accept_encodings)
+        headers = {
+            'ETag': f'"{etag}"',
+            'Cache-Control': 'no-cache',
+            'Vary': 'Accept-Encoding',
+        }
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers=headers)
+
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+        return Response(body, mimetype='application/json', headers=headers)
+
+    @staticmethod
+    def warm_up(app):
+        """Render every registered payload at startup. Failures are logged; payloads then render on first use."""
+        with app.app_context():
+            for name in list(_loaders):
+                try:
+                    StaticResponseService.get_payload(name)
+                except Exception as e:
+                    logger.warning(f"Static payload {name} could not be preloaded: {e}")
+
+    @staticmethod
+    def invalidate():
+        with _payloads_lock:
+            _payloads.clear()
@@ -8,14 +8,23 @@ Data validation functions.
 Formatting or data transformation functions.
 Helper methods for common tasks (e.g., converting units).
 """
+import codecs
+import io
 import json
 import os
 import re
 import logging
+from functools import lru_cache
 
 import chardet
 
+try:
+    import ijson
+except ImportError:  # pragma: no cover - optional, the pure Python reader below is used instead
+    ijson = None
+
 from contextlib import contextmanager
+from sqlalchemy.dialects import postgresql, sqlite
 from app.models.base import SessionLocal
 
 @contextmanager
@@ -26,6 +35,15 @@ def get_session():
     finally:
         session.close()
 
+def dialect_insert(session, table):
+    """INSERT construct of the session's database dialect, which supports ON CONFLICT (PostgreSQL and SQLite)."""
+    dialect = session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(table)
+    if dialect == 'sqlite':
+        return sqlite.insert(table)
+    raise NotImplementedError(f"ON CONFLICT upserts are not supported for the {dialect} dialect.")
+
 # Load json data in from file
 def load_json_file(file_path):
     # Ensure file exists at specified path
@@ -61,6 +79,168 @@ def load_json_file(file_path):
         return None
 
 
+# Byte order marks, longest first: the UTF-32 LE mark starts with the UTF-16 LE one
+BOM_ENCODINGS = (
+    (codecs.BOM_UTF32_LE, 'utf-32'),
+    (codecs.BOM_UTF32_BE, 'utf-32'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+ENCODING_SAMPLE_SIZE = 64 * 1024
+JSON_CHUNK_SIZE = 64 * 1024
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def detect_json_encoding(file_path, sample_size=ENCODING_SAMPLE_SIZE):
+    """
+    Encoding of a JSON file from its byte order mark, else from its first sample_size bytes: UTF-8 when they decode
+    as UTF-8, otherwise chardet's guess. Only the sample is read.
+    """
+    with open(file_path, 'rb') as file:
+        sample = file.read(sample_size)
+    for bom, encoding in BOM_ENCODINGS:
+        if sample.startswith(bom):
+            return encoding
+    try:
+        # Incremental, so a multi-byte character cut off at the end of the sample is not an error
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        encoding = chardet.detect(sample)['encoding'] or 'utf-8'
+        logging.getLogger(__name__).info(f"Detected encoding of {file_path}: {encoding}")
+        return encoding
+
+
+class _Utf8Reader:
+    """Binary file-like view of a text stream, as UTF-8, for ijson."""
+
+    def __init__(self, text_stream):
+        self.text_stream = text_stream
+
+    def read(self, size=-1):
+        return self.text_stream.read(size).encode('utf-8')
+
+
+class _JsonArrayReader:
+    """
+    Minimal incremental JSON reader over a text stream, for the top-level layout [{"key": value, ...}, ...].
+    Values are decoded one at a time with json.JSONDecoder.raw_decode, refilling the buffer when a value is cut off
+    at its end, so only the value being decoded is held in memory.
+    """
+
+    def __init__(self, stream, chunk_size=None):
+        self.stream = stream
+        self.chunk_size = chunk_size or JSON_CHUNK_SIZE
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.consumed = 0
+        self.eof = False
+
+    def _fill(self, size=None):
+        if self.eof:
+            return False
+        chunk = self.stream.read(size or self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop what has been consumed, so the buffer stays about one chunk plus the current value
+        self.consumed += self.pos
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character, or '' at the end of the input."""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def tell(self):
+        """Position in the whole input, which unlike pos survives the buffer being compacted."""
+        return self.consumed + self.pos
+
+    def expect(self, *characters):
+        character = self.peek()
+        if character not in characters:
+            raise json.JSONDecodeError(f"Expected one of {characters!r}", self.buffer, self.pos)
+        self.pos += 1
+        return character
+
+    def value(self):
+        self.peek()
+        # Each retry decodes the value from its start, so reads grow geometrically to keep large values linear
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill(size):
+                    size *= 2
+                    continue
+                raise
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and self._fill(size):
+                continue
+            self.pos = end
+            return value
+
+    def items(self):
+        """Yield (key, reader) for each member of the object at the current position; read or skip the value."""
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            start = self.tell()
+            yield key, self
+            if self.tell() == start:
+                self.value()
+            if self.expect(',', '}') == '}':
+                return
+
+    def array(self):
+        """Yield at each element of the array at the current position; the caller reads the element."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.expect(',', ']') == ']':
+                return
+
+
+def stream_json_records(file_path, field='Classes', encoding=None):
+    """
+    Yield the elements of the `field` array of every object of a JSON file shaped like [{field: [...]}, ...], one at
+    a time, without loading the file. Uses ijson when it is installed and a pure Python reader otherwise.
+
+    :param file_path: Path of the JSON file.
+    :param field: Member of the top-level objects holding the records.
+    :param encoding: Text encoding of the file; detected with detect_json_encoding when None.
+    """
+    encoding = encoding or detect_json_encoding(file_path)
+    with open(file_path, 'r', encoding=encoding, newline='') as file:
+        if ijson is not None:
+            stream = file.buffer if encoding in ('utf-8', 'ascii') else _Utf8Reader(file)
+            yield from ijson.items(stream, f'item.{field}.item', use_float=True)
+            return
+
+        reader = _JsonArrayReader(file)
+        for _ in reader.array():
+            for key, _ in reader.items():
+                if key == field:
+                    for _ in reader.array():
+                        yield reader.value()
+
+
 def get_column_type(value):
     """Determine the PostgreSQL column type based on the value."""
     if isinstance(value, bool):
@@ -104,6 +284,7 @@ def attempt_cast(value):
 prefix_pattern = re.compile(r'^[a-z](?:_|(?=[A-Z]))')  # Updated regex to stop after matching the prefix
 split_pattern = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z][a-z]+|[a-z]+|[A-Z]+|[0-9]+')
 
+@lru_cache(maxsize=8192)
 def to_snake_case(key: str) -> str:
     if key == "mWaterpumpTimeline_RTPC_B8FA6F944E717E3B7A286E84901F620E":
         key = "mWaterpumpTimeline_RTPC"
@@ -30,4 +30,82 @@ class Config:
     if not SQLALCHEMY_DATABASE_URI:
         raise RuntimeError(f"SQLALCHEMY_DATABASE_URI must be set for {FLASK_ENV} environment.")
 
+    # Database connection pool (per process): persistent connections, extra connections under load, seconds to wait
+    # for a free one, liveness check on checkout, seconds before a connection is replaced, and the PostgreSQL
+    # statement timeout in milliseconds (0 disables). Size it for SERVER_THREADS plus CALCULATOR_JOB_WORKERS.
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 5))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 30000))
 
+    # Request instrumentation (app/profiling.py): SQL count, DB/ORM time and spans per request in the Server-Timing
+    # header and the log; cProfile a fraction of requests (0 disables) and keep the profiles of those slower than
+    # PROFILER_SLOW_MS, written to PROFILER_DIR or logged when it is empty
+    REQUEST_PROFILING = os.getenv('REQUEST_PROFILING', 'true').lower() == 'true'
+    PROFILER_SAMPLE_RATE = float(os.getenv('PROFILER_SAMPLE_RATE', 0))
+    PROFILER_SLOW_MS = float(os.getenv('PROFILER_SLOW_MS', 500))
+    PROFILER_DIR = os.getenv('PROFILER_DIR', '')
+
+    # Prometheus metrics at /metrics, and how often (seconds) a worker refreshes its cache and pool gauges
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_GAUGE_REFRESH_SECONDS = float(os.getenv('METRICS_GAUGE_REFRESH_SECONDS', 5))
+
+    # Game data ingestion: write each table at once (COPY on PostgreSQL) with relationships resolved in memory, in
+    # one transaction, instead of adding ORM objects one by one
+    INGEST_BULK_LOAD = os.getenv('INGEST_BULK_LOAD', 'true').lower() == 'true'
+    # 'incremental' applies only what changed since the last ingestion, keeping ids and user data; 'full' truncates
+    # every table, user data included, and reloads
+    INGEST_MODE = os.getenv('INGEST_MODE', 'incremental').lower()
+    # Ingestion jobs (POST /api/data/ingest): bearer token required to start one (empty disables the endpoint), and
+    # how long finished jobs and their reports are kept, in seconds
+    INGEST_TOKEN = os.getenv('INGEST_TOKEN', '')
+    INGEST_JOB_RESULT_TTL = float(os.getenv('INGEST_JOB_RESULT_TTL', 3600))
+
+    # Recipe graph snapshot: load it when the app is created, and how often (seconds) to re-check the data version
+    PRELOAD_RECIPE_GRAPH = os.getenv('PRELOAD_RECIPE_GRAPH', 'true').lower() == 'true'
+    RECIPE_GRAPH_VERSION_CHECK_SECONDS = float(os.getenv('RECIPE_GRAPH_VERSION_CHECK_SECONDS', 30))
+    # Render the catalog responses (serialized and compressed once per data version) when the app is created
+    PRELOAD_STATIC_RESPONSES = os.getenv('PRELOAD_STATIC_RESPONSES', 'true').lower() == 'true'
+
+    # Optimizer solution cache: maximum number of entries (LRU eviction) and time to live in seconds
+    SOLUTION_CACHE_MAXSIZE = int(os.getenv('SOLUTION_CACHE_MAXSIZE', 512))
+    SOLUTION_CACHE_TTL = float(os.getenv('SOLUTION_CACHE_TTL', 900))
+
+    # User configuration cache: 'memory' (per process), 'sqlite' (file shared by the workers of a host; the URL is
+    # its path) or 'redis' (the URL is the Redis URL), plus entry count (memory only) and time to live in seconds
+    CONFIG_CACHE_BACKEND = os.getenv('CONFIG_CACHE_BACKEND', 'memory').lower()
+    CONFIG_CACHE_URL = os.getenv('CONFIG_CACHE_URL', '')
+    CONFIG_CACHE_MAXSIZE = int(os.getenv('CONFIG_CACHE_MAXSIZE', 1000))
+    CONFIG_CACHE_TTL = float(os.getenv('CONFIG_CACHE_TTL', 300))
+
+    # Background calculator jobs: solver threads, how many jobs may wait for one, and how long results are kept (also
+    # how long a job left unfinished by a stopped worker keeps coalescing identical requests)
+    CALCULATOR_JOB_WORKERS = int(os.getenv('CALCULATOR_JOB_WORKERS', 2))
+    CALCULATOR_JOB_MAX_PENDING = int(os.getenv('CALCULATOR_JOB_MAX_PENDING', 32))
+    CALCULATOR_JOB_RESULT_TTL = float(os.getenv('CALCULATOR_JOB_RESULT_TTL', 600))
+
+    # Solver processes used by the batch endpoint; 1 solves the lines in the request thread
+    CALCULATOR_BATCH_PROCESSES = int(os.getenv('CALCULATOR_BATCH_PROCESSES', min(4, os.cpu_count() or 1)))
+
+    # LP solver backend: 'highs' solves in-process through highspy, 'cbc' runs the CBC binary bundled with PuLP
+    LP_SOLVER_BACKEND = os.getenv('LP_SOLVER_BACKEND', 'highs').lower()
+    # Drop recipes that cannot reach the targets or cannot be supplied from raw resources before building the LP
+    LP_PRESOLVE = os.getenv('LP_PRESOLVE', 'true').lower() == 'true'
+
+    # Compiled solver models kept per production line for warm-started re-solves: maximum count and idle timeout
+    MODEL_CACHE_MAXSIZE = int(os.getenv('MODEL_CACHE_MAXSIZE', 256))
+    MODEL_CACHE_IDLE_SECONDS = float(os.getenv('MODEL_CACHE_IDLE_SECONDS', 300))
+
+    # Production server (gunicorn.conf.py): listen address, worker processes, threads per worker, seconds a request
+    # may run before its worker is restarted, seconds workers get to finish requests on reload/shutdown, keep-alive
+    # seconds, and requests after which a worker is recycled (0 disables; jitter spreads the restarts)
+    SERVER_BIND = os.getenv('SERVER_BIND', '0.0.0.0:5000')
+    SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', 2 * (os.cpu_count() or 1) + 1))
+    SERVER_THREADS = int(os.getenv('SERVER_THREADS', 4))
+    SERVER_TIMEOUT = int(os.getenv('SERVER_TIMEOUT', 120))
+    SERVER_GRACEFUL_TIMEOUT = int(os.getenv('SERVER_GRACEFUL_TIMEOUT', 30))
+    SERVER_KEEPALIVE = int(os.getenv('SERVER_KEEPALIVE', 5))
+    SERVER_MAX_REQUESTS = int(os.getenv('SERVER_MAX_REQUESTS', 0))
+    SERVER_MAX_REQUESTS_JITTER = int(os.getenv('SERVER_MAX_REQUESTS_JITTER', 0))
@@ -0,0 +1,62 @@
+"""
+Satisfactory_App/backend/gunicorn.conf.py
+Production server settings, read by `gunicorn -c gunicorn.conf.py wsgi:app`.
+
+The app is created once in the master (preload_app): the recipe graph snapshot and the pre-rendered catalog
+responses are built there and shared copy-on-write with the forked workers. Each worker serves requests on a pool of
+threads. Background jobs (calculator, ingestion) run in the worker that accepted them and are kept in the
+background_jobs table, so any worker serves their status and events.
+
+Reloading: `kill -HUP <master pid>` restarts the workers gracefully with the same preloaded app. To pick up new code,
+start a new master with `kill -USR2 <master pid>`, then stop the old one with `kill -QUIT <old master pid>`.
+"""
+import gc
+import os
+
+from dotenv import load_dotenv
+
+# Same .env selection as run.py; Config reads the environment when it is imported
+load_dotenv(f".env.{os.getenv('FLASK_ENV', 'development')}")
+
+from config import Config  # noqa: E402
+
+# Prometheus samples of a previous run would be aggregated into this one's. This file is read before the app is
+# preloaded, so the directory is clean before any metric is created.
+metrics_dir = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+if metrics_dir:
+    os.makedirs(metrics_dir, exist_ok=True)
+    for name in os.listdir(metrics_dir):
+        os.remove(os.path.join(metrics_dir, name))
+
+bind = Config.SERVER_BIND
+workers = Config.SERVER_WORKERS
+worker_class = 'gthread'
+threads = Config.SERVER_THREADS
+timeout = Config.SERVER_TIMEOUT
+graceful_timeout = Config.SERVER_GRACEFUL_TIMEOUT
+keepalive = Config.SERVER_KEEPALIVE
+max_requests = Config.SERVER_MAX_REQUESTS
+max_requests_jitter = Config.SERVER_MAX_REQUESTS_JITTER
+preload_app = True
+accesslog = '-'
+
+
+def when_ready(server):
+    # Move everything the preloaded app allocated out of the collector's reach, so collections in the workers
+    # don't touch (and copy) the shared pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app.models.base import engine
+    from app.services.config_cache_service import ConfigCacheService
+
+    # Connections opened while preloading belong to the master; the worker opens its own
+    engine.dispose(close=False)
+    ConfigCacheService.set_backend(None)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
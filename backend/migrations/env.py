@@ -39,6 +39,10 @@ def run_migrations_online():
         connectable = db.engine  # Use Flask's SQLAlchemy engine
 
         with connectable.connect() as connection:
+            # Schema changes may run longer than the statement timeout applied to application queries
+            if connection.dialect.name == 'postgresql':
+                connection.exec_driver_sql("SET statement_timeout = 0")
+
             context.configure(
                 connection=connection,
                 target_metadata=target_metadata,
@@ -0,0 +1,29 @@
+"""Added ingest_id_marks table so incremental ingestions never reuse the ids of removed objects
+
+Revision ID: a4c8e2f6b1d9
+Revises: f3b9d2c7a8e4
+Create Date: 2026-10-17 23:06:51.271845
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c8e2f6b1d9'
+down_revision = 'f3b9d2c7a8e4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Without a mark the next incremental ingestion starts from the largest id in the table, and records one
+    op.create_table('ingest_id_marks',
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('max_id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+
+
+def downgrade():
+    op.drop_table('ingest_id_marks')
@@ -0,0 +1,29 @@
+"""Add unique constraint to user_id and recipe_id of user_recipes
+
+Revision ID: b41e7d2c9a05
+Revises: 8f3c2a9d41b7
+Create Date: 2026-10-17 18:32:07.512946
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b41e7d2c9a05'
+down_revision = '8f3c2a9d41b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Concurrent first loads could insert the default configs twice; keep the oldest row of each (user, recipe)
+    op.execute(
+        "DELETE FROM user_recipes WHERE id NOT IN "
+        "(SELECT MIN(id) FROM user_recipes GROUP BY user_id, recipe_id)"
+    )
+    op.create_unique_constraint('uq_user_recipes_user_id_recipe_id', 'user_recipes', ['user_id', 'recipe_id'])
+
+
+def downgrade():
+    op.drop_constraint('uq_user_recipes_user_id_recipe_id', 'user_recipes', type_='unique')
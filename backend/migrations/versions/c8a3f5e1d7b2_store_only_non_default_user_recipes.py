@@ -0,0 +1,29 @@
+"""Store only user_recipes rows that differ from the default configuration
+
+Revision ID: c8a3f5e1d7b2
+Revises: b41e7d2c9a05
+Create Date: 2026-10-17 18:51:44.207315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8a3f5e1d7b2'
+down_revision = 'b41e7d2c9a05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Configurations are merged over the defaults (known, not excluded, preferring itself) when loaded
+    op.execute(
+        "DELETE FROM user_recipes WHERE known = true AND excluded = false AND preferred = recipe_id"
+    )
+
+
+def downgrade():
+    # The deleted rows held the defaults and the catalog decides which recipes get one, so they are not recreated.
+    # Users without any row get the defaults again on their next load.
+    pass
@@ -0,0 +1,33 @@
+"""Added ingest_fingerprints table for incremental game data ingestion
+
+Revision ID: d2b7e4f1a6c3
+Revises: c8a3f5e1d7b2
+Create Date: 2026-10-17 19:24:08.551734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2b7e4f1a6c3'
+down_revision = 'c8a3f5e1d7b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing catalog rows have no fingerprint yet; the first incremental ingestion rewrites them in place, keeping
+    # their ids, and records one
+    op.create_table('ingest_fingerprints',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('class_name', sa.String(), nullable=False),
+    sa.Column('fingerprint', sa.String(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('table_name', 'class_name', name='uq_ingest_fingerprints_table_name_class_name')
+    )
+
+
+def downgrade():
+    op.drop_table('ingest_fingerprints')
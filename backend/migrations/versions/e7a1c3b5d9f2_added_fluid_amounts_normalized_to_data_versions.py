@@ -0,0 +1,26 @@
+"""Added fluid_amounts_normalized to data_versions
+
+Revision ID: e7a1c3b5d9f2
+Revises: d2b7e4f1a6c3
+Create Date: 2026-10-17 21:02:41.318206
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a1c3b5d9f2'
+down_revision = 'd2b7e4f1a6c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Every ingestion stamped so far ran UpdateLiquids afterwards, so the existing versions are normalized
+    op.add_column('data_versions', sa.Column('fluid_amounts_normalized', sa.Boolean(), nullable=False,
+                                             server_default=sa.true()))
+
+
+def downgrade():
+    op.drop_column('data_versions', 'fluid_amounts_normalized')
@@ -0,0 +1,40 @@
+"""Added background_jobs table so every worker process can serve the state of background jobs
+
+Revision ID: f3b9d2c7a8e4
+Revises: e7a1c3b5d9f2
+Create Date: 2026-10-17 22:14:09.583120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b9d2c7a8e4'
+down_revision = 'e7a1c3b5d9f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('background_jobs',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('queue', sa.String(), nullable=False),
+    sa.Column('key', sa.String(), nullable=True),
+    sa.Column('active_key', sa.String(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('description', sa.String(), nullable=True),
+    sa.Column('events', sa.Text(), nullable=False),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.Float(), nullable=False),
+    sa.Column('started_at', sa.Float(), nullable=True),
+    sa.Column('finished_at', sa.Float(), nullable=True),
+    sa.Column('updated_at', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('queue', 'active_key', name='uq_background_jobs_queue_active_key')
+    )
+
+
+def downgrade():
+    op.drop_table('background_jobs')
@@ -0,0 +1,70 @@
+import unittest
+
+from sqlalchemy import Integer, Numeric, select
+from sqlalchemy.orm import Session
+
+from app.models import Building, Item, Recipe, RecipeInputs, Sinkable
+from app.models.base import Base
+from app.models.engine import create_db_engine
+from app.scripts.benchmark_ingest import synthetic_supported_objects
+from app.scripts.bulk_loader import LoadReport, copy_value
+from app.scripts.insert_data import build_classified_rows, bulk_insert_fully_classified_objects, \
+    classify_objects_into_subtypes, insert_fully_classified_objects
+
+
+class TestBulkLoader(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_db_engine('sqlite://')
+        self.addCleanup(self.engine.dispose)
+        with Session(self.engine) as session:
+            self.classified = classify_objects_into_subtypes(session, synthetic_supported_objects(30, 40))
+
+    def load(self, bulk):
+        Base.metadata.drop_all(self.engine)
+        Base.metadata.create_all(self.engine)
+        with Session(self.engine) as session:
+            if bulk:
+                report = LoadReport()
+                bulk_insert_fully_classified_objects(session, self.classified, report)
+                session.commit()
+                self.report = report
+            else:
+                insert_fully_classified_objects(session, self.classified)
+        with Session(self.engine) as session:
+            return {table.name: sorted(map(tuple, session.execute(select(table)).all()), key=repr)
+                    for table in Base.metadata.sorted_tables}
+
+    def test_bulk_load_matches_orm_insertion(self):
+        """
+        Test that the bulk loader writes exactly the rows, ids and foreign keys of the ORM insertion path.
+        """
+        orm_tables = self.load(bulk=False)
+        bulk_tables = self.load(bulk=True)
+
+        self.assertEqual(bulk_tables, orm_tables)
+        self.assertEqual(self.report.tables['items']['rows'], 30)
+        self.assertEqual(self.report.total_rows, sum(len(rows) for rows in bulk_tables.values()))
+
+    def test_relationships_resolved_in_memory(self):
+        rows = build_classified_rows(self.classified)
+
+        self.assertEqual(list(rows)[:3], [Item, Building, Recipe])
+        item_ids = {row['class_name']: row['id'] for row in rows[Item]}
+        recipe_ids = {row['class_name']: row['id'] for row in rows[Recipe]}
+        first_input = self.classified["Recipe_"]["RecipeInputs"][0]["object"]
+        self.assertEqual(rows[RecipeInputs][0]['recipe_id'], recipe_ids[first_input['class_name']])
+        self.assertEqual(rows[RecipeInputs][0]['item_id'], item_ids[first_input['item']])
+        self.assertTrue(all(row['item_id'] in item_ids.values() for row in rows[Sinkable]))
+
+    def test_copy_value_escaping(self):
+        self.assertEqual(copy_value(None), '\\N')
+        self.assertEqual(copy_value(True), 't')
+        self.assertEqual(copy_value('a\tb\nc\\d'), 'a\\tb\\nc\\\\d')
+        self.assertEqual(copy_value([1, 'x']), '[1, "x"]')
+
+    def test_copy_value_float_in_integer_column(self):
+        self.assertEqual(copy_value(45.0, Integer()), '45')
+        self.assertEqual(copy_value(1.5, Numeric()), '1.5')
+        with self.assertRaises(ValueError):
+            copy_value(1.5, Integer())
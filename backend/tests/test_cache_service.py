@@ -0,0 +1,83 @@
+import unittest
+
+from app.services import cache_service
+from app.services.cache_service import CacheService
+
+
+class TestSolutionKey(unittest.TestCase):
+
+    def test_key_ignores_ordering(self):
+        """
+        Test that the digest is canonical: the same recipe set and targets in another order hash the same.
+        """
+        key_a = CacheService.solution_key([3, 1, 2], [9, 8], {5: 10, 6: 20}, {100: 50, 101: 60}, 1)
+        key_b = CacheService.solution_key([1, 2, 3], [8, 9], {6: 20.0, 5: 10}, {101: 60, 100: 50}, 1)
+
+        self.assertEqual(key_a, key_b)
+
+    def test_key_changes_with_inputs(self):
+        base = CacheService.solution_key([1, 2], [9], {5: 10}, {100: 50}, 1)
+
+        self.assertNotEqual(base, CacheService.solution_key([1], [9], {5: 10}, {100: 50}, 1))
+        self.assertNotEqual(base, CacheService.solution_key([1, 2], [9], {5: 11}, {100: 50}, 1))
+        self.assertNotEqual(base, CacheService.solution_key([1, 2], [9], {5: 10}, {100: 40}, 1))
+        self.assertNotEqual(base, CacheService.solution_key([1, 2], [9], {5: 10}, {100: 50}, 2))
+
+
+class TestSolutionCache(unittest.TestCase):
+
+    def setUp(self):
+        cache_service.solution_cache.clear()
+        cache_service.solution_cache_tags.clear()
+        cache_service.solution_cache_stats.update(hits=0, misses=0)
+
+    def test_hit_miss_accounting(self):
+        self.assertIsNone(CacheService.get_cached_result('a'))
+        CacheService.set_cached_result('a', {'scale': 1})
+        self.assertEqual(CacheService.get_cached_result('a'), {'scale': 1})
+
+        stats = CacheService.get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_ratio'], 0.5)
+
+    def test_invalidate_tag_only_drops_tagged_entries(self):
+        """
+        Test that a save for one line drops that line's solutions and leaves other users' entries alone.
+        """
+        CacheService.set_cached_result('a', {}, tags=(CacheService.user_tag('u1'), CacheService.line_tag('u1', '0')))
+        CacheService.set_cached_result('b', {}, tags=(CacheService.user_tag('u1'), CacheService.line_tag('u1', '1')))
+        CacheService.set_cached_result('c', {}, tags=(CacheService.user_tag('u2'), CacheService.line_tag('u2', '0')))
+
+        CacheService.invalidate_tag(CacheService.line_tag('u1', '0'))
+        self.assertEqual(set(cache_service.solution_cache.keys()), {'b', 'c'})
+
+        CacheService.invalidate_tag(CacheService.user_tag('u1'))
+        self.assertEqual(set(cache_service.solution_cache.keys()), {'c'})
+
+    def test_lru_eviction(self):
+        maxsize = cache_service.solution_cache.maxsize
+        for i in range(maxsize):
+            CacheService.set_cached_result(i, {'i': i})
+        # Touch the oldest entry so the second oldest becomes the eviction candidate
+        CacheService.get_cached_result(0)
+        CacheService.set_cached_result('new', {})
+
+        self.assertIn(0, cache_service.solution_cache)
+        self.assertNotIn(1, cache_service.solution_cache)
+
+    def test_tag_index_is_bounded(self):
+        """
+        Test that tags are evicted like cache entries, taking the entries stored under them along.
+        """
+        maxsize = cache_service.solution_cache_tags.maxsize
+        for i in range(maxsize + 10):
+            CacheService.set_cached_result(i, {'i': i}, tags=(CacheService.user_tag(i),))
+
+        self.assertEqual(len(cache_service.solution_cache_tags), maxsize)
+        self.assertNotIn(CacheService.user_tag(0), cache_service.solution_cache_tags)
+        self.assertNotIn(0, cache_service.solution_cache)
+        self.assertIn(maxsize + 9, cache_service.solution_cache)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+from app.models import Item, Recipe
+from app.scripts.benchmark_ingest import synthetic_supported_objects
+from app.scripts.classification import classify_object_list, parse_recipe_strings
+from app.scripts.insert_data import classify_objects_into_subtypes
+
+
+class TestClassification(unittest.TestCase):
+
+    def test_parse_recipe_strings(self):
+        recipe = {
+            "ingredients": "((ItemClass=\"/Script/Engine.BlueprintGeneratedClass'/Game/FactoryGame/Resource/Parts/"
+                           "IronPlate/Desc_IronPlate.Desc_IronPlate_C'\",Amount=6))",
+            "product": "((ItemClass=\"/Script/Engine.BlueprintGeneratedClass'/Game/FactoryGame/Resource/Parts/"
+                       "Wire/Desc_Wire.Desc_Wire_C'\",Amount=12))",
+            "produced_in": "(\"/Game/FactoryGame/Buildable/Factory/ConstructorMk1/Build_ConstructorMk1."
+                           "Build_ConstructorMk1_C\",\"/Game/FactoryGame/Equipment/BuildGun/BP_BuildGun.BP_BuildGun_C\")",
+        }
+
+        self.assertEqual(parse_recipe_strings(recipe), (
+            [{"recipeInputs_item": "Desc_IronPlate_C", "amount": "6"}],
+            [{"recipeOutputs_item": "Desc_Wire_C", "amount": "12"}],
+            [{"recipeCompatibleBuilding_building": "Build_ConstructorMk1_C"}],
+        ))
+
+    def test_item_subtypes_in_declaration_order(self):
+        item = {"class_name": "Desc_Shard_C", "resource_sink_points": 1, "extra_potential": 0.5}
+
+        self.assertEqual(classify_object_list("Desc_", [item]),
+                         [(0, None, (("PowerShard", (("items", "Desc_Shard_C"),)),
+                                     ("Sinkable", (("items", "Desc_Shard_C"),))))])
+
+    def test_records_assemble_into_classified_objects(self):
+        """
+        Test that the records of the pure stage become classified objects related to ORM models.
+        """
+        objects = synthetic_supported_objects(40, 60)
+        classified = classify_objects_into_subtypes(None, objects)
+
+        self.assertEqual(len({item["object"]["class_name"] for items in classified["Desc_"].values() for item in items}),
+                         40)
+        first_input = classified["Recipe_"]["RecipeInputs"][0]
+        self.assertEqual([relationship["table"] for relationship in first_input["relationships"]], [Recipe, Item])
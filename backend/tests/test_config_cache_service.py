@@ -0,0 +1,126 @@
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from app.services.config_cache_service import (ConfigCacheService, MemoryCacheBackend, RedisCacheBackend,
+                                               SQLiteCacheBackend)
+
+
+class LocalRedis:
+    """Stand-in for redis.Redis implementing the commands the cache uses (expiry is ignored)."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode('utf-8') if isinstance(value, str) else value
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, b'0')) + 1).encode('utf-8')
+        return int(self.data[key])
+
+
+class TestConfigCacheService(unittest.TestCase):
+
+    def setUp(self):
+        self.graph = SimpleNamespace(version=1)
+        patcher = patch('app.services.config_cache_service.RecipeGraphService.get_graph', return_value=self.graph)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(ConfigCacheService.set_backend, None)
+
+    def backends(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        return [
+            MemoryCacheBackend(maxsize=10, ttl=60),
+            SQLiteCacheBackend(os.path.join(directory.name, 'cache.sqlite')),
+            RedisCacheBackend(LocalRedis()),
+        ]
+
+    def test_store_lookup_invalidate(self):
+        """
+        Test that every backend returns what was stored and drops it once the user's generation is bumped.
+        """
+        for backend in self.backends():
+            with self.subTest(backend=backend.name):
+                ConfigCacheService.set_backend(backend)
+                value, key = ConfigCacheService.lookup(ConfigCacheService.LINES, 'u1', '*')
+                self.assertIsNone(value)
+                ConfigCacheService.store(key, [{'id': '1', 'rate': 2.5}])
+
+                self.assertEqual(ConfigCacheService.lookup(ConfigCacheService.LINES, 'u1', '*')[0],
+                                 [{'id': '1', 'rate': 2.5}])
+                # Other kinds and users are untouched by an invalidation
+                _, other_key = ConfigCacheService.lookup(ConfigCacheService.RECIPES, 'u1')
+                ConfigCacheService.store(other_key, [1])
+
+                ConfigCacheService.invalidate(ConfigCacheService.LINES, 'u1')
+                self.assertIsNone(ConfigCacheService.lookup(ConfigCacheService.LINES, 'u1', '*')[0])
+                self.assertEqual(ConfigCacheService.lookup(ConfigCacheService.RECIPES, 'u1')[0], [1])
+
+    def test_invalidation_reaches_other_processes(self):
+        """
+        Test that a save through one worker's connection invalidates what another worker cached in the shared file.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.sqlite')
+            worker_a, worker_b = SQLiteCacheBackend(path), SQLiteCacheBackend(path)
+
+            ConfigCacheService.set_backend(worker_a)
+            _, key = ConfigCacheService.lookup(ConfigCacheService.RECIPES, 'u1')
+            ConfigCacheService.store(key, [{'id': 1, 'known': True}])
+
+            ConfigCacheService.set_backend(worker_b)
+            self.assertIsNotNone(ConfigCacheService.lookup(ConfigCacheService.RECIPES, 'u1')[0])
+            ConfigCacheService.invalidate(ConfigCacheService.RECIPES, 'u1')
+
+            ConfigCacheService.set_backend(worker_a)
+            self.assertIsNone(ConfigCacheService.lookup(ConfigCacheService.RECIPES, 'u1')[0])
+
+    def test_store_after_concurrent_save_is_unreachable(self):
+        """
+        Test that a value loaded before a concurrent save, and stored after it, is never served.
+        """
+        ConfigCacheService.set_backend(MemoryCacheBackend(maxsize=10, ttl=60))
+        _, key = ConfigCacheService.lookup(ConfigCacheService.RECIPES, 'u1')
+        ConfigCacheService.invalidate(ConfigCacheService.RECIPES, 'u1')
+        ConfigCacheService.store(key, ['stale'])
+
+        self.assertIsNone(ConfigCacheService.lookup(ConfigCacheService.RECIPES, 'u1')[0])
+
+    def test_data_version_change(self):
+        """
+        Test that entries cached for an older game data version are not served.
+        """
+        ConfigCacheService.set_backend(MemoryCacheBackend(maxsize=10, ttl=60))
+        _, key = ConfigCacheService.lookup(ConfigCacheService.LINES, 'u1', '0')
+        ConfigCacheService.store(key, [])
+        self.graph.version = 2
+
+        self.assertIsNone(ConfigCacheService.lookup(ConfigCacheService.LINES, 'u1', '0')[0])
+
+    def test_memory_generations_are_bounded(self):
+        """
+        Test that the in-process generation counters are evicted like entries, and that a user whose counter was
+        evicted is not served the entries of the generation it had.
+        """
+        backend = MemoryCacheBackend(maxsize=3, ttl=60)
+        ConfigCacheService.set_backend(backend)
+        _, key = ConfigCacheService.lookup(ConfigCacheService.LINES, 'u0', '*')
+        ConfigCacheService.store(key, ['stale'])
+        ConfigCacheService.invalidate(ConfigCacheService.LINES, 'u0')
+        for user in ('u1', 'u2', 'u3'):
+            ConfigCacheService.invalidate(ConfigCacheService.LINES, user)
+
+        self.assertEqual(len(backend.counters), 3)
+        self.assertIsNone(ConfigCacheService.lookup(ConfigCacheService.LINES, 'u0', '*')[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
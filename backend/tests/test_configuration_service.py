@@ -0,0 +1,133 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import sqlalchemy as sa
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+from app.models import Recipe, User, UserRecipeConfig
+from app.models.base import Base, engine
+from app.services.config_cache_service import ConfigCacheService
+from app.services.configuration_service import ConfigurationService
+from app.services.recipe_graph_service import RecipeGraphService
+from app.utils import get_session
+
+
+def recipe_row(recipe_id):
+    values = {}
+    for column in Recipe.__table__.columns:
+        if isinstance(column.type, sa.Boolean):
+            values[column.name] = False
+        elif isinstance(column.type, (sa.Integer, sa.Numeric, sa.Float)):
+            values[column.name] = 0
+        else:
+            values[column.name] = ''
+    return {**values, 'id': recipe_id, 'class_name': f"Recipe_{recipe_id}_C"}
+
+
+@unittest.skipUnless(engine.dialect.name == 'sqlite', "Seeds tables, so it only runs against a SQLite database")
+class TestSaveUserConfiguration(unittest.TestCase):
+
+    def setUp(self):
+        # Recipes 1-4 are in the catalog
+        patcher = patch.object(RecipeGraphService, 'get_graph',
+                               return_value=SimpleNamespace(version=1, component_recipe_ids=[1, 2, 3, 4]))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # Start every test with an empty configuration cache
+        ConfigCacheService.set_backend(None)
+        Base.metadata.create_all(engine)
+        self.addCleanup(Base.metadata.drop_all, engine)
+        with get_session() as session:
+            session.execute(Recipe.__table__.insert(), [recipe_row(recipe_id) for recipe_id in range(1, 6)])
+            user = User(user_key='u1')
+            session.add(user)
+            session.flush()
+            self.user_id = user.id
+            # The only deviation from the defaults: recipe 4 is excluded
+            session.add(UserRecipeConfig(user_id=user.id, recipe_id=4, known=True, excluded=True, preferred=4))
+            session.commit()
+
+    def stored(self):
+        with get_session() as session:
+            return {
+                config.recipe_id: (config.known, config.excluded, config.preferred)
+                for config in session.query(UserRecipeConfig).filter(UserRecipeConfig.user_id == self.user_id)
+            }
+
+    def save(self, config):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            result, status = ConfigurationService.save_user_configuration('u1', config)
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+        self.assertEqual(status, 200)
+        writes = [statement for statement in statements if not statement.lstrip().upper().startswith('SELECT')]
+        return result['changed'], writes
+
+    def test_load_merges_deviations_over_defaults(self):
+        """
+        Test that a user with one stored deviation gets the defaults for every other catalog recipe.
+        """
+        config = ConfigurationService.load_user_configuration('u1')
+
+        self.assertEqual(sorted(config), [1, 2, 3, 4])
+        self.assertEqual(config[1], {'id': 1, 'known': True, 'excluded': False, 'preferred': 1})
+        self.assertTrue(config[4]['excluded'])
+
+    def test_first_load_writes_no_configs(self):
+        config = ConfigurationService.load_user_configuration('new-visitor')
+
+        self.assertEqual(len(config), 4)
+        self.assertEqual(len(self.stored()), 1)
+
+    def test_applies_diff_in_one_statement(self):
+        """
+        Test that only the configs whose values change are written, in a single upsert, and ids outside the catalog
+        are skipped.
+        """
+        changed, writes = self.save({
+            '1': {'known': False},
+            '2': {'excluded': True, 'preferred': 3},
+            '3': {'known': True},  # Already the default
+            '5': {'known': False},  # Not a component recipe
+        })
+
+        self.assertEqual(changed, 2)
+        self.assertEqual(len(writes), 1)
+        self.assertIn('ON CONFLICT', writes[0])
+        self.assertEqual(self.stored(), {
+            1: (False, False, 1),
+            2: (True, True, 3),
+            4: (True, True, 4),
+        })
+
+    def test_reset_to_default_deletes_row(self):
+        changed, writes = self.save({'4': {'excluded': False}})
+
+        self.assertEqual(changed, 1)
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(self.stored(), {})
+
+    def test_unchanged_config_skips_writes(self):
+        changed, writes = self.save({'1': {'known': True, 'excluded': False}, '4': {'recipe_id': 7, 'user_id': 9}})
+
+        self.assertEqual(changed, 0)
+        self.assertEqual(writes, [])
+        self.assertEqual(self.stored(), {4: (True, True, 4)})
+
+    def test_user_recipe_pairs_are_unique(self):
+        with get_session() as session:
+            session.add(UserRecipeConfig(user_id=self.user_id, recipe_id=4, known=False, excluded=False, preferred=4))
+            with self.assertRaises(IntegrityError):
+                session.commit()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.models.engine import InstrumentedQueuePool, create_db_engine, engine_options, get_pool_stats
+from config import Config
+
+
+class TestEngineFactory(unittest.TestCase):
+
+    def test_postgres_options(self):
+        options = engine_options('postgresql://user:secret@db:5432/app')
+
+        self.assertIs(options['poolclass'], InstrumentedQueuePool)
+        self.assertEqual(options['pool_size'], Config.DB_POOL_SIZE)
+        self.assertEqual(options['max_overflow'], Config.DB_MAX_OVERFLOW)
+        self.assertTrue(options['pool_pre_ping'])
+        self.assertIn(f"statement_timeout={Config.DB_STATEMENT_TIMEOUT_MS}", options['connect_args']['options'])
+
+    def test_in_memory_sqlite_keeps_default_pool(self):
+        options = engine_options('sqlite://')
+
+        self.assertNotIn('poolclass', options)
+        self.assertNotIn('connect_args', options)
+
+    def test_checkout_waits_are_recorded(self):
+        """
+        Test that checkouts are counted into the wait histogram, a checkout that times out is counted as a timeout,
+        and the metrics survive engine.dispose().
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_db_engine(f"sqlite:///{os.path.join(directory, 'pool.sqlite')}",
+                                      pool_size=1, max_overflow=0, pool_timeout=0.05)
+
+            held = engine.connect()
+            with self.assertRaises(PoolTimeoutError):
+                engine.connect()
+            stats = get_pool_stats(engine)
+            self.assertEqual((stats['checkouts'], stats['timeouts'], stats['checked_out']), (1, 1, 1))
+            self.assertEqual(stats['wait_buckets']['+Inf'], 1)
+            held.close()
+
+            engine.dispose()
+            with engine.connect():
+                pass
+            self.assertEqual(get_pool_stats(engine)['checkouts'], 2)
+            engine.dispose()
+
+
+if __name__ == '__main__':
+    unittest.main()
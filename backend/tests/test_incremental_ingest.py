@@ -0,0 +1,113 @@
+import copy
+import unittest
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models import IngestFingerprint, Item, ProductionLineTarget, Recipe, RecipeInputs, User, \
+    UserProductionLine, UserRecipeConfig
+from app.models.base import Base
+from app.models.engine import create_db_engine
+from app.scripts.benchmark_ingest import synthetic_supported_objects
+from app.scripts.incremental_ingest import apply_incremental_ingest
+from app.scripts.insert_data import bulk_insert_fully_classified_objects, classify_objects_into_subtypes, \
+    group_classified_objects, record_fingerprints
+
+
+class TestIncrementalIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_db_engine('sqlite://')
+        self.addCleanup(self.engine.dispose)
+        Base.metadata.create_all(self.engine)
+        self.objects = synthetic_supported_objects(30, 40)
+        with Session(self.engine) as session:
+            classified = classify_objects_into_subtypes(session, copy.deepcopy(self.objects))
+            bulk_insert_fully_classified_objects(session, classified)
+            record_fingerprints(session, group_classified_objects(classified))
+            session.commit()
+
+    def apply(self, objects):
+        with Session(self.engine) as session:
+            classified = classify_objects_into_subtypes(session, copy.deepcopy(objects))
+            diff = apply_incremental_ingest(session, group_classified_objects(classified))
+            session.commit()
+            return diff
+
+    def ids(self, model):
+        with Session(self.engine) as session:
+            return dict(session.execute(select(model.class_name, model.id)).all())
+
+    def test_unchanged_data_gives_empty_diff(self):
+        self.assertTrue(self.apply(self.objects).is_empty())
+
+    def test_update_keeps_ids_and_user_data(self):
+        """
+        Test that changed objects keep their ids, added ones get new ids, and user rows of removed objects are
+        released as documented.
+        """
+        referenced = {part.split('Desc_')[-1].split('.')[0] for recipe in self.objects["Recipe_"]
+                      for part in (recipe["ingredients"] + recipe["product"]).split('/') if 'Desc_' in part}
+        unreferenced_item = next(item for item in self.objects["Desc_"]
+                                 if item["class_name"][len("Desc_"):-len("_C")] not in referenced)
+        item_ids, recipe_ids = self.ids(Item), self.ids(Recipe)
+        removed_recipe, other_recipe = self.objects["Recipe_"][0], self.objects["Recipe_"][1]
+        with Session(self.engine) as session:
+            user = User(user_key='key')
+            line = UserProductionLine(line_id_frontend='line', name='Line', user=user)
+            session.add_all([
+                UserRecipeConfig(user=user, recipe_id=recipe_ids[removed_recipe["class_name"]], known=True,
+                                 excluded=True, preferred=recipe_ids[removed_recipe["class_name"]]),
+                UserRecipeConfig(user=user, recipe_id=recipe_ids[other_recipe["class_name"]], known=True,
+                                 excluded=False, preferred=recipe_ids[removed_recipe["class_name"]]),
+                ProductionLineTarget(production_line=line, target_id_frontend='t',
+                                     item_id=item_ids[unreferenced_item["class_name"]], rate=5.0),
+            ])
+            session.commit()
+
+        updated = copy.deepcopy(self.objects)
+        updated["Recipe_"].remove(removed_recipe)
+        updated["Desc_"] = [item for item in updated["Desc_"] if item["class_name"] != unreferenced_item["class_name"]]
+        updated["Desc_"][0]["display_name"] = "Renamed part"
+        updated["Desc_"].append({**updated["Desc_"][1], "class_name": "Desc_NewPart_C"})
+
+        diff = self.apply(updated)
+
+        self.assertEqual(diff.added[Item], ["Desc_NewPart_C"])
+        self.assertEqual(diff.changed[Item], [updated["Desc_"][0]["class_name"]])
+        self.assertEqual(diff.removed[Item], [unreferenced_item["class_name"]])
+        self.assertEqual(diff.removed[Recipe], [removed_recipe["class_name"]])
+        new_item_ids = self.ids(Item)
+        self.assertEqual(new_item_ids[updated["Desc_"][0]["class_name"]], item_ids[updated["Desc_"][0]["class_name"]])
+        self.assertEqual(new_item_ids["Desc_NewPart_C"], max(item_ids.values()) + 1)
+        self.assertEqual({name: recipe_id for name, recipe_id in recipe_ids.items()
+                          if name != removed_recipe["class_name"]}, self.ids(Recipe))
+        with Session(self.engine) as session:
+            self.assertEqual(session.scalar(select(Item.display_name).where(
+                Item.id == item_ids[updated["Desc_"][0]["class_name"]])), "Renamed part")
+            # The configuration of the removed recipe is gone, the preference for it became the default and went too
+            self.assertEqual(session.scalar(select(func.count()).select_from(UserRecipeConfig)), 0)
+            self.assertIsNone(session.scalar(select(ProductionLineTarget.item_id)))
+            self.assertEqual(session.scalar(select(func.count()).select_from(RecipeInputs).where(
+                RecipeInputs.recipe_id == recipe_ids[removed_recipe["class_name"]])), 0)
+            self.assertEqual(session.scalar(select(func.count()).select_from(IngestFingerprint)),
+                             len(updated["Desc_"]) + len(updated["Build_"]) + len(updated["Recipe_"]))
+
+        self.assertTrue(self.apply(updated).is_empty())
+
+    def test_removed_ids_are_not_reused(self):
+        """
+        Test that an object added after the one with the largest id was removed, by an earlier ingestion, gets a new
+        id rather than the removed one.
+        """
+        recipe_ids = self.ids(Recipe)
+        last_recipe = max(self.objects["Recipe_"], key=lambda recipe: recipe_ids[recipe["class_name"]])
+        updated = copy.deepcopy(self.objects)
+        updated["Recipe_"].remove(last_recipe)
+        self.apply(updated)
+
+        updated["Recipe_"].append({**updated["Recipe_"][0], "class_name": "Recipe_NewRecipe_C"})
+        diff = self.apply(updated)
+
+        self.assertEqual(diff.added[Recipe], ["Recipe_NewRecipe_C"])
+        self.assertEqual(self.ids(Recipe)["Recipe_NewRecipe_C"], recipe_ids[last_recipe["class_name"]] + 1)
@@ -0,0 +1,138 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from flask import Flask
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.models import DataVersion, Item
+from app.models.base import Base
+from app.models.engine import create_db_engine
+from app.routes import api_blueprint
+from app.scripts import insert_data
+from app.scripts.benchmark_ingest import synthetic_supported_objects
+from app.services.ingestion_service import IngestionService
+from app.services.job_service import Job, JobQueue, JobStore
+from config import Config
+
+
+class TestIngestGameData(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_db_engine('sqlite://')
+        self.addCleanup(self.engine.dispose)
+        Base.metadata.create_all(self.engine)
+        objects = synthetic_supported_objects(30, 40)
+        self.game_objects = [game_object for object_list in objects.values() for game_object in object_list]
+
+    def ingest(self, incremental):
+        events = []
+        with patch.object(insert_data, 'stream_game_objects', lambda file_path: iter(self.game_objects)), \
+                Session(self.engine) as session:
+            insert_data.ingest_game_data(session, bulk_load=True, incremental=incremental,
+                                         progress=lambda phase, **details: events.append({'phase': phase, **details}))
+        return events
+
+    def test_full_ingestion_reports_phases_and_switches_over_once(self):
+        """
+        Test that a full ingestion reports every phase with its throughput and commits the data with its version.
+        """
+        events = self.ingest(incremental=False)
+
+        self.assertEqual([event['phase'] for event in events],
+                         ['load', 'classify', 'delete', 'insert', 'components', 'switchover'])
+        self.assertEqual(events[0]['rows'], len(self.game_objects))
+        self.assertGreater(events[3]['rows_per_second'], 0)
+        with Session(self.engine) as session:
+            self.assertEqual(session.scalar(select(func.count()).select_from(Item)), 30)
+            self.assertEqual(session.scalar(select(func.count()).select_from(DataVersion)), 1)
+
+        # Reloading deletes and rewrites the same ids in one transaction
+        self.ingest(incremental=False)
+        with Session(self.engine) as session:
+            self.assertEqual(session.scalar(select(func.max(Item.id))), 30)
+
+    def test_orm_insertion_can_leave_the_commit_to_the_caller(self):
+        """
+        Test that the ORM insertion of a full ingestion writes nothing a rollback would not undo.
+        """
+        with Session(self.engine) as session:
+            classified = insert_data.classify_objects_into_subtypes(session, synthetic_supported_objects(30, 40))
+            insert_data.insert_fully_classified_objects(session, classified, commit=False)
+            self.assertEqual(session.scalar(select(func.count()).select_from(Item)), 30)
+            session.rollback()
+
+            self.assertEqual(session.scalar(select(func.count()).select_from(Item)), 0)
+
+    def test_statement_timeout_lifted_on_postgresql(self):
+        """
+        Test that the ingestion's transaction is exempt from DB_STATEMENT_TIMEOUT_MS on PostgreSQL only.
+        """
+        session = MagicMock()
+        session.get_bind.return_value.dialect.name = 'postgresql'
+        insert_data.disable_statement_timeout(session)
+        self.assertEqual(str(session.execute.call_args.args[0]), "SET LOCAL statement_timeout = 0")
+
+        session.get_bind.return_value.dialect.name = 'sqlite'
+        session.execute.reset_mock()
+        insert_data.disable_statement_timeout(session)
+        session.execute.assert_not_called()
+
+    def test_unchanged_incremental_ingestion_stops_before_switchover(self):
+        self.ingest(incremental=False)
+        events = self.ingest(incremental=True)
+
+        self.assertEqual([event['phase'] for event in events], ['load', 'classify', 'insert'])
+        with Session(self.engine) as session:
+            self.assertEqual(session.scalar(select(func.count()).select_from(DataVersion)), 1)
+
+
+class TestIngestionRoutes(unittest.TestCase):
+
+    def setUp(self):
+        app = Flask(__name__)
+        app.register_blueprint(api_blueprint, url_prefix='/api/data')
+        self.client = app.test_client()
+
+    def test_ingestion_requires_token(self):
+        with patch.object(Config, 'INGEST_TOKEN', ''):
+            self.assertEqual(self.client.post('/api/data/ingest').status_code, 403)
+        with patch.object(Config, 'INGEST_TOKEN', 'secret'):
+            self.assertEqual(self.client.post('/api/data/ingest').status_code, 401)
+            self.assertEqual(self.client.post('/api/data/ingest',
+                                              headers={'Authorization': 'Bearer wrong'}).status_code, 401)
+
+    def test_ingestion_is_queued(self):
+        job = Job(description="Game data ingestion (full)")
+        with patch.object(Config, 'INGEST_TOKEN', 'secret'), \
+                patch('app.routes.IngestionService.submit_ingestion', return_value=(job, False)) as submit:
+            response = self.client.post('/api/data/ingest', json={'mode': 'full'},
+                                        headers={'Authorization': 'Bearer secret'})
+
+        self.assertEqual(response.status_code, 202)
+        submit.assert_called_once_with(incremental=False)
+        self.assertEqual(response.headers['Location'], f'/api/data/ingest/{job.id}')
+
+    def test_ingestion_job_served_by_any_worker(self):
+        """
+        Test that the status of an ingestion job recorded by another worker process is served, not a 404.
+        """
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        engine = create_db_engine(f"sqlite:///{os.path.join(directory.name, 'jobs.sqlite')}")
+        self.addCleanup(engine.dispose)
+        Base.metadata.create_all(engine)
+        store = JobStore('ingestion', stale_after=60, session_factory=sessionmaker(bind=engine))
+        other_worker_job = Job(key='ingestion', description="Game data ingestion (full)")
+        store.claim(other_worker_job)
+
+        with patch('app.services.ingestion_service.ingestion_jobs',
+                   JobQueue('ingestion', max_workers=1, max_pending=1, result_ttl=60, store=store)):
+            response = self.client.get(f'/api/data/ingest/{other_worker_job.id}')
+            self.assertEqual(IngestionService.latest_job().id, other_worker_job.id)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['status'], 'queued')
+        self.assertEqual(self.client.get('/api/data/ingest/unknown').status_code, 404)
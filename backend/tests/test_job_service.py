@@ -0,0 +1,227 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from sqlalchemy.orm import sessionmaker
+
+from app.models.base import Base
+from app.models.engine import create_db_engine
+from app.services.job_service import TERMINAL_STATUSES, Job, JobQueue, JobQueueFullError, JobStore, StoredJob
+
+
+class TerminalOrderJob(Job):
+    """Records whether the terminal event was already there when the job became done."""
+
+    def __setattr__(self, name, value):
+        if name == 'status' and value in TERMINAL_STATUSES:
+            self.terminal_event_first = bool(self.events) and self.events[-1]['phase'] == value
+        super().__setattr__(name, value)
+
+
+class TestJob(unittest.TestCase):
+
+    def test_done_job_already_has_its_terminal_event(self):
+        """
+        Test that a job is never seen done without its 'finished' or 'failed' event, which would end an event stream
+        before that event is sent.
+        """
+        def failing_job(job):
+            raise ValueError("boom")
+
+        for fn, status in ((lambda job: 1, 'finished'), (failing_job, 'failed')):
+            job = TerminalOrderJob()
+            job._run(fn)
+
+            self.assertEqual(job.status, status)
+            self.assertTrue(job.terminal_event_first)
+            self.assertEqual(job.events[-1]['phase'], status)
+
+
+class TestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.queue = JobQueue('test', max_workers=1, max_pending=1, result_ttl=60)
+
+    def tearDown(self):
+        self.release.set()
+
+    def blocking_job(self, job):
+        job.report('model_build')
+        self.started.set()
+        self.release.wait(5)
+        return {'ok': True}
+
+    def wait_until_done(self, job):
+        cursor = 0
+        while not job.done:
+            cursor += len(job.wait_for_events(cursor, timeout=5))
+
+    def test_identical_in_flight_jobs_are_coalesced(self):
+        """
+        Test that submitting the same key while the first job is still running returns that job.
+        """
+        first, coalesced_first = self.queue.submit(self.blocking_job, key='same')
+        second, coalesced_second = self.queue.submit(self.blocking_job, key='same')
+
+        self.assertFalse(coalesced_first)
+        self.assertTrue(coalesced_second)
+        self.assertIs(first, second)
+
+        self.release.set()
+        self.wait_until_done(first)
+        self.assertEqual(first.status, 'finished')
+        self.assertEqual(first.result, {'ok': True})
+        self.assertEqual([event['phase'] for event in first.events], ['queued', 'started', 'model_build', 'finished'])
+
+        # Once the job is done, the same key starts a new job
+        third, coalesced_third = self.queue.submit(lambda job: None, key='same')
+        self.assertFalse(coalesced_third)
+        self.assertIsNot(third, first)
+
+    def test_pending_limit(self):
+        self.queue.submit(self.blocking_job, key='running')
+        self.started.wait(5)
+        self.queue.submit(self.blocking_job, key='waiting')
+
+        with self.assertRaises(JobQueueFullError):
+            self.queue.submit(self.blocking_job, key='rejected')
+
+    def test_failed_job_records_error(self):
+        def failing_job(job):
+            raise ValueError("No available recipe produces target item 1.")
+
+        job, _ = self.queue.submit(failing_job)
+        self.wait_until_done(job)
+
+        self.assertEqual(job.status, 'failed')
+        self.assertIn('target item 1', job.error)
+        self.assertNotIn('result', job.to_dict())
+
+
+class SlowStore:
+    """JobStore stand-in whose claims block until released, like a slow database."""
+
+    def __init__(self):
+        self.claiming = threading.Event()
+        self.release = threading.Event()
+        self.claims = 0
+        self.prunes = 0
+
+    def claim(self, job):
+        self.claims += 1
+        self.claiming.set()
+        self.release.wait(5)
+        return None
+
+    def save(self, job):
+        pass
+
+    def get(self, job_id):
+        return None
+
+    def prune(self, expired_before):
+        self.prunes += 1
+
+
+class TestJobQueueWithStore(unittest.TestCase):
+
+    def test_store_claim_does_not_block_the_queue(self):
+        """
+        Test that lookups go on while a submission waits for the store, that a same-key submission of the process
+        coalesces onto the job once it is claimed, and that the store is not pruned on every submission.
+        """
+        store = SlowStore()
+        job_release = threading.Event()
+        self.addCleanup(job_release.set)
+        self.addCleanup(store.release.set)
+        queue = JobQueue('test', max_workers=1, max_pending=4, result_ttl=60, store=store)
+        submitted = []
+
+        def submit():
+            submitted.append(queue.submit(lambda job: job_release.wait(5), key='same'))
+
+        first = threading.Thread(target=submit)
+        first.start()
+        self.assertTrue(store.claiming.wait(5))
+
+        self.assertIsNone(queue.get('unknown'))
+        self.assertEqual(queue.jobs(), [])
+        second = threading.Thread(target=submit)
+        second.start()
+        # Let the second submission reach the claim of the first
+        time.sleep(0.1)
+        store.release.set()
+        first.join(5)
+        second.join(5)
+
+        (job, _), (same_job, _) = submitted
+        self.assertIs(job, same_job)
+        self.assertEqual(sorted(coalesced for _, coalesced in submitted), [False, True])
+        self.assertEqual(store.claims, 1)
+        self.assertEqual(store.prunes, 0)
+
+
+class TestJobStore(unittest.TestCase):
+    """Two queues on one database stand for the same queue in two worker processes."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        engine = create_db_engine(f"sqlite:///{os.path.join(directory.name, 'jobs.sqlite')}")
+        self.addCleanup(engine.dispose)
+        Base.metadata.create_all(engine)
+        self.session_factory = sessionmaker(bind=engine)
+
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.worker_a, self.worker_b = (
+            JobQueue('test', max_workers=1, max_pending=1, result_ttl=60,
+                     store=JobStore('test', stale_after=60, session_factory=self.session_factory))
+            for _ in range(2))
+
+    def blocking_job(self, job):
+        job.report('model_build')
+        self.release.wait(5)
+        return {'ok': True}
+
+    def test_jobs_are_shared_between_processes(self):
+        """
+        Test that another worker coalesces onto a job in flight, serves its status and streams its events to the end.
+        """
+        job, _ = self.worker_a.submit(self.blocking_job, key='same')
+        shared, coalesced = self.worker_b.submit(self.blocking_job, key='same')
+
+        self.assertTrue(coalesced)
+        self.assertIsInstance(shared, StoredJob)
+        self.assertEqual(shared.id, job.id)
+        self.assertEqual(self.worker_b.get(job.id).id, job.id)
+        self.assertIsNone(self.worker_b.get('unknown'))
+
+        self.release.set()
+        cursor = 0
+        while not shared.done:
+            cursor += len(shared.wait_for_events(cursor, timeout=5))
+
+        self.assertEqual(shared.status, 'finished')
+        self.assertEqual(shared.to_dict()['result'], {'ok': True})
+        self.assertEqual([event['phase'] for event in shared.events], ['queued', 'started', 'model_build', 'finished'])
+        self.assertEqual(self.worker_b.latest().id, job.id)
+
+    def test_abandoned_job_does_not_hold_its_key(self):
+        """
+        Test that a job left queued by a stopped process is marked failed once stale, instead of coalescing forever.
+        """
+        store = JobStore('test', stale_after=0, session_factory=self.session_factory)
+        abandoned = Job(key='same')
+        self.assertIsNone(store.claim(abandoned))
+
+        self.assertIsNone(store.claim(Job(key='same')))
+        self.assertEqual(store.get(abandoned.id).status, 'failed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+import pulp
+
+from app.scripts.benchmark_model_build import synthetic_catalog, build_dense_reference
+from app.scripts.lp_model import IncidenceMatrix, build_lp_problem, raw_resource_cost_coefficients
+
+mock_recipes = [
+    {
+        'id': 1,
+        'manufactoring_duration': 6,
+        'ingredients': [{'id': 10, 'amount': 3}],
+        'products': [{'id': 20, 'amount': 2}],
+    },
+    {
+        'id': 2,
+        'manufactoring_duration': 12,
+        'ingredients': [{'id': 20, 'amount': 6}, {'id': 11, 'amount': 12}],
+        'products': [{'id': 30, 'amount': 1}, {'id': 20, 'amount': 1}],
+    },
+]
+
+
+class TestIncidenceMatrix(unittest.TestCase):
+
+    def test_from_recipes_matches_dense_rates(self):
+        """
+        Test that the CSR arrays hold the per-minute rates and collapse an item both consumed and produced.
+        """
+        incidence = IncidenceMatrix.from_recipes(mock_recipes)
+        dense = incidence.to_dense()
+
+        self.assertEqual(incidence.shape, (4, 2))
+        self.assertAlmostEqual(dense[incidence.item_to_index[10], 0], -30.0)
+        self.assertAlmostEqual(dense[incidence.item_to_index[20], 0], 20.0)
+        # Recipe 2 consumes 6 and produces 1 of item 20 every 12 seconds: net -25 per minute
+        self.assertAlmostEqual(dense[incidence.item_to_index[20], 1], -25.0)
+        self.assertEqual(incidence.nnz, np.count_nonzero(dense))
+
+    def test_row_only_returns_nonzero_columns(self):
+        incidence = IncidenceMatrix.from_recipes(mock_recipes)
+        cols, values = incidence.row(30)
+
+        self.assertEqual(cols.tolist(), [1])
+        self.assertAlmostEqual(values[0], 5.0)
+
+    def test_cost_coefficients_only_count_consumption(self):
+        incidence = IncidenceMatrix.from_recipes(mock_recipes)
+        costs = raw_resource_cost_coefficients(incidence, {10: 0.5, 11: 1.0}, handling_fee=0.0)
+
+        self.assertAlmostEqual(costs[0], 15.0)
+        self.assertAlmostEqual(costs[1], 60.0)
+
+
+class TestBuildLpProblem(unittest.TestCase):
+
+    def test_sparse_and_dense_builders_agree(self):
+        """
+        Test that the sparse builder produces the same optimum as the previous dense construction.
+        """
+        recipes, limits, targets = synthetic_catalog(60, seed=3)
+        costs = {rid: 1.0 / limit for rid, limit in limits.items()}
+
+        dense_prob, _ = build_dense_reference(recipes, targets, limits, costs, 1e-6)
+        sparse_prob, _ = build_lp_problem(IncidenceMatrix.from_recipes(recipes), targets, limits, costs, 1e-6)
+        dense_prob.solve(pulp.PULP_CBC_CMD(msg=False))
+        sparse_prob.solve(pulp.PULP_CBC_CMD(msg=False))
+
+        self.assertEqual(pulp.LpStatus[sparse_prob.status], pulp.LpStatus[dense_prob.status])
+        self.assertAlmostEqual(pulp.value(sparse_prob.objective), pulp.value(dense_prob.objective), places=6)
+
+    def test_missing_target_item_raises(self):
+        incidence = IncidenceMatrix.from_recipes(mock_recipes)
+
+        with self.assertRaises(ValueError):
+            build_lp_problem(incidence, {999: 1}, {10: 100}, {10: 0.01}, 1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+from app.scripts.benchmark_model_build import synthetic_catalog
+from app.scripts.lp_model import build_linear_program
+from app.scripts.lp_presolve import presolve_recipes
+from app.scripts.lp_solvers import solve_lp
+from app.services.recipe_graph_service import RecipeGraph
+
+
+def item(item_id, amount):
+    return {'id': item_id, 'amount': amount}
+
+
+def recipe(recipe_id, ingredients, products):
+    return {'id': recipe_id, 'manufactoring_duration': 6, 'ingredients': ingredients, 'products': products,
+            'produced_in': []}
+
+
+class TestPresolve(unittest.TestCase):
+
+    def test_drops_unreachable_and_unrunnable_recipes(self):
+        """
+        Test that recipes feeding nothing the targets need, and recipes needing an input nothing supplies, are dropped.
+        """
+        graph = RecipeGraph(1, [
+            recipe(1, [item(100, 1)], [item(10, 1)]),
+            recipe(2, [item(10, 2)], [item(20, 1), item(30, 1)]),  # Byproduct 30 is fine, 20 is the target
+            recipe(3, [item(100, 1)], [item(40, 1)]),  # Dead end: nothing needs 40
+            recipe(4, [item(50, 1)], [item(20, 1)]),  # 50 is neither raw nor produced
+        ], [])
+
+        kept, report = presolve_recipes(graph, [1, 2, 3, 4], [20], [100])
+
+        self.assertEqual(kept, [1, 2])
+        self.assertEqual((report.unrunnable, report.unreachable), (1, 1))
+        self.assertEqual(report.to_dict()['variables_removed'], 2)
+        self.assertEqual(report.constraints_after, 4)
+
+    def test_keeps_recipes_that_feed_each_other(self):
+        """
+        Test that a loop of recipes fed by a raw input (Recycled Plastic and Recycled Rubber, with the standard recipes
+        excluded) survives presolve and stays feasible, while a recipe hanging off an unsupplied item is dropped.
+        """
+        graph = RecipeGraph(1, [
+            recipe(1, [item(20, 1), item(100, 1)], [item(10, 2)]),  # Rubber + raw -> Plastic
+            recipe(2, [item(10, 1), item(100, 1)], [item(20, 2)]),  # Plastic + raw -> Rubber
+            recipe(3, [item(50, 1)], [item(60, 1)]),  # 50 is neither raw nor produced
+            recipe(4, [item(60, 1)], [item(10, 1)]),  # Only fed by the unrunnable recipe 3
+        ], [])
+
+        kept, report = presolve_recipes(graph, [1, 2, 3, 4], [10], [100])
+
+        self.assertEqual(kept, [1, 2])
+        self.assertEqual(report.unrunnable, 2)
+        solution = solve_lp(build_linear_program(graph.incidence_matrix(kept), {10: 1.0}, {100: 1000.0},
+                                                 {100: 1.0}, 1e-6))
+        self.assertEqual(solution.status, 'Optimal')
+        self.assertGreater(min(solution.x), 0)
+
+    def test_presolve_keeps_optimum(self):
+        """
+        Test that solving the pruned LP gives the same optimum as the full one on a synthetic catalog.
+        """
+        recipes, limits, targets = synthetic_catalog(300, seed=11)
+        for r in recipes:
+            r['produced_in'] = []
+        graph = RecipeGraph(1, recipes, [])
+        costs = {rid: 1.0 / limit for rid, limit in limits.items()}
+        recipe_ids = graph.component_recipe_ids
+
+        kept, report = presolve_recipes(graph, recipe_ids, targets.keys(), limits.keys())
+        full = solve_lp(build_linear_program(graph.incidence_matrix(recipe_ids), targets, limits, costs, 1e-6))
+        pruned = solve_lp(build_linear_program(graph.incidence_matrix(kept), targets, limits, costs, 1e-6))
+
+        self.assertLess(report.variables_after, report.variables_before)
+        self.assertAlmostEqual(pruned.objective, full.objective, places=9)
+
+
+if __name__ == '__main__':
+    unittest.main()
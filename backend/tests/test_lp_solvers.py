@@ -0,0 +1,151 @@
+import unittest
+
+import numpy as np
+
+from app.scripts.benchmark_model_build import synthetic_catalog
+from app.scripts.pulp_optimizer import sensitivity_report
+from app.scripts.lp_model import IncidenceMatrix, build_linear_program, stack_linear_programs
+from app.scripts.lp_solvers import HighsModel, available_backends, highspy, resolve_backend, solve_lp, \
+    solve_column_releases
+
+
+class TestLpSolvers(unittest.TestCase):
+
+    def setUp(self):
+        recipes, limits, targets = synthetic_catalog(120, seed=3)
+        incidence = IncidenceMatrix.from_recipes(recipes)
+        costs = {rid: 1.0 / limit for rid, limit in limits.items()}
+        self.lp = build_linear_program(incidence, targets, limits, costs, 1e-6)
+
+    def test_rows_follow_incidence(self):
+        """
+        Test that every constraint row is the incidence row of its item.
+        """
+        recipes, _, _ = synthetic_catalog(120, seed=3)
+        incidence = IncidenceMatrix.from_recipes(recipes)
+        dense = incidence.to_dense()
+
+        for row, item_id in enumerate(self.lp.row_item_ids):
+            start, end = self.lp.indptr[row], self.lp.indptr[row + 1]
+            lp_row = np.zeros(self.lp.shape[1])
+            lp_row[self.lp.indices[start:end]] = self.lp.data[start:end]
+            np.testing.assert_allclose(lp_row, dense[incidence.item_to_index[item_id]])
+
+    def test_backends_agree(self):
+        """
+        Test that every available backend reaches the same optimum and a feasible point.
+        """
+        solutions = [solve_lp(self.lp, backend) for backend in available_backends()]
+
+        for solution in solutions:
+            self.assertTrue(solution.is_optimal)
+            self.assertAlmostEqual(solution.objective, solutions[0].objective, places=6)
+            slack = np.array([
+                np.dot(self.lp.data[self.lp.indptr[row]:self.lp.indptr[row + 1]],
+                       solution.x[self.lp.indices[self.lp.indptr[row]:self.lp.indptr[row + 1]]])
+                for row in range(self.lp.shape[0])
+            ]) - self.lp.h
+            self.assertGreaterEqual(slack.min(), -1e-6)
+
+    @unittest.skipIf(highspy is None, "highspy is not installed")
+    def test_warm_start_matches_cold_solve(self):
+        """
+        Test that re-solving a compiled model after a target rate change gives the cold solve of the changed LP.
+        """
+        model = HighsModel(self.lp, structure_key='line')
+        self.assertFalse(model.solve().warm_start)
+
+        h = self.lp.h.copy()
+        h[0] *= 3
+        self.assertEqual(model.update_rhs(h), 1)
+        warm = model.solve()
+
+        self.lp.h = h
+        cold = solve_lp(self.lp, 'highs')
+        self.assertTrue(warm.warm_start)
+        self.assertAlmostEqual(warm.objective, cold.objective, places=9)
+
+    def test_joint_program_shares_raw_limits(self):
+        """
+        Test that stacked lines solve independently under loose limits and compete once a raw limit binds.
+        """
+        raw_item_ids = set(range(1, 14))
+        single = solve_lp(self.lp)
+        joint_lp = stack_linear_programs([self.lp, self.lp], raw_item_ids)
+
+        n_shared = sum(1 for item_id in self.lp.row_item_ids if item_id in raw_item_ids)
+        self.assertEqual(joint_lp.shape, (2 * self.lp.shape[0] - n_shared, 2 * self.lp.shape[1]))
+        self.assertAlmostEqual(solve_lp(joint_lp).objective, 2 * single.objective, places=6)
+
+        # Cap the most used raw resource at 1.5x what one line needs
+        usage = {row: -np.dot(self.lp.data[self.lp.indptr[row]:self.lp.indptr[row + 1]],
+                              single.x[self.lp.indices[self.lp.indptr[row]:self.lp.indptr[row + 1]]])
+                 for row, item_id in enumerate(self.lp.row_item_ids) if item_id in raw_item_ids}
+        row = max(usage, key=usage.get)
+        self.lp.h[row] = -1.5 * usage[row]
+
+        self.assertTrue(solve_lp(self.lp).is_optimal)
+        joint = solve_lp(stack_linear_programs([self.lp, self.lp], raw_item_ids))
+        self.assertFalse(joint.is_optimal and joint.objective <= 2 * single.objective + 1e-9)
+
+    def test_column_releases_and_reduced_costs(self):
+        """
+        Test that what-if solves match cold solves, and that no column with a nonnegative reduced cost improves.
+        """
+        columns = list(range(0, self.lp.shape[1], 7))
+        self.lp.upper = np.full(self.lp.shape[1], np.inf)
+        self.lp.upper[columns] = 0.0
+        base = solve_lp(self.lp)
+
+        released = solve_column_releases(self.lp, columns)
+        for column, solution in zip(columns, released):
+            upper = self.lp.upper.copy()
+            upper[column] = np.inf
+            self.lp.upper, fixed = upper, self.lp.upper
+            self.assertAlmostEqual(solution.objective, solve_lp(self.lp).objective, places=9)
+            self.lp.upper = fixed
+
+            if base.reduced_costs[column] >= 0:
+                self.assertAlmostEqual(solution.objective, base.objective, places=9)
+
+    @unittest.skipIf(highspy is None, "highspy is not installed")
+    def test_sensitivity_matches_finite_differences(self):
+        """
+        Test that the reported marginal values predict the objective change of a re-solve with a nudged bound.
+        """
+        recipes, limits, targets = synthetic_catalog(120, seed=3)
+        incidence = IncidenceMatrix.from_recipes(recipes)
+        costs = {rid: 1.0 / limit for rid, limit in limits.items()}
+        usage = -incidence.to_dense() @ solve_lp(self.lp).x
+        # Make the most used raw resource binding
+        scarce = max(limits, key=lambda raw_id: usage[incidence.item_to_index[raw_id]])
+        limits[scarce] = 0.9 * usage[incidence.item_to_index[scarce]]
+
+        def solve(limits, targets):
+            lp = build_linear_program(incidence, targets, limits, costs, 1e-6)
+            return lp, solve_lp(lp, 'highs', ranging=True)
+
+        lp, solution = solve(limits, targets)
+        report = sensitivity_report(lp, solution, targets)
+        raw = next(entry for entry in report['raw_resources'] if entry['item_id'] == scarce)
+        self.assertTrue(raw['binding'])
+        self.assertLessEqual(raw['limit_range'][0], limits[scarce])
+
+        delta = 1e-3
+        _, more = solve({**limits, scarce: limits[scarce] + delta}, targets)
+        self.assertGreater(raw['marginal_value'], 0)
+        self.assertAlmostEqual((solution.objective - more.objective) / delta / raw['marginal_value'], 1.0, places=4)
+
+        for target in report['targets']:
+            _, higher = solve(limits, {**targets, target['item_id']: target['rate'] + delta})
+            self.assertGreater(target['marginal_cost'], 0)
+            self.assertAlmostEqual((higher.objective - solution.objective) / delta / target['marginal_cost'], 1.0,
+                                   places=4)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            resolve_backend('glpk')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+import numpy as np
+from flask import Flask
+
+from app.scripts import lp_solvers
+from app.scripts.lp_solvers import LPSolution, notify_solve_observers
+from app.services.metrics_service import MetricsService
+
+
+class TestMetricsService(unittest.TestCase):
+
+    def setUp(self):
+        app = Flask(__name__)
+        MetricsService.init_app(app)
+        # Creating a second app must not record every solve twice
+        MetricsService.init_app(Flask(__name__))
+
+        @app.route('/api/things/<int:thing_id>')
+        def thing(thing_id):
+            return {'id': thing_id}
+
+        @app.route('/metrics')
+        def metrics():
+            body, content_type = MetricsService.render()
+            return body, 200, {'Content-Type': content_type}
+
+        self.client = app.test_client()
+
+    def sample(self, name, **labels):
+        """Value of one sample in the exposition, 0 when absent."""
+        text = self.client.get('/metrics').get_data(as_text=True)
+        label_text = ','.join(f'{key}="{value}"' for key, value in sorted(labels.items()))
+        prefix = f'{name}{{{label_text}}} ' if labels else f'{name} '
+        for line in text.splitlines():
+            if line.startswith(prefix):
+                return float(line[len(prefix):])
+        return 0.0
+
+    def test_requests_are_labelled_by_route_template(self):
+        """
+        Test that requests to different ids are counted under one route and their latency is recorded.
+        """
+        labels = {'method': 'GET', 'blueprint': '', 'route': '/api/things/<int:thing_id>', 'status': '200'}
+        before = self.sample('http_requests_total', **labels)
+        self.client.get('/api/things/1')
+        self.client.get('/api/things/2')
+
+        self.assertEqual(self.sample('http_requests_total', **labels), before + 2)
+        self.assertGreaterEqual(self.sample('http_request_duration_seconds_count', method='GET', blueprint='',
+                                            route='/api/things/<int:thing_id>'), 2)
+
+        self.client.get('/missing/42')
+        self.assertGreaterEqual(self.sample('http_requests_total', method='GET', blueprint='', route='<unmatched>',
+                                            status='404'), 1)
+
+    def test_solves_are_recorded_once(self):
+        """
+        Test that a solve reported to the observers is counted once per backend and status.
+        """
+        self.assertEqual(lp_solvers.solve_observers.count(MetricsService.observe_solve), 1)
+        labels = {'backend': 'highs', 'status': 'Optimal', 'warm_start': 'true'}
+        before = self.sample('lp_solves_total', **labels)
+        notify_solve_observers([LPSolution('Optimal', np.zeros(1), 0.0, 'highs', 0.002, warm_start=True)])
+
+        self.assertEqual(self.sample('lp_solves_total', **labels), before + 1)
+
+    def test_cache_gauges_are_exported(self):
+        text = self.client.get('/metrics').get_data(as_text=True)
+
+        self.assertIn('cache_hit_ratio{cache="solution"}', text)
+        self.assertIn('cache_entries{cache="model"}', text)
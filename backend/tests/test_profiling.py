@@ -0,0 +1,54 @@
+import unittest
+
+from flask import Flask, jsonify
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.models.engine import create_db_engine
+from app.profiling import current_profile, init_app, record_span, span
+
+
+class TestRequestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_db_engine('sqlite://')
+        self.addCleanup(self.engine.dispose)
+        app = Flask(__name__)
+        app.config['PROFILER_SAMPLE_RATE'] = 0
+        init_app(app, self.engine)
+        # A second app on the same engine must not double the counts
+        init_app(Flask(__name__), self.engine)
+
+        @app.route('/work')
+        def work():
+            with span('compute'):
+                with Session(self.engine) as session:
+                    session.execute(text('SELECT 1'))
+                    session.execute(text('SELECT 2'))
+            record_span('compute', 0.5)
+            return jsonify(current_profile().to_dict())
+
+        self.client = app.test_client()
+
+    def test_server_timing_header(self):
+        """
+        Test that SQL statements and spans of the request are reported in the Server-Timing header.
+        """
+        response = self.client.get('/work')
+        profile = response.get_json()
+
+        self.assertEqual(profile['sql_count'], 2)
+        self.assertGreaterEqual(profile['spans_ms']['compute'], 500)
+        timing = response.headers['Server-Timing']
+        self.assertIn('desc="2 queries"', timing)
+        self.assertIn('compute;dur=', timing)
+        self.assertIn('total;dur=', timing)
+
+    def test_spans_outside_requests_are_ignored(self):
+        with span('script'):
+            record_span('script', 1.0)
+        self.assertIsNone(current_profile())
+
+
+if __name__ == '__main__':
+    unittest.main()
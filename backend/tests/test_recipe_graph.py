@@ -0,0 +1,52 @@
+import unittest
+
+import numpy as np
+
+from app.scripts.benchmark_model_build import synthetic_catalog
+from app.scripts.lp_model import IncidenceMatrix
+from app.services.recipe_graph_service import RecipeGraph
+
+
+def mock_component_recipes(size=40):
+    recipes, _, _ = synthetic_catalog(size, seed=7)
+    for recipe in recipes:
+        recipe['produced_in'] = [{'id': 100 + recipe['id'] % 3}]
+    return recipes
+
+
+class TestRecipeGraph(unittest.TestCase):
+
+    def setUp(self):
+        self.recipes = mock_component_recipes()
+        self.graph = RecipeGraph(4, self.recipes, [])
+
+    def test_compact_arrays(self):
+        """
+        Test that the snapshot flattens recipes into aligned id, duration, adjacency and building arrays.
+        """
+        self.assertEqual(self.graph.version, 4)
+        self.assertEqual(self.graph.recipe_ids.tolist(), [recipe['id'] for recipe in self.recipes])
+        self.assertEqual(len(self.graph.ingredient_indptr), len(self.recipes) + 1)
+
+        recipe = self.recipes[5]
+        start, end = self.graph.ingredient_indptr[5], self.graph.ingredient_indptr[6]
+        self.assertEqual(self.graph.ingredient_item_ids[start:end].tolist(), [i['id'] for i in recipe['ingredients']])
+        start, end = self.graph.building_indptr[5], self.graph.building_indptr[6]
+        self.assertEqual(self.graph.building_ids[start:end].tolist(), [recipe['produced_in'][0]['id']])
+
+    def test_incidence_matrix_matches_recipe_dicts(self):
+        """
+        Test that the incidence built from the arrays matches the one built from the recipe dicts, for a subset.
+        """
+        subset = [recipe for recipe in self.recipes if recipe['id'] % 2 == 0]
+        from_graph = self.graph.incidence_matrix([recipe['id'] for recipe in subset])
+        from_dicts = IncidenceMatrix.from_recipes(subset)
+
+        self.assertEqual(from_graph.recipe_ids, from_dicts.recipe_ids)
+        self.assertEqual(sorted(from_graph.item_ids), sorted(from_dicts.item_ids))
+        order = [from_graph.item_to_index[item_id] for item_id in from_dicts.item_ids]
+        np.testing.assert_allclose(from_graph.to_dense()[order], from_dicts.to_dense())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+
+import sqlalchemy as sa
+from sqlalchemy import event
+
+from app.models import Building, Item, Recipe, RecipeCompatibleBuildings, RecipeInputs, RecipeOutputs
+from app.models.base import Base, engine
+from app.services.recipe_service import RecipeService
+from app.utils import get_session
+
+
+def row(model, **values):
+    """Fill every column the test does not care about with a placeholder of the right type."""
+    defaults = {}
+    for column in model.__table__.columns:
+        if isinstance(column.type, sa.Boolean):
+            defaults[column.name] = False
+        elif isinstance(column.type, (sa.Integer, sa.Numeric, sa.Float)):
+            defaults[column.name] = 0
+        else:
+            defaults[column.name] = ''
+    return {**defaults, **values}
+
+
+@unittest.skipUnless(engine.dialect.name == 'sqlite', "Seeds tables, so it only runs against a SQLite database")
+class TestRecipeDetailQueries(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(engine)
+        with get_session() as session:
+            session.execute(Item.__table__.insert(), [
+                row(Item, id=item_id, class_name=f"Desc_{item_id}_C", display_name=f"Item {item_id}")
+                for item_id in range(1, 11)
+            ])
+            session.execute(Building.__table__.insert(), [row(Building, id=1, class_name='Build_Constructor_C')])
+            session.execute(Recipe.__table__.insert(), [
+                row(Recipe, id=recipe_id, class_name=f"Recipe_{recipe_id}_C", display_name=f"Recipe {recipe_id}",
+                    manufactoring_duration=4)
+                for recipe_id in range(1, 9)
+            ])
+            session.execute(RecipeInputs.__table__.insert(), [
+                {'recipe_id': recipe_id, 'item_id': recipe_id, 'input_quantity': 2} for recipe_id in range(1, 9)
+            ])
+            session.execute(RecipeOutputs.__table__.insert(), [
+                {'recipe_id': recipe_id, 'item_id': recipe_id + 1, 'output_quantity': 1} for recipe_id in range(1, 9)
+            ])
+            session.execute(RecipeCompatibleBuildings.__table__.insert(), [
+                {'recipe_id': recipe_id, 'building_id': 1, 'is_produced_in_building': True}
+                for recipe_id in range(1, 9)
+            ])
+            session.commit()
+
+    @classmethod
+    def tearDownClass(cls):
+        Base.metadata.drop_all(engine)
+
+    def count_queries(self, fn):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            result = fn()
+        finally:
+            event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+        return result, len(statements)
+
+    def test_recipe_detail_query_count_does_not_grow_with_recipes(self):
+        """
+        Test that loading details costs the recipe query plus one batched query each for inputs, outputs and
+        buildings, however many recipes are requested.
+        """
+        few, few_queries = self.count_queries(lambda: RecipeService.get_recipe_by_id_detail([1, 2]))
+        many, many_queries = self.count_queries(lambda: RecipeService.get_recipe_by_id_detail(list(range(1, 9))))
+
+        self.assertEqual(len(few), 2)
+        self.assertEqual(len(many), 8)
+        self.assertEqual(few_queries, 4)
+        self.assertEqual(many_queries, 4)
+
+        recipe = next(recipe for recipe in many if recipe['id'] == 3)
+        self.assertEqual([ingredient['id'] for ingredient in recipe['ingredients']], [3])
+        self.assertEqual([product['id'] for product in recipe['products']], [4])
+        self.assertEqual(len(recipe['produced_in']), 1)
+
+    def test_recipes_by_building_reuses_one_session(self):
+        recipes, queries = self.count_queries(lambda: RecipeService.get_recipes_by_building(1))
+
+        self.assertEqual(len(recipes), 8)
+        # Building, its recipe links, then the batched detail queries
+        self.assertEqual(queries, 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import gzip
+import unittest
+from unittest.mock import patch
+
+from flask import Flask, jsonify
+
+from app.services import static_response_service
+from app.services.static_response_service import StaticResponseService
+
+
+class TestStaticResponseService(unittest.TestCase):
+
+    def setUp(self):
+        self.version = 1
+        self.catalog = [{'id': 1, 'name': 'Iron Plate'}, {'id': 2, 'name': 'Iron Rod'}]
+        self.loads = 0
+
+        def load():
+            self.loads += 1
+            return self.catalog
+
+        StaticResponseService.invalidate()
+        StaticResponseService.register('test.catalog', load)
+        StaticResponseService.register('test.empty', lambda: [])
+        self.addCleanup(static_response_service._loaders.pop, 'test.catalog')
+        self.addCleanup(static_response_service._loaders.pop, 'test.empty')
+        self.addCleanup(StaticResponseService.invalidate)
+        patcher = patch.object(StaticResponseService, 'current_version', side_effect=lambda: self.version)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        app = Flask(__name__)
+        app.add_url_rule('/catalog', 'catalog', lambda: StaticResponseService.respond('test.catalog'))
+        app.add_url_rule('/empty', 'empty', lambda: StaticResponseService.respond(
+            'test.empty', empty_response=(jsonify({'message': 'Nothing found'}), 404)))
+        self.client = app.test_client()
+
+    def test_etag_and_not_modified(self):
+        """
+        Test that the payload carries a strong ETag and a matching If-None-Match gets an empty 304.
+        """
+        response = self.client.get('/catalog')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), self.catalog)
+        etag = response.headers['ETag']
+        self.assertTrue(etag.startswith('"v1-'))
+
+        response = self.client.get('/catalog', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        self.assertEqual(response.headers['ETag'], etag)
+        self.assertEqual(self.loads, 1)
+
+    def test_precompressed_encodings(self):
+        """
+        Test that gzip (and brotli when installed) bodies are served according to Accept-Encoding.
+        """
+        response = self.client.get('/catalog', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.data), self.client.get('/catalog').data)
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+
+        if static_response_service.brotli is not None:
+            response = self.client.get('/catalog', headers={'Accept-Encoding': 'gzip, br'})
+            self.assertEqual(response.headers['Content-Encoding'], 'br')
+            self.assertEqual(static_response_service.brotli.decompress(response.data),
+                             self.client.get('/catalog').data)
+
+    def test_etag_per_encoding(self):
+        """
+        Test that each encoding has its own ETag, revalidates against it, and does not match another encoding's tag.
+        """
+        encodings = ['identity', 'gzip'] + (['br'] if static_response_service.brotli is not None else [])
+        etags = {encoding: self.client.get('/catalog', headers={'Accept-Encoding': encoding}).headers['ETag']
+                 for encoding in encodings}
+        self.assertEqual(len(set(etags.values())), len(encodings))
+
+        for encoding, etag in etags.items():
+            with self.subTest(encoding=encoding):
+                response = self.client.get('/catalog', headers={'Accept-Encoding': encoding, 'If-None-Match': etag})
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.headers['ETag'], etag)
+                for other_encoding, other_etag in etags.items():
+                    if other_encoding != encoding:
+                        response = self.client.get('/catalog', headers={'Accept-Encoding': encoding,
+                                                                        'If-None-Match': other_etag})
+                        self.assertEqual(response.status_code, 200)
+                        self.assertEqual(response.headers['ETag'], etag)
+
+    def test_rebuilt_on_version_change(self):
+        """
+        Test that a new data version re-renders the payload and old ETags stop matching.
+        """
+        etag = self.client.get('/catalog').headers['ETag']
+        self.version = 2
+        self.catalog = self.catalog + [{'id': 3, 'name': 'Screw'}]
+
+        response = self.client.get('/catalog', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()), 3)
+        self.assertNotEqual(response.headers['ETag'], etag)
+        self.assertEqual(self.loads, 2)
+
+    def test_empty_response(self):
+        """
+        Test that the route's fallback is returned when the loader produced no data.
+        """
+        response = self.client.get('/empty')
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
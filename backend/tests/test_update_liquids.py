@@ -0,0 +1,79 @@
+import copy
+import unittest
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.models import Item, RecipeInputs, RecipeOutputs
+from app.models.base import Base
+from app.models.engine import create_db_engine
+from app.scripts.adjust_recipe_amounts_for_fluids import UpdateLiquids
+from app.scripts.benchmark_ingest import synthetic_supported_objects
+from app.scripts.insert_data import bulk_insert_fully_classified_objects, classify_objects_into_subtypes
+from app.services.data_version_service import DataVersionService
+
+
+class TestUpdateLiquids(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_db_engine('sqlite://')
+        self.addCleanup(self.engine.dispose)
+        Base.metadata.create_all(self.engine)
+        self.objects = synthetic_supported_objects(30, 40)
+        self.objects["Desc_"][0]["form"] = "RF_LIQUID"
+        self.objects["Desc_"][1]["form"] = "RF_INVALID"
+
+    def load(self, objects):
+        with Session(self.engine) as session:
+            classified = classify_objects_into_subtypes(session, copy.deepcopy(objects))
+            bulk_insert_fully_classified_objects(session, classified)
+            session.commit()
+
+    def quantities(self):
+        with Session(self.engine) as session:
+            return {model: session.execute(select(model.id, model.item_id, getattr(model, column))).all()
+                    for model, column in ((RecipeInputs, 'input_quantity'), (RecipeOutputs, 'output_quantity'))}
+
+    def test_fluid_amounts_adjusted_during_classification(self):
+        raw_objects = {**self.objects, "Desc_": [{**item, "form": "RF_SOLID"} for item in self.objects["Desc_"]]}
+        self.load(raw_objects)
+        raw = self.quantities()
+        Base.metadata.drop_all(self.engine)
+        Base.metadata.create_all(self.engine)
+        self.load(self.objects)
+
+        adjusted = self.quantities()
+        for model in raw:
+            for (_, item_id, raw_quantity), (_, _, quantity) in zip(raw[model], adjusted[model]):
+                expected = {1: (raw_quantity + 500) // 1000, 2: 1}.get(item_id, raw_quantity)
+                self.assertEqual(quantity, expected)
+                self.assertIsInstance(quantity, int)
+
+    def test_fluid_amounts_rounded_half_up(self):
+        self.assertEqual(UpdateLiquids.adjusted_quantity("1500", "RF_LIQUID"), 2)
+        self.assertEqual(UpdateLiquids.adjusted_quantity(1499, "RF_GAS"), 1)
+        self.assertEqual(UpdateLiquids.adjusted_quantity(45000, "RF_LIQUID"), 45)
+        self.assertEqual(UpdateLiquids.adjusted_quantity("7", "RF_SOLID"), 7)
+
+    def test_adjusting_stored_amounts_is_idempotent(self):
+        """
+        Test that the set-based adjustment of raw stored amounts runs once per unnormalized data version.
+        """
+        self.load(self.objects)
+        with Session(self.engine) as session:
+            # Store raw amounts, as written by a loader that does not normalize them
+            session.execute(update(RecipeInputs).where(RecipeInputs.item_id == 1).values(input_quantity=3000))
+            first_output = session.scalars(select(RecipeOutputs.id).where(RecipeOutputs.item_id == 1)).first()
+            session.execute(update(RecipeOutputs).where(RecipeOutputs.id == first_output).values(output_quantity=1500))
+            DataVersionService.bump_version(session, "Raw load", fluid_amounts_normalized=False)
+            session.commit()
+
+            self.assertGreater(UpdateLiquids.adjust_recipe_amounts_for_fluids(session), 0)
+            self.assertEqual(UpdateLiquids.adjust_recipe_amounts_for_fluids(session), 0)
+            self.assertEqual(set(session.scalars(select(RecipeInputs.input_quantity)
+                                                 .where(RecipeInputs.item_id == 1))), {3})
+            # Rounded like adjusted_quantity rounds the amounts it classifies
+            self.assertEqual(session.scalar(select(RecipeOutputs.output_quantity)
+                                            .where(RecipeOutputs.id == first_output)),
+                             UpdateLiquids.adjusted_quantity(1500, "RF_LIQUID"))
+            self.assertEqual(session.scalar(select(Item.form).where(Item.id == 1)), "RF_LIQUID")
@@ -1,6 +1,11 @@
+import json
+import os
+import tempfile
 import unittest
+from unittest.mock import patch
 
-from app.utils import to_snake_case
+from app import utils
+from app.utils import detect_json_encoding, stream_json_records, to_snake_case
 
 class TestToSnakeCase(unittest.TestCase):
     def test_simple_conversion(self):
@@ -25,6 +30,40 @@ class TestToSnakeCase(unittest.TestCase):
         self.assertEqual(to_snake_case('ab_wordWord'), 'ab_word_word')
         self.assertEqual(to_snake_case('ab_wordWord'), 'ab_word_word')
 
+class TestStreamJsonRecords(unittest.TestCase):
+    game_data = [
+        {"NativeClass": "Class'/Script/FactoryGame.FGItemDescriptor'", "Classes": [
+            {"ClassName": "Desc_IronPlate_C", "mDisplayName": "Iron Plate é", "mForm": "RF_SOLID"},
+            {"ClassName": "Desc_Water_C", "mAmounts": [1, 2.5, {"nested": None}], "mQuote": "a \"b\" c"},
+        ]},
+        {"Classes": [], "NativeClass": "Empty"},
+        {"NativeClass": "Class'/Script/FactoryGame.FGRecipe'", "Classes": [{"ClassName": "Recipe_IronPlate_C"}]},
+    ]
+
+    def write(self, encoding):
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        with open(path, 'w', encoding=encoding) as file:
+            json.dump(self.game_data, file, indent=2, ensure_ascii=False)
+        return path
+
+    def test_detects_encoding_from_bom(self):
+        for encoding, detected in (('utf-16', 'utf-16'), ('utf-8-sig', 'utf-8-sig'), ('utf-8', 'utf-8')):
+            with self.subTest(encoding=encoding):
+                self.assertEqual(detect_json_encoding(self.write(encoding)), detected)
+
+    def test_yields_every_record_in_order(self):
+        """
+        Test that the records of every native class are streamed in file order, with values cut by small chunks.
+        """
+        expected = [record for native_class in self.game_data for record in native_class["Classes"]]
+        with patch.object(utils, 'ijson', None), patch.object(utils, 'JSON_CHUNK_SIZE', 7):
+            for encoding in ('utf-16', 'utf-8'):
+                with self.subTest(encoding=encoding):
+                    self.assertEqual(list(stream_json_records(self.write(encoding))), expected)
+
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -0,0 +1,6 @@
+"""
+Satisfactory_App/backend/wsgi.py
+Entry point for production servers: gunicorn -c gunicorn.conf.py wsgi:app
+"""
+
+from run import app  # noqa: F401